@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import psycopg2
 from psycopg2 import pool
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 import functools
 import time
 from collections import defaultdict, ChainMap
@@ -174,6 +174,7 @@ def init_db_tables():
                 home_team TEXT NOT NULL,
                 away_team TEXT NOT NULL,
                 start_time_beijing TEXT NOT NULL,  -- 新增非空约束
+                start_time_ts TIMESTAMP,  -- 开赛时间的TIMESTAMP副本（写入时同步），供时间窗口查询走索引
                 time_until_start TEXT,
                 result_value NUMERIC(10, 2) DEFAULT NULL,  -- 新增字段
                 total_result NUMERIC(10, 2) DEFAULT NULL,  -- 新增：大小球盘指数结果
@@ -209,9 +210,64 @@ def init_db_tables():
             )
             """)
 
+            # 迁移：旧表补充start_time_ts列并回填（替代查询中逐行的start_time_beijing::timestamp转换）
+            cursor.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS start_time_ts TIMESTAMP")
+            cursor.execute("""
+            UPDATE matches SET start_time_ts = start_time_beijing::timestamp
+            WHERE start_time_ts IS NULL
+              AND start_time_beijing ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$'
+            """)
+
+            # 每个盘口（盘口值+方向）当前的189指数，由calculate_is189/calculate_total_189的结果写入，
+            # revision取自序列，仅在指数变化时递增，供监控worker按revision增量读取
+            cursor.execute("CREATE SEQUENCE IF NOT EXISTS line_189_index_revision_seq")
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS line_189_index (
+                match_id INTEGER NOT NULL,
+                type TEXT NOT NULL,  -- 'spread' 或 'total'
+                line_value TEXT NOT NULL,  -- 规范化盘口值（如-1.0记为-1）
+                side TEXT NOT NULL,  -- 'home'/'away' 或 'over'/'under'
+                index_value NUMERIC(10, 2) NOT NULL,
+                revision BIGINT NOT NULL DEFAULT nextval('line_189_index_revision_seq'),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (match_id, type, line_value, side),
+                FOREIGN KEY (match_id) REFERENCES matches (id)
+            )
+            """)
+
+            # 每个(比赛, 盘口, 方向, 数据源)的赔率汇总，随赔率写入增量维护，供看板按日期区间直接读取
+            cursor.execute("SELECT to_regclass('match_line_summary') IS NULL")
+            summary_missing = cursor.fetchone()[0]
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS match_line_summary (
+                match_id INTEGER NOT NULL,
+                type TEXT NOT NULL,  -- 'spread' 或 'total'
+                line_value TEXT NOT NULL,  -- 盘口值（与赔率表一致）
+                side TEXT NOT NULL,
+                source INTEGER NOT NULL,
+                first_odds NUMERIC(6,3),
+                first_time TIMESTAMP NOT NULL,
+                last_odds NUMERIC(6,3),
+                last_time TIMESTAMP NOT NULL,
+                min_odds NUMERIC(6,3),
+                max_odds NUMERIC(6,3),
+                move_count INTEGER NOT NULL DEFAULT 0,  -- 首条之后赔率发生变化的次数
+                PRIMARY KEY (match_id, type, line_value, side, source),
+                FOREIGN KEY (match_id) REFERENCES matches (id)
+            )
+            """)
+            if summary_missing:
+                backfill_match_line_summary(cursor)
+
             # 创建索引以加速查询（包含start_time_beijing）
             cursor.execute(
                 "CREATE INDEX IF NOT EXISTS idx_matches_name_time ON matches (match_name, start_time_beijing)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_matches_start_time_ts ON matches (start_time_ts)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_matches_teams_time ON matches (league_name, home_team, away_team, start_time_ts)")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_line_189_index_revision ON line_189_index (revision)")
             cursor.execute(
                 "CREATE INDEX IF NOT EXISTS idx_spread_odds ON spread_odds (match_id, source, spread_value, side, recorded_at)")
             cursor.execute(
@@ -241,14 +297,20 @@ def save_match_info(match_name: str, match_data: Dict) -> Optional[int]:
             result_value = match_data.get("result", None)  # 关键行：获取计算结果
             # 提取大小球盘指数结果（新增）
             total_result = match_data.get("total_result", None)
+            # 同步维护TIMESTAMP类型的开赛时间（格式异常时留空，不影响写入）
+            try:
+                start_time_ts = datetime.strptime(match_data["start_time_beijing"], "%Y-%m-%d %H:%M:%S")
+            except (ValueError, TypeError):
+                start_time_ts = None
             # 插入或更新比赛信息（基于match_name和start_time_beijing）
             cursor.execute("""
-            INSERT INTO matches (match_name, league_name, home_team, away_team, start_time_beijing, time_until_start, result_value, total_result)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO matches (match_name, league_name, home_team, away_team, start_time_beijing, start_time_ts, time_until_start, result_value, total_result)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             ON CONFLICT (match_name, start_time_beijing) DO UPDATE
             SET league_name = EXCLUDED.league_name,
                 home_team = EXCLUDED.home_team,
                 away_team = EXCLUDED.away_team,
+                start_time_ts = EXCLUDED.start_time_ts,
                 time_until_start = EXCLUDED.time_until_start,
                 result_value = EXCLUDED.result_value,  -- 仅更新result字段
                 total_result = EXCLUDED.total_result
@@ -259,12 +321,14 @@ def save_match_info(match_name: str, match_data: Dict) -> Optional[int]:
                 match_data["home_team"],
                 match_data["away_team"],
                 match_data["start_time_beijing"],  # 必须非空
+                start_time_ts,
                 match_data["time_until_start"],
                 result_value,
                 total_result
             ))
 
             match_id = cursor.fetchone()[0]
+            save_line_189_index(cursor, match_id, match_data)
             conn.commit()
             return match_id
     except Exception as e:
@@ -275,6 +339,59 @@ def save_match_info(match_name: str, match_data: Dict) -> Optional[int]:
         release_db_connection(conn)
 
 
+# === 新增：保存每个盘口的189指数 ===
+def save_line_189_index(cursor, match_id: int, match_data: Dict):
+    """
+    将本轮calculate_is189/calculate_total_189的逐盘口结果写入line_189_index（与比赛信息同一事务）
+    让分盘每条计算记录对应两个盘口：主队(spread, home)与客队(opposite_spread, away)
+    """
+    rows = {}
+    for calc in match_data.get("all_calculations", []):
+        rows[("spread", calc["spread"], "home")] = calc["result"]
+        rows[("spread", calc["opposite_spread"], "away")] = calc["result"]
+    for calc in match_data.get("all_total_calculations", []):
+        rows[("total", calc["total"], "over")] = calc["result"]
+        rows[("total", calc["total"], "under")] = calc["result"]
+    if not rows:
+        return
+
+    # 指数未变化时不更新，避免revision无意义递增
+    execute_values(cursor, """
+    INSERT INTO line_189_index (match_id, type, line_value, side, index_value)
+    VALUES %s
+    ON CONFLICT (match_id, type, line_value, side) DO UPDATE
+    SET index_value = EXCLUDED.index_value,
+        revision = nextval('line_189_index_revision_seq'),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE line_189_index.index_value IS DISTINCT FROM EXCLUDED.index_value
+    """, [(match_id, odds_type, line_value, side, index_value)
+          for (odds_type, line_value, side), index_value in rows.items()])
+
+
+# === 新增：由历史赔率回填盘口汇总表（仅在汇总表首次创建时执行一次） ===
+def backfill_match_line_summary(cursor):
+    """按赔率表全部历史计算每个盘口的首/末/最低/最高赔率与变化次数"""
+    for odds_type, table, field in (("spread", "spread_odds", "spread_value"),
+                                    ("total", "total_odds", "total_value")):
+        cursor.execute(f"""
+        INSERT INTO match_line_summary (match_id, type, line_value, side, source, first_odds, first_time,
+                                        last_odds, last_time, min_odds, max_odds, move_count)
+        SELECT match_id, %s, {field}, side, source,
+               (ARRAY_AGG(odds_value ORDER BY recorded_at, id))[1], MIN(recorded_at),
+               (ARRAY_AGG(odds_value ORDER BY recorded_at DESC, id DESC))[1], MAX(recorded_at),
+               MIN(odds_value), MAX(odds_value), SUM(moved)
+        FROM (
+            SELECT id, match_id, {field}, side, source, odds_value, recorded_at,
+                   CASE WHEN ROW_NUMBER() OVER w > 1 AND odds_value IS DISTINCT FROM LAG(odds_value) OVER w
+                        THEN 1 ELSE 0 END AS moved
+            FROM {table}
+            WINDOW w AS (PARTITION BY match_id, {field}, side, source ORDER BY recorded_at, id)
+        ) changes
+        GROUP BY match_id, {field}, side, source
+        """, (odds_type,))
+        print(f"✅ 已回填{table}盘口汇总 {cursor.rowcount} 条")
+
+
 # === 修改后的保存赔率变化函数 ===
 def save_odds_changes(match_id: int, match_name: str, changes: List[Dict]):
     """保存赔率变化到数据库（明确区分方向，避免混淆）"""
@@ -311,6 +428,31 @@ def save_odds_changes(match_id: int, match_name: str, changes: List[Dict]):
                     change["new_value"]  # 允许 None 值
                 ))
 
+                # 同一事务内更新该盘口的汇总（时间取CURRENT_TIMESTAMP，与上面recorded_at的默认值一致）
+                cursor.execute("""
+                INSERT INTO match_line_summary (match_id, type, line_value, side, source,
+                                                first_odds, first_time, last_odds, last_time, min_odds, max_odds)
+                VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, %s, CURRENT_TIMESTAMP, %s, %s)
+                ON CONFLICT (match_id, type, line_value, side, source) DO UPDATE
+                SET move_count = match_line_summary.move_count
+                                 + CASE WHEN match_line_summary.last_odds IS DISTINCT FROM EXCLUDED.last_odds
+                                        THEN 1 ELSE 0 END,
+                    last_odds = EXCLUDED.last_odds,
+                    last_time = EXCLUDED.last_time,
+                    min_odds = LEAST(match_line_summary.min_odds, EXCLUDED.min_odds),
+                    max_odds = GREATEST(match_line_summary.max_odds, EXCLUDED.max_odds)
+                """, (
+                    match_id,
+                    change["type"],
+                    change[f"{change['type']}_value"],
+                    change["side"],
+                    change["source"],
+                    change["new_value"],
+                    change["new_value"],
+                    change["new_value"],
+                    change["new_value"]
+                ))
+
             conn.commit()
             print(f"✅ 已保存 {match_name} 的 {len(changes)} 条赔率变化记录")
     except Exception as e:
@@ -3,15 +3,444 @@ import requests
 import asyncio
 import websockets
 import json
+import os
+import sqlite3
+import aiohttp
+from collections import OrderedDict, deque
+from functools import partial
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Tuple, Optional, Any
-from flask import Flask, jsonify, request
+from typing import Callable, List, Dict, Tuple, Optional, Any
 import threading
-from flask_cors import CORS
+import queue
+from aiohttp import web
+from handicap_pairing import line_keys, pair_opposites
 
-app = Flask(__name__)
+routes = web.RouteTableDef()
 calculator_instance = None  # 全局计算器实例引用
-CORS(app)  # 允许跨域请求
+
+
+class RunningProbabilityMean:
+    """单个（比赛, 盘口, 方向, 数据源）赛前窗口内隐含概率的累计和与计数，只消费新增的赔率记录"""
+    __slots__ = ("prob_sum", "count", "consumed")
+
+    def __init__(self):
+        self.prob_sum = 0.0
+        self.count = 0
+        self.consumed = 0  # 已消费的赔率历史条数（新记录从该下标开始）
+
+    def mean(self) -> Optional[float]:
+        return self.prob_sum / self.count if self.count else None
+
+
+# 策略配置文件不存在时写出的默认配置（与原内置high/low/min模式一致）
+DEFAULT_STRATEGY_CONFIG = {
+    "kickoff_window_minutes": 5,  # 仅计算该分钟数内开赛（或已开赛）的比赛（所有策略共用的候选范围）
+    "odds_window_minutes": 5,  # 仅使用开赛前该分钟数以内的赔率
+    "strategies": [
+        {
+            "name": "high",
+            "send_enabled": False,
+            "send_threshold_minutes": 0,
+            "target_queue": "high",
+            "rules": [{"type": "source2_listed"}, {"type": "handicap_min", "value": 0}]
+        },
+        {
+            "name": "low",
+            "send_enabled": False,
+            "send_threshold_minutes": 0,
+            "target_queue": "low",
+            "rules": [
+                {"type": "source2_listed"},
+                {"type": "handicap_in",
+                 "values": ["-2.25", "-2", "-1.75", "-1.25", "-0.5", "0.5", "0.75", "1", "1.75", "2", "2.25", "2.5"]}
+            ]
+        },
+        {
+            "name": "min",
+            "send_enabled": False,
+            "send_threshold_minutes": 0,
+            "target_queue": "min",
+            "rules": [{"type": "source2_listed"}]
+        }
+    ]
+}
+
+
+def compile_rule(rule: Dict[str, Any]) -> Callable[[Dict[str, Any], Dict[str, Any]], bool]:
+    """把一条规则配置预编译为谓词 (盘口, 候选依据) -> bool，配置不合法时抛出ValueError"""
+    rule_type = rule.get("type")
+    try:
+        if rule_type == "source2_listed":
+            # source2中存在该盘口（无source2数据时放行）
+            return lambda item, facts: facts["source2_listed"] is not False
+        if rule_type == "handicap_min":
+            minimum = float(rule["value"])
+            return lambda item, facts: facts["handicap_num"] is not None and facts["handicap_num"] >= minimum
+        if rule_type == "handicap_max":
+            maximum = float(rule["value"])
+            return lambda item, facts: facts["handicap_num"] is not None and facts["handicap_num"] <= maximum
+        if rule_type == "handicap_in":
+            allowed = frozenset(str(v).strip() for v in rule["values"])
+            return lambda item, facts: facts["handicap"] in allowed
+        if rule_type == "handicap_not_in":
+            excluded = frozenset(str(v).strip() for v in rule["values"])
+            return lambda item, facts: facts["handicap"] not in excluded
+        if rule_type == "side_in":
+            sides = frozenset(str(v).lower().strip() for v in rule["values"])
+            return lambda item, facts: facts["side"] in sides
+        if rule_type == "difference_min":
+            minimum = float(rule["value"])
+            return lambda item, facts: item.get("difference", 0.0) >= minimum
+        if rule_type == "kickoff_within":
+            # 距开赛不超过指定分钟数（已开赛视为满足），用于在共用候选范围内收窄单个策略的时间窗口
+            minutes = float(rule["minutes"])
+            return lambda item, facts: facts["started"] or (
+                    facts["minutes_to_kickoff"] is not None and facts["minutes_to_kickoff"] <= minutes)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"规则{rule_type}参数无效：{e}")
+    raise ValueError(f"未知规则类型：{rule_type}")
+
+
+class Strategy:
+    """发送模式：由配置规则预编译的一组谓词（全部满足即入选），与其他模式在同一次候选遍历中求值"""
+
+    def __init__(self, name: str, predicates: List[Callable[[Dict[str, Any], Dict[str, Any]], bool]],
+                 send_enabled: bool = False, send_threshold_minutes: float = 0, target_queue: Optional[str] = None,
+                 rules: Optional[List[Dict[str, Any]]] = None):
+        self.name = name
+        self.predicates = predicates
+        self.send_enabled = send_enabled  # 发送开关
+        self.send_threshold_minutes = send_threshold_minutes  # 距开赛不超过该分钟数才发送
+        self.target_queue = target_queue or name  # 投递队列（alert_type），发送限制与去重按队列统计
+        self.rules = rules or []  # 原始规则配置（用于状态展示）
+        self.stats = {"candidates": 0, "selected": 0, "opposite_filtered": 0, "final": 0, "last_ms": None}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Strategy":
+        """从单个策略配置构建策略（规则逐条预编译）"""
+        name = config.get("name")
+        if not name or not isinstance(name, str):
+            raise ValueError(f"策略缺少名称：{config}")
+        rules = config.get("rules", [])
+        if not isinstance(rules, list):
+            raise ValueError(f"策略[{name}]的rules必须是列表")
+        try:
+            predicates = [compile_rule(rule) for rule in rules]
+        except ValueError as e:
+            raise ValueError(f"策略[{name}]：{e}")
+        return cls(name, predicates,
+                   send_enabled=bool(config.get("send_enabled", False)),
+                   send_threshold_minutes=float(config.get("send_threshold_minutes", 0)),
+                   target_queue=config.get("target_queue"),
+                   rules=rules)
+
+    def accepts(self, item: Dict[str, Any], facts: Dict[str, Any]) -> bool:
+        for predicate in self.predicates:
+            if not predicate(item, facts):
+                return False
+        return True
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "send_enabled": self.send_enabled,
+            "send_threshold_minutes": self.send_threshold_minutes,
+            "target_queue": self.target_queue,
+            "rules": self.rules,
+            "stats": dict(self.stats)
+        }
+
+
+class SendStateStore:
+    """
+    已发送盘口的持久化记录（SQLite），内存中保留LRU缓存与各模式按比赛的发送统计
+    记录按开赛时间过期清理，启动时一次查询加载未过期记录，重启后不会重复发送
+    """
+
+    def __init__(self, db_path: str, retention_hours: int, max_items: int, tz):
+        self.db_path = db_path
+        self.retention_hours = retention_hours  # 开赛后保留时长（小时）
+        self.max_items = max_items  # 内存LRU上限，超出后未命中时回查SQLite
+        self.tz = tz
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sent_signals (
+            item_id TEXT PRIMARY KEY,
+            mode TEXT NOT NULL,
+            match_key TEXT NOT NULL,
+            side TEXT,
+            kickoff TEXT NOT NULL,
+            sent_at TEXT NOT NULL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sent_signals_kickoff ON sent_signals (kickoff)")
+        self.conn.commit()
+        self.sent_items = OrderedDict()  # {盘口唯一标识: 开赛时间}，按最近使用排序
+        self.evicted = False  # 内存是否淘汰过记录（淘汰后未命中需回查SQLite）
+        self.match_records = {"high": {}, "low": {}, "min": {}}  # {模式: {比赛键: {"sent_count", "side", "kickoff"}}}
+        self.last_purge = 0.0
+
+    def expiry_cutoff(self) -> str:
+        return (datetime.now(self.tz) - timedelta(hours=self.retention_hours)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def load(self):
+        """启动时一次性加载未过期的发送记录"""
+        with self.lock:
+            rows = self.conn.execute("""
+            SELECT item_id, mode, match_key, side, kickoff FROM sent_signals
+            WHERE kickoff >= ? ORDER BY sent_at
+            """, (self.expiry_cutoff(),)).fetchall()
+            self.sent_items.clear()
+            self.evicted = False
+            for records in self.match_records.values():
+                records.clear()
+            for item_id, mode, match_key, side, kickoff in rows:
+                self._remember(item_id, kickoff)
+                self._count_match(mode, match_key, side, kickoff)
+        print(f"✅ 已加载发送记录：{len(rows)}条（{self.db_path}）")
+
+    def _remember(self, item_id: str, kickoff: str):
+        self.sent_items[item_id] = kickoff
+        self.sent_items.move_to_end(item_id)
+        while len(self.sent_items) > self.max_items:
+            self.sent_items.popitem(last=False)
+            self.evicted = True
+
+    def _count_match(self, mode: str, match_key: str, side: Optional[str], kickoff: str):
+        records = self.match_records.setdefault(mode, {})
+        record = records.get(match_key, {"sent_count": 0, "side": None})
+        records[match_key] = {"sent_count": record["sent_count"] + 1, "side": side, "kickoff": kickoff}
+
+    def contains(self, item_id: str) -> bool:
+        """盘口是否已发送（内存未命中且发生过淘汰时回查SQLite）"""
+        with self.lock:
+            if item_id in self.sent_items:
+                self.sent_items.move_to_end(item_id)
+                return True
+            if not self.evicted:
+                return False
+            row = self.conn.execute("SELECT kickoff FROM sent_signals WHERE item_id = ?", (item_id,)).fetchone()
+            if row:
+                self._remember(item_id, row[0])
+            return row is not None
+
+    def get_match_record(self, mode: str, match_key: str) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.match_records.get(mode, {}).get(match_key, {"sent_count": 0, "side": None}))
+
+    def match_stats(self, mode: str) -> Tuple[int, int]:
+        """返回某模式的（已发送比赛数, 累计发送条数）"""
+        with self.lock:
+            records = self.match_records.get(mode, {})
+            return len(records), sum([r["sent_count"] for r in records.values()])
+
+    def record_sent(self, item_id: str, mode: str, match_key: str, side: Optional[str], kickoff: str):
+        """记录一次成功发送（先落盘再更新内存）"""
+        sent_at = datetime.now(self.tz).strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            self.conn.execute("""
+            INSERT OR REPLACE INTO sent_signals (item_id, mode, match_key, side, kickoff, sent_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, (item_id, mode, match_key, side, kickoff, sent_at))
+            self.conn.commit()
+            self._remember(item_id, kickoff)
+            self._count_match(mode, match_key, side, kickoff)
+
+    def purge_expired(self, min_interval: int = 60):
+        """清理开赛已超过保留时长的记录（内存与SQLite），最少间隔min_interval秒执行一次"""
+        if time.time() - self.last_purge < min_interval:
+            return
+        self.last_purge = time.time()
+        cutoff = self.expiry_cutoff()
+        with self.lock:
+            deleted = self.conn.execute("DELETE FROM sent_signals WHERE kickoff < ?", (cutoff,)).rowcount
+            self.conn.commit()
+            for item_id in [k for k, kickoff in self.sent_items.items() if kickoff < cutoff]:
+                del self.sent_items[item_id]
+            for records in self.match_records.values():
+                for match_key in [k for k, r in records.items() if r.get("kickoff", "") < cutoff]:
+                    del records[match_key]
+        if deleted:
+            print(f"🧹 清理过期发送记录：{deleted}条")
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sent_signals").fetchone()[0]
+
+
+class SignalDeliveryQueue:
+    """
+    异步信号投递：在主事件循环中复用一个aiohttp会话，按投递队列（策略的target_queue）限制并发，
+    网络异常与5xx按幂等键重试，并统计从入队到完成的投递延迟；计算线程只负责入队
+    """
+
+    MODES = ("high", "low", "min")  # 预建的投递队列，其他队列在首次入队时创建
+
+    def __init__(self, target_url: str, concurrency_per_mode: int, max_retries: int, timeout: int,
+                 retry_delay: float):
+        self.target_url = target_url
+        self.concurrency_per_mode = concurrency_per_mode
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.loop = None
+        self.session = None
+        self.semaphores = {}
+        self.tasks = set()  # 未完成的投递（concurrent.futures.Future）
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()  # {盘口唯一标识: (模式, 比赛键, 方向)}，入队到投递结束期间
+        self.metrics = {}
+        for mode in self.MODES:
+            self.lane_metrics(mode)
+
+    def lane_metrics(self, mode: str) -> Dict[str, Any]:
+        """返回投递队列的统计（不存在时创建）"""
+        metrics = self.metrics.get(mode)
+        if metrics is None:
+            metrics = self.metrics.setdefault(mode, {"queued": 0, "delivered": 0, "failed": 0, "retries": 0,
+                                                     "in_flight": 0, "latencies_ms": deque(maxlen=500)})
+        return metrics
+
+    async def start(self):
+        """在当前事件循环中创建HTTP会话（与WebSocket客户端、API共用同一个事件循环）"""
+        if self.session and not self.session.closed:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency_per_mode * len(self.MODES))
+        )
+        self.semaphores = {}  # {投递队列: 信号量}，在事件循环中按需创建
+        print(f"✅ 异步投递已启动：每队列并发{self.concurrency_per_mode}，最多尝试{self.max_retries}次")
+
+    async def stop(self):
+        """取消未完成的投递并关闭会话（未投递成功的盘口下一周期会重新入队）"""
+        if not self.session or self.session.closed:
+            return
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*[asyncio.wrap_future(task) for task in tasks], return_exceptions=True)
+        await self.session.close()
+        with self.lock:
+            self.pending.clear()
+        print("🔌 异步投递已停止")
+
+    def is_pending(self, item_id: str) -> bool:
+        with self.lock:
+            return item_id in self.pending
+
+    def pending_record(self, mode: str, match_key: str) -> Tuple[int, Optional[str]]:
+        """返回某模式下某场比赛投递中的（盘口数, 最后入队的方向）"""
+        with self.lock:
+            sides = [side for m, k, side in self.pending.values() if m == mode and k == match_key]
+        return len(sides), (sides[-1] if sides else None)
+
+    def submit(self, item_id: str, mode: str, match_key: str, side: str, label: str,
+               payload: Dict[str, Any], on_delivered) -> bool:
+        """入队一个待发送盘口（可在计算线程中调用）；投递未启动或该盘口已在投递中时返回False"""
+        if not self.session or self.session.closed:
+            return False
+        with self.lock:
+            if item_id in self.pending:
+                return False
+            self.pending[item_id] = (mode, match_key, side)
+            self.lane_metrics(mode)["queued"] += 1
+        task = asyncio.run_coroutine_threadsafe(
+            self._deliver(item_id, mode, label, payload, on_delivered, time.perf_counter()), self.loop)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def _deliver(self, item_id: str, mode: str, label: str, payload: Dict[str, Any], on_delivered,
+                       queued_at: float):
+        metrics = self.lane_metrics(mode)
+        semaphore = self.semaphores.get(mode)
+        if semaphore is None:
+            semaphore = self.semaphores[mode] = asyncio.Semaphore(self.concurrency_per_mode)
+        delivered = False
+        try:
+            async with semaphore:
+                metrics["in_flight"] += 1
+                try:
+                    delivered = await self._post_with_retry(item_id, mode, label, payload)
+                finally:
+                    metrics["in_flight"] -= 1
+
+            metrics["latencies_ms"].append((time.perf_counter() - queued_at) * 1000)
+            if delivered:
+                metrics["delivered"] += 1
+                # 发送记录落盘（SQLite提交）放到线程中执行，不阻塞事件循环
+                await asyncio.to_thread(on_delivered)
+            else:
+                metrics["failed"] += 1
+        except Exception as e:
+            print(f"❌ 投递处理异常 [{mode}]：{label}，{str(e)}")
+        finally:
+            with self.lock:
+                self.pending.pop(item_id, None)
+
+    async def _post_with_retry(self, item_id: str, mode: str, label: str, payload: Dict[str, Any]) -> bool:
+        """发送请求：同一盘口的所有尝试携带相同幂等键，仅网络异常/超时/5xx重试"""
+        headers = {"Idempotency-Key": item_id}
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self.session.post(self.target_url, json=payload, headers=headers) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+                if result.get("status") == "success":
+                    print(f"✅ 发送成功 [{mode}]：{label}")
+                    return True
+                print(f"❌ 发送失败 [{mode}]：服务器返回 {result.get('message', '未知错误')}")
+                return False
+            except aiohttp.ClientResponseError as e:
+                if e.status < 500:
+                    print(f"❌ 发送失败 [{mode}]：HTTP {e.status}")
+                    return False
+                error = f"HTTP {e.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            except Exception as e:
+                print(f"❌ 发送异常 [{mode}]：{str(e)}")
+                return False
+
+            if attempt < self.max_retries:
+                self.lane_metrics(mode)["retries"] += 1
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                print(f"⚠️ 发送重试 [{mode}]：{label}（{error}），{delay}秒后第{attempt + 1}次尝试")
+                await asyncio.sleep(delay)
+            else:
+                print(f"❌ 发送异常 [{mode}]：{label}（{error}），已达最大尝试次数")
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """各投递队列计数与延迟（毫秒）"""
+        with self.lock:
+            pending_by_mode = {}
+            for mode, _, _ in self.pending.values():
+                pending_by_mode[mode] = pending_by_mode.get(mode, 0) + 1
+            lanes = list(self.metrics.items())
+        result = {}
+        for mode, metrics in lanes:
+            latencies = sorted(metrics["latencies_ms"])
+            latency = None
+            if latencies:
+                latency = {
+                    "avg": round(sum(latencies) / len(latencies), 1),
+                    "p50": round(latencies[len(latencies) // 2], 1),
+                    "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+                    "max": round(latencies[-1], 1)
+                }
+            result[mode] = {
+                "queued": metrics["queued"],
+                "delivered": metrics["delivered"],
+                "failed": metrics["failed"],
+                "retries": metrics["retries"],
+                "in_flight": metrics["in_flight"],
+                "pending": pending_by_mode.get(mode, 0),
+                "latency_ms": latency
+            }
+        return result
 
 
 class HighFrequencyOddsCalculator:
@@ -19,6 +448,8 @@ class HighFrequencyOddsCalculator:
         # 核心配置参数
         self.HIGH_FREQ_API_URL = "http://160.25.20.18:8766/api/upcoming-odds-full"  # 高频计算API地址
         self.CHECK_INTERVAL = 10  # 检查间隔时间(秒)
+        self.KICKOFF_WINDOW_MINUTES = 5  # 仅计算该分钟数内开赛（或已开赛）的比赛（以策略配置文件为准）
+        self.ODDS_WINDOW_MINUTES = 5  # 仅使用开赛前该分钟数以内的赔率（以策略配置文件为准）
         self.running = False  # 运行状态标志
         self.beijing_tz = timezone(timedelta(hours=8))  # 北京时区(UTC+8)
 
@@ -27,61 +458,85 @@ class HighFrequencyOddsCalculator:
         self.old_program_connected = False  # 连接状态
         self.old_program_ws = None  # WebSocket连接实例
         self.old_data_cache = {}  # 旧程序数据缓存
+        self.source2_index = {}  # {标准化比赛键: {"home": 盘口集合, "away": 盘口集合}}，随WebSocket消息更新
         self.ws_running = False  # WebSocket运行标志（新增）
-        self.ws_client_thread = None  # WebSocket线程引用（调整）
+        self.ws_client_task = None  # WebSocket客户端任务（与API、计算调度共用同一事件循环）
 
-        # 发送配置（所有模式固定0分钟阈值）
-        self.SEND_MIN_THRESHOLD_MINUTES = 0  # 全局发送时间阈值（0分钟）
-        self.SEND_HIGH_ENABLED = False  # high模式发送开关
-        self.SEND_LOW_ENABLED = False  # low模式发送开关
-        self.SEND_MIN_ENABLED = False  # min模式发送开关
+        # 发送配置（各模式的开关、阈值与投递队列由策略配置文件定义）
         self.TARGET_API_URL = "http://154.222.29.200:5030/proxy_bet_request"  # 目标服务器接口
-        self.sent_items = set()  # 已发送盘口唯一标识（防重复）
-        # 核心修改：按模式区分发送记录 {"high": {"主队_客队": {...}}, "low": {...}, "min": {...}}
-        self.match_sent_records = {
-            "high": {},
-            "low": {},
-            "min": {}
-        }
-
-        # low模式指定盘口值（固定12个）
-        self.LOW_MODE_ALLOWED_HANDICAPS = {
-            "-2.25", "-2", "-1.75", "-1.25", "-0.5",
-            "0.5", "0.75", "1", "1.75", "2", "2.25", "2.5"
-        }
-
-        # 最新计算结果存储
+        # 发送记录持久化：已发送盘口（防重复）与按模式区分的每场比赛发送统计，重启后从SQLite恢复
+        self.SEND_STATE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analyzer_send_state.db")
+        self.SEND_STATE_RETENTION_HOURS = 6  # 开赛后保留时长
+        self.SEND_STATE_MAX_ITEMS = 50000  # 内存LRU上限
+        self.send_state = SendStateStore(self.SEND_STATE_DB_PATH, self.SEND_STATE_RETENTION_HOURS,
+                                         self.SEND_STATE_MAX_ITEMS, self.beijing_tz)
+        self.send_state.load()
+
+        # 异步投递：计算线程只负责入队，发送在独立事件循环中并发进行
+        self.DELIVERY_CONCURRENCY_PER_MODE = 4  # 每个模式同时在途的请求数
+        self.DELIVERY_MAX_RETRIES = 3  # 网络异常/5xx的最大尝试次数
+        self.DELIVERY_TIMEOUT = 10  # 单次请求超时(秒)
+        self.DELIVERY_RETRY_DELAY = 0.5  # 重试退避基数(秒)，按2的幂增长
+        self.delivery_queue = SignalDeliveryQueue(self.TARGET_API_URL, self.DELIVERY_CONCURRENCY_PER_MODE,
+                                                  self.DELIVERY_MAX_RETRIES, self.DELIVERY_TIMEOUT,
+                                                  self.DELIVERY_RETRY_DELAY)
+
+        # 策略管道：每个模式是一组由配置规则预编译的谓词，候选盘口单次遍历即可得到所有模式的结果
+        # 配置文件修改后在下一次计算前自动重新加载（不重启WebSocket），不存在时写出默认配置
+        self.STRATEGY_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                 "analyzer_strategies.json")
+        self.strategies = []
+        self.strategy_config_mtime = None  # 已加载配置文件的修改时间
+        self.send_overrides = {}  # {策略名: 发送开关}，通过接口修改的开关在重新加载配置后保留
+
+        # 最新计算结果存储（{策略名: 结果列表}）
         self.latest_results = {
-            "high": [],
-            "low": [],
-            "min": [],
             "calculation_time": None
         }
 
         # API控制相关
         self.calculation_active = False  # 计算激活状态
-        self.calculation_thread = None  # 计算线程引用
+        self.scheduler_task = None  # 计算调度任务引用
+
+        # 固定频率调度：节拍按CHECK_INTERVAL对齐，计算超时错过的节拍跳过并计数，不累积漂移
+        self.scheduler_stats = {
+            "cycles": 0,
+            "event_cycles": 0,  # 由价格变化提前触发的计算次数
+            "missed_ticks": 0,  # 因计算耗时超过间隔而跳过的节拍数
+            "last_ms": None,
+            "max_ms": 0.0,
+            "durations_ms": deque(maxlen=200),
+            "last_cycle_time": None
+        }
 
-        # 移除：初始化时不再自动启动WebSocket
-        # self.ws_client_thread = threading.Thread(target=self.start_ws_client, daemon=True)
-        # self.ws_client_thread.start()
+        # 事件驱动模式：由WebSocket推送直接维护价格窗口，仅重算价格变化的比赛（关闭时沿用HTTP轮询）
+        self.EVENT_DRIVEN_ENABLED = True
+        self.price_windows = {}  # {比赛键: 单场比赛数据，结构与/api/upcoming-odds-full一致}
+        self.price_line_index = {}  # {比赛键: {(盘口, 方向): spread_odds中的盘口项}}
+        self.price_windows_lock = threading.Lock()  # 保护价格窗口与增量统计（仅在计算/工作线程中获取，事件循环不加锁）
+        self.ws_tick_queue = queue.SimpleQueue()  # 事件循环解析出的价格变化，由计算线程取出写入价格窗口
+        self.ws_last_prices = {}  # {(比赛键, 盘口, 方向, 数据源): 上一条消息中的赔率}，仅事件循环读写
+        self.price_windows_seeded = False  # 是否已通过HTTP完成一次历史赔率初始化
+        self.price_update_event = asyncio.Event()  # 有价格变化时提前触发计算调度
+        self.dirty_matches = set()  # 价格发生变化、待重算的比赛键
+        self.match_base_results = {}  # {比赛键: 该场比赛的基础结果列表}
+        self.probability_stats = {}  # {比赛键: {(盘口, 方向, 数据源): RunningProbabilityMean}}
+        self.event_stats = {"ws_ticks": 0, "recomputed_matches": 0, "last_recomputed": 0}
+
+        self.reload_strategies(force=True)
 
     # ---------------------- WebSocket客户端功能（核心修改） ----------------------
     def start_ws_client(self):
-        """启动WebSocket客户端线程（仅在监控启动时调用）"""
+        """在当前事件循环中启动WebSocket客户端任务（仅在监控启动时调用）"""
         if self.ws_running:
             print("⚠️ WebSocket客户端已在运行中")
             return
 
         self.ws_running = True
         print(f"启动WebSocket客户端，尝试连接旧程序: {self.OLD_PROGRAM_WS_URL}")
-        # 创建新的事件循环并运行WebSocket客户端
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.ws_client_loop())
-        loop.close()
+        self.ws_client_task = asyncio.get_running_loop().create_task(self.ws_client_loop())
 
-    def stop_ws_client(self):
+    async def stop_ws_client(self):
         """停止WebSocket客户端（监控停止时调用）"""
         if not self.ws_running:
             print("⚠️ WebSocket客户端未运行")
@@ -92,14 +547,13 @@ class HighFrequencyOddsCalculator:
 
         # 主动关闭现有WebSocket连接
         if self.old_program_ws and not self.old_program_ws.closed:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.old_program_ws.close())
-            loop.close()
+            await self.old_program_ws.close()
 
-        # 等待WebSocket线程结束
-        if self.ws_client_thread and self.ws_client_thread.is_alive():
-            self.ws_client_thread.join(timeout=5)
+        # 等待WebSocket任务结束（重连等待中的任务直接取消）
+        if self.ws_client_task and not self.ws_client_task.done():
+            done, _ = await asyncio.wait({self.ws_client_task}, timeout=5)
+            if not done:
+                self.ws_client_task.cancel()
 
         self.old_program_connected = False
         self.old_program_ws = None
@@ -143,144 +597,383 @@ class HighFrequencyOddsCalculator:
                 "connected": self.old_program_connected,
                 "data": message_data
             }
+            # 每条消息只构建一次source2索引，计算周期直接复用（整体替换引用，读取方无需加锁）
+            self.source2_index = self.build_source2_index(message_data)
             match_count = len(message_data.get("matches", []))
             print(f"📥 WebSocket接收数据：{match_count}场比赛，缓存已更新")
+
+            if self.EVENT_DRIVEN_ENABLED and self.calculation_active:
+                # 事件循环只做与上一条消息的比较并入队，写入价格窗口由计算线程完成（不在事件循环中等锁）
+                changed = self.collect_ws_ticks(message_data)
+                if changed:
+                    self.ws_tick_queue.put((datetime.now(self.beijing_tz).strftime("%Y-%m-%d %H:%M:%S"), changed))
+                    print(f"📈 WebSocket价格变化：{len(changed)}场比赛待重算")
+                    self.price_update_event.set()
         except Exception as e:
             print(f"❌ WebSocket数据处理错误：{str(e)}，原始消息：{message[:200]}...")
 
-    # ---------------------- source2盘口过滤 ----------------------
-    def get_source2_spreads(self) -> Dict[str, Dict[str, List[str]]]:
-        """从缓存中提取source2盘口数据"""
-        source2_spreads = {}
-        print(f"\n🔍 开始提取source2盘口数据（缓存状态：{'有数据' if 'data' in self.old_data_cache else '无数据'}）")
+    # ---------------------- 事件驱动价格窗口 ----------------------
+    def make_match_key(self, match: Dict[str, Any]) -> str:
+        """生成比赛键（主队+客队+开赛时间，HTTP数据与WebSocket数据共用）"""
+        return f"{match.get('home_team', '')}||{match.get('away_team', '')}||{match.get('start_time_beijing', '')}"
 
-        if not isinstance(self.old_data_cache, dict) or "data" not in self.old_data_cache:
-            print("❌ 缓存缺少data字段，跳过source2提取")
-            return source2_spreads
+    def seed_price_windows(self):
+        """启动时通过HTTP拉取一次完整历史赔率，作为价格窗口的初始内容（之后仅由WebSocket增量更新）"""
+        success, matches, message = self.fetch_data_from_high_freq_api()
+        with self.price_windows_lock:
+            self.price_windows.clear()
+            self.price_line_index.clear()
+            self.dirty_matches.clear()
+            self.match_base_results.clear()
+            self.probability_stats.clear()
+            if success:
+                for match in matches:
+                    if not isinstance(match, dict):
+                        continue
+                    match_key = self.make_match_key(match)
+                    line_index = {}
+                    for item in match.get('spread_odds') or []:
+                        if isinstance(item, dict):
+                            line_index[(str(item.get('spread_value')), item.get('side'))] = item
+                    self.price_windows[match_key] = match
+                    self.price_line_index[match_key] = line_index
+                    self.dirty_matches.add(match_key)
+            self.price_windows_seeded = True
+
+        if success:
+            print(f"✅ 价格窗口初始化完成：{message}")
+        else:
+            print(f"⚠️ 价格窗口初始化失败：{message}，仅使用WebSocket增量数据")
+
+    def collect_ws_ticks(self, message_data: Any) -> List[Tuple[str, Dict[str, Any], List[Tuple[str, str, str, float]]]]:
+        """
+        （在事件循环中执行，不加锁）提取与上一条消息相比发生变化的价格，
+        返回[(比赛键, 比赛信息, [(盘口, 方向, 数据源, 赔率)])]
+        """
+        if not isinstance(message_data, dict):
+            return []
+
+        last_prices = {}
+        changed = []
+        for match in message_data.get("matches", []):
+            if not isinstance(match, dict) or not match.get("start_time_beijing"):
+                continue
+            match_key = self.make_match_key(match)
+            ticks = []
+            for src in match.get("sources", []):
+                if not isinstance(src, dict) or src.get("source") not in (1, 2):
+                    continue
+                source = str(src["source"])
+                spreads = src.get("odds", {}).get("spreads", {})
+                if not isinstance(spreads, dict):
+                    continue
 
-        data = self.old_data_cache["data"]
-        if not isinstance(data, dict) or "matches" not in data or not isinstance(data["matches"], list):
-            print("❌ 缓存中无有效matches列表，跳过source2提取")
-            return source2_spreads
+                for spread_str, side_data in spreads.items():
+                    if not isinstance(side_data, dict):
+                        continue
+                    for side in ("home", "away"):
+                        price = self.safe_number(side_data.get(side))
+                        if price is None:
+                            continue
+                        price_key = (match_key, str(spread_str), side, source)
+                        last_prices[price_key] = price
+                        if self.ws_last_prices.get(price_key) != price:
+                            ticks.append((str(spread_str), side, source, price))
+            if ticks:
+                changed.append((match_key, match, ticks))
+
+        # 只保留本条消息中出现的价格，随比赛离场自然释放
+        self.ws_last_prices = last_prices
+        return changed
+
+    def apply_ws_prices(self) -> int:
+        """（在计算线程中执行）将队列中的WebSocket价格变化追加到价格窗口（仅记录变化的价格），返回价格变化的比赛数"""
+        batches = []
+        while True:
+            try:
+                batches.append(self.ws_tick_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batches or not self.price_windows_seeded:
+            return 0
+
+        changed_matches = set()
+        ticks = 0
+
+        with self.price_windows_lock:
+            for tick_time, changed in batches:
+                for match_key, match, match_ticks in changed:
+                    window = self.price_windows.get(match_key)
+                    if window is None:
+                        window = {
+                            "league_name": match.get("league_name", ""),
+                            "home_team": match.get("home_team", ""),
+                            "away_team": match.get("away_team", ""),
+                            "start_time_beijing": match.get("start_time_beijing"),
+                            "spread_odds": []
+                        }
+                        self.price_windows[match_key] = window
+                        self.price_line_index[match_key] = {}
+                    line_index = self.price_line_index[match_key]
+
+                    for spread_str, side, source, price in match_ticks:
+                        line_key = (spread_str, side)
+                        line = line_index.get(line_key)
+                        if line is None:
+                            line = {"spread_value": spread_str, "side": side, "sources": {}}
+                            line_index[line_key] = line
+                            window["spread_odds"].append(line)
+                        history = line["sources"].setdefault(source, [])
+                        # 与数据库一致：只记录与上一条不同的赔率
+                        if history and self.safe_number(history[-1].get("odds")) == price:
+                            continue
+                        history.append({"odds": price, "time": tick_time})
+                        changed_matches.add(match_key)
+                        ticks += 1
+
+            self.dirty_matches.update(changed_matches)
+            self.event_stats["ws_ticks"] += ticks
+
+        return len(changed_matches)
+
+    def clear_price_windows(self):
+        """停止计算后清空价格窗口与增量统计（需要加锁，不在事件循环中调用）"""
+        with self.price_windows_lock:
+            self.price_windows_seeded = False
+            self.price_windows.clear()
+            self.price_line_index.clear()
+            self.dirty_matches.clear()
+            self.match_base_results.clear()
+            self.probability_stats.clear()
+
+    def prune_price_windows(self):
+        """移除已开赛比赛的价格窗口（与HTTP接口只返回未开赛比赛保持一致）"""
+        now = datetime.now(self.beijing_tz)
+        with self.price_windows_lock:
+            for match_key, match in list(self.price_windows.items()):
+                try:
+                    start_time = datetime.strptime(match.get('start_time_beijing', ''), "%Y-%m-%d %H:%M:%S").replace(
+                        tzinfo=self.beijing_tz)
+                except ValueError:
+                    start_time = None
+                if start_time is None or start_time <= now:
+                    del self.price_windows[match_key]
+                    self.price_line_index.pop(match_key, None)
+                    self.match_base_results.pop(match_key, None)
+                    self.probability_stats.pop(match_key, None)
+                    self.dirty_matches.discard(match_key)
 
-        matches = data["matches"]
+    # ---------------------- source2盘口过滤 ----------------------
+    def normalize_team_key(self, home: str, away: str) -> str:
+        """标准化主客队名称为匹配键（去空格、小写）"""
+        home = (home or "").strip().replace(" ", "").lower()
+        away = (away or "").strip().replace(" ", "").lower()
+        return f"{home}vs{away}" if home and away else ""
+
+    def build_source2_index(self, message_data: Any) -> Dict[str, Dict[str, set]]:
+        """从WebSocket消息提取source2盘口索引 {标准化比赛键: {"home": 盘口集合, "away": 盘口集合}}，每条消息构建一次"""
+        source2_index = {}
+        if not isinstance(message_data, dict) or not isinstance(message_data.get("matches"), list):
+            print("❌ WebSocket消息中无有效matches列表，source2索引为空")
+            return source2_index
+
+        matches = message_data["matches"]
         source2_found = 0
-        source2_has_spread = 0
-
-        for match_idx, match in enumerate(matches):
+        for match in matches:
             if not isinstance(match, dict):
                 continue
-
-            # 标准化主客队名称
-            home = match.get("home_team", "").strip().replace(" ", "").lower()
-            away = match.get("away_team", "").strip().replace(" ", "").lower()
-            if not home or not away:
+            match_key = self.normalize_team_key(match.get("home_team", ""), match.get("away_team", ""))
+            if not match_key:
                 continue
-            match_key = f"{home}vs{away}"
-            source2_spreads[match_key] = {"home": [], "away": []}
 
             # 查找source=2的数据源
-            source2 = None
-            for src in match.get("sources", []):
-                if isinstance(src, dict) and src.get("source") == 2:
-                    source2 = src
-                    source2_found += 1
-                    break
-
+            source2 = next((src for src in match.get("sources", [])
+                            if isinstance(src, dict) and src.get("source") == 2), None)
             if not source2:
-                del source2_spreads[match_key]
                 continue
+            source2_found += 1
 
             # 提取盘口数据
             spreads = source2.get("odds", {}).get("spreads", {})
-            if not isinstance(spreads, dict) or len(spreads) == 0:
-                del source2_spreads[match_key]
+            if not isinstance(spreads, dict):
                 continue
-
+            home_spreads = set()
+            away_spreads = set()
             for spread_str, side_data in spreads.items():
                 if not isinstance(side_data, dict):
                     continue
                 normalized_spread = str(spread_str).strip()
                 if "home" in side_data:
-                    source2_spreads[match_key]["home"].append(normalized_spread)
+                    home_spreads.add(normalized_spread)
                 if "away" in side_data:
-                    source2_spreads[match_key]["away"].append(normalized_spread)
+                    away_spreads.add(normalized_spread)
 
-            if len(source2_spreads[match_key]["home"]) + len(source2_spreads[match_key]["away"]) > 0:
-                source2_has_spread += 1
-            else:
-                del source2_spreads[match_key]
+            if home_spreads or away_spreads:
+                source2_index[match_key] = {"home": home_spreads, "away": away_spreads}
 
         print(
-            f"✅ source2提取完成：{len(matches)}场比赛 → {source2_found}个source2数据源 → {source2_has_spread}个有效盘口")
-        print(f"📊 可匹配比赛数：{len(source2_spreads)}场")
-        return source2_spreads
-
-    def filter_by_source2_spreads(self, results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
-        """过滤高频计算结果（仅保留source2中存在的盘口）"""
-        source2_spreads = self.get_source2_spreads()
-        if not source2_spreads:
-            print("⚠️ 无有效source2数据，跳过过滤")
-            return results
-
-        filtered = {"high": [], "low": [], "min": []}
-        total_checked = 0
-        total_filtered = 0
-
-        for result_type, target_list in filtered.items():
-            for item in results[result_type]:
-                total_checked += 1
-                # 标准化匹配键
-                home = item.get("home_team", "").strip().replace(" ", "").lower()
-                away = item.get("away_team", "").strip().replace(" ", "").lower()
-                match_key = f"{home}vs{away}"
-                calc_handicap = str(item.get("handicap", "")).strip()
-                side = item.get("side", "").lower().strip()
-
-                # 过滤逻辑
-                if match_key not in source2_spreads or side not in ["home", "away"]:
-                    total_filtered += 1
-                    continue
+            f"✅ source2索引已更新：{len(matches)}场比赛 → {source2_found}个source2数据源 → {len(source2_index)}场有效盘口")
+        return source2_index
+
+    def get_source2_spreads(self) -> Dict[str, Dict[str, set]]:
+        """返回最近一条WebSocket消息构建的source2盘口索引"""
+        return self.source2_index
+
+    # ---------------------- 策略管道 ----------------------
+    def reload_strategies(self, force: bool = False) -> Dict[str, Any]:
+        """
+        从配置文件加载策略（文件未修改且非强制时跳过），全部规则编译成功后整体替换，
+        配置有误时保留当前策略（启动时尚无策略则使用内置默认策略）；候选时间窗口变化时清空增量统计，下一次计算全量重算
+        """
+        path = self.STRATEGY_CONFIG_PATH
+        try:
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(DEFAULT_STRATEGY_CONFIG, f, ensure_ascii=False, indent=2)
+                print(f"📝 策略配置文件不存在，已写出默认配置：{path}")
+            mtime = os.path.getmtime(path)
+            if not force and mtime == self.strategy_config_mtime:
+                return {"status": "success", "reloaded": False, "message": "策略配置未变化"}
+
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            strategies, kickoff_window, odds_window = self.compile_strategy_config(config)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # 记录本次修改时间，避免每个计算周期重复报错，文件再次修改后重试
+            self.strategy_config_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+            if self.strategies:
+                print(f"❌ 策略配置加载失败：{str(e)}，继续使用当前{len(self.strategies)}个策略")
+                return {"status": "error", "message": f"策略配置加载失败：{str(e)}"}
+
+            # 启动时配置无效：使用内置默认策略，避免在没有任何模式的情况下运行
+            print(f"❌ 策略配置加载失败：{str(e)}，使用内置默认策略")
+            strategies, kickoff_window, odds_window = self.compile_strategy_config(DEFAULT_STRATEGY_CONFIG)
+            self.install_strategies(strategies, kickoff_window, odds_window, self.strategy_config_mtime)
+            return {"status": "error", "message": f"策略配置加载失败：{str(e)}，已使用内置默认策略"}
+
+        self.install_strategies(strategies, kickoff_window, odds_window, mtime)
+        return {"status": "success", "reloaded": True, "message": f"已加载{len(strategies)}个策略",
+                "strategies": [strategy.name for strategy in strategies]}
+
+    def compile_strategy_config(self, config: Dict[str, Any]) -> Tuple[List[Strategy], int, int]:
+        """把策略配置编译为（策略列表, 开赛窗口分钟数, 赔率窗口分钟数），配置不合法时抛出异常"""
+        strategies = [Strategy.from_config(item) for item in config.get("strategies", [])]
+        names = [strategy.name for strategy in strategies]
+        if not strategies:
+            raise ValueError("未定义任何策略")
+        if len(set(names)) != len(names):
+            raise ValueError(f"策略名称重复：{names}")
+        kickoff_window = int(config.get("kickoff_window_minutes", self.KICKOFF_WINDOW_MINUTES))
+        odds_window = int(config.get("odds_window_minutes", self.ODDS_WINDOW_MINUTES))
+        return strategies, kickoff_window, odds_window
+
+    def install_strategies(self, strategies: List[Strategy], kickoff_window: int, odds_window: int,
+                           mtime: Optional[float]):
+        """整体替换生效的策略与候选时间窗口（保留通过接口修改的发送开关）"""
+        names = [strategy.name for strategy in strategies]
+        for strategy in strategies:
+            if strategy.name in self.send_overrides:
+                strategy.send_enabled = self.send_overrides[strategy.name]
+
+        with self.price_windows_lock:
+            windows_changed = (kickoff_window, odds_window) != (self.KICKOFF_WINDOW_MINUTES, self.ODDS_WINDOW_MINUTES)
+            self.KICKOFF_WINDOW_MINUTES = kickoff_window
+            self.ODDS_WINDOW_MINUTES = odds_window
+            if windows_changed:
+                self.match_base_results.clear()
+                self.probability_stats.clear()
+            self.strategies = strategies
+            self.strategy_config_mtime = mtime
+            for name in [k for k in self.latest_results if k != "calculation_time" and k not in names]:
+                del self.latest_results[name]
+
+        print(f"✅ 策略配置已加载：{len(strategies)}个策略（{', '.join(names)}），"
+              f"开赛窗口{kickoff_window}分钟，赔率窗口{odds_window}分钟")
+        if windows_changed and self.price_windows_seeded:
+            print("⚠️ 候选时间窗口已变化，已清空增量统计（扩大的赔率窗口需重启计算以补齐历史赔率）")
+
+    def candidate_facts(self, item: Dict[str, Any], source2_index: Dict[str, Dict[str, set]]) -> Dict[str, Any]:
+        """每个候选盘口只计算一次、供所有策略谓词共用的判断依据"""
+        handicap = str(item.get("handicap", "")).strip()
+        side = item.get("side", "").lower().strip()
+        source2_listed = None  # 无source2数据时不过滤
+        if source2_index:
+            spreads = source2_index.get(self.normalize_team_key(item.get("home_team", ""), item.get("away_team", "")))
+            source2_listed = bool(spreads) and side in ("home", "away") and handicap in spreads[side]
+        time_remaining = item.get("time_remaining", "")
+        return {
+            "handicap": handicap,
+            "handicap_num": self.safe_number(item.get("handicap")),
+            "side": side,
+            "source2_listed": source2_listed,
+            "started": time_remaining == "已开赛",
+            "minutes_to_kickoff": self.parse_remaining_time(time_remaining)
+        }
 
-                if calc_handicap in source2_spreads[match_key][side]:
-                    target_list.append(item)
-                    print(f"✅ {result_type}保留：{match_key} [{calc_handicap}/{side}]（source2存在）")
-                else:
-                    total_filtered += 1
-                    print(f"❌ {result_type}过滤：{match_key} [{calc_handicap}/{side}]（source2无此盘口）")
+    def run_strategies(self, base_results: List[Dict[str, Any]],
+                       strategies: List[Strategy]) -> Dict[str, List[Dict[str, Any]]]:
+        """单次遍历候选盘口，对所有策略的谓词求值；随后各策略分别做对手盘过滤，记录候选数与耗时"""
+        source2_index = self.get_source2_spreads()
+        if not source2_index:
+            print("⚠️ 无有效source2数据，跳过source2过滤")
+
+        selected = {strategy.name: [] for strategy in strategies}
+        elapsed = {strategy.name: 0.0 for strategy in strategies}
+        for item in base_results:
+            facts = self.candidate_facts(item, source2_index)
+            for strategy in strategies:
+                started = time.perf_counter()
+                if strategy.accepts(item, facts):
+                    selected[strategy.name].append(item)
+                elapsed[strategy.name] += time.perf_counter() - started
+
+        results = {}
+        for strategy in strategies:
+            started = time.perf_counter()
+            kept, opposite_filtered = self.drop_opposite_handicaps(selected[strategy.name])
+            elapsed_ms = (elapsed[strategy.name] + time.perf_counter() - started) * 1000
+            strategy.stats.update({
+                "candidates": len(base_results),
+                "selected": len(selected[strategy.name]),
+                "opposite_filtered": opposite_filtered,
+                "final": len(kept),
+                "last_ms": round(elapsed_ms, 3)
+            })
+            results[strategy.name] = kept
+            print(f"📊 策略[{strategy.name}]：候选{len(base_results)} → 入选{len(selected[strategy.name])} → "
+                  f"对手盘过滤{opposite_filtered} → 最终{len(kept)}（{elapsed_ms:.2f}ms）")
+        return results
+
+    def drop_opposite_handicaps(self, items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """过滤同一比赛的对手盘（保留差值绝对值更大的），按盘口键哈希配对，线性时间；返回（保留项, 过滤数）"""
+        # 按比赛分组
+        match_groups = {}
+        for handicap in items:
+            match_key = f"{handicap.get('home_team')} vs {handicap.get('away_team')}"
+            match_groups.setdefault(match_key, []).append(handicap)
+
+        kept = []
+        filtered_count = 0
+        for handicaps in match_groups.values():
+            if len(handicaps) <= 1:
+                kept.extend(handicaps)
+                continue
 
-        print(
-            f"\n📊 source2过滤统计：检查{total_checked}个盘口 → 保留high:{len(filtered['high'])} | low:{len(filtered['low'])} | min:{len(filtered['min'])} → 过滤{total_filtered}个")
-        return filtered
-
-    # ---------------------- 模式专属盘口过滤 ----------------------
-    def filter_high_mode_handicap(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """high模式：仅保留盘口值≥0的项"""
-        filtered = []
-        for item in items:
-            handicap = item.get("handicap")
-            try:
-                handicap_num = float(handicap) if handicap is not None else -1
-                if handicap_num >= 0:
-                    filtered.append(item)
-                    print(f"✅ high保留：{item.get('home_team')} vs {item.get('away_team')} → 盘口{handicap}（≥0）")
+            opposite_pairs, unpaired = pair_opposites(
+                handicaps, lambda h: line_keys("spread", h.get("handicap"), h.get("side")))
+
+            # 处理对手盘对（保留差值更大的）
+            for i, j in opposite_pairs:
+                h1, h2 = handicaps[i], handicaps[j]
+                if abs(h1.get("difference", 0.0)) > abs(h2.get("difference", 0.0)):
+                    kept.append(h1)
                 else:
-                    print(f"❌ high过滤：{item.get('home_team')} vs {item.get('away_team')} → 盘口{handicap}（<0）")
-            except (ValueError, TypeError):
-                print(f"❌ high过滤：{item.get('home_team')} vs {item.get('away_team')} → 盘口{handicap}（非数字）")
-        return filtered
-
-    def filter_low_mode_handicap(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """low模式：仅保留指定12个盘口值"""
-        filtered = []
-        for item in items:
-            handicap = str(item.get("handicap", "")).strip()
-            if handicap in self.LOW_MODE_ALLOWED_HANDICAPS:
-                filtered.append(item)
-                print(f"✅ low保留：{item.get('home_team')} vs {item.get('away_team')} → 盘口{handicap}（指定列表内）")
-            else:
-                print(f"❌ low过滤：{item.get('home_team')} vs {item.get('away_team')} → 盘口{handicap}（不在指定列表）")
-        return filtered
+                    kept.append(h2)
+            filtered_count += len(opposite_pairs)
+
+            # 保留非对手盘项
+            kept.extend(handicaps[idx] for idx in unpaired)
+        return kept, filtered_count
 
     # ---------------------- 通用工具方法 ----------------------
     def safe_number(self, v: Any) -> Optional[float]:
@@ -356,10 +1049,54 @@ class HighFrequencyOddsCalculator:
                         })
         return odds_list
 
+    def update_probability_stats(self, match: Dict[str, Any], odds_time_threshold: datetime,
+                                 stats: Dict[Tuple[Any, Any, str], "RunningProbabilityMean"]) -> Dict[Tuple[Any, Any], Dict[str, Any]]:
+        """
+        将比赛赔率历史中尚未消费的source1/source2记录累加到对应（盘口, 方向, 数据源）的运行均值
+        每条记录只解析一次时间、只换算一次概率；返回按（盘口, 方向）分组的运行均值
+        """
+        groups = {}
+        if not isinstance(match.get('spread_odds'), list):
+            return groups
+
+        for item in match['spread_odds']:
+            if not isinstance(item, dict):
+                continue
+            handicap = item.get('spread_value')
+            side = item.get('side')
+            group = groups.setdefault((handicap, side), {'handicap': handicap, 'side': side, 'sources': {}})
+
+            for src, odds_items in (item.get('sources') or {}).items():
+                source = str(src)
+                if source not in ('1', '2') or not isinstance(odds_items, list):
+                    continue
+                stat = stats.get((handicap, side, source))
+                if stat is None:
+                    stat = stats[(handicap, side, source)] = RunningProbabilityMean()
+                group['sources'][source] = stat
+
+                for o in odds_items[stat.consumed:]:
+                    stat.consumed += 1
+                    try:
+                        odds_time = datetime.strptime(o.get('time'), "%Y-%m-%d %H:%M:%S")
+                    except (TypeError, ValueError):
+                        continue
+                    if odds_time < odds_time_threshold:
+                        continue
+                    prob = self.malay_to_probability(self.safe_number(o.get('odds')))
+                    if prob is not None:
+                        stat.prob_sum += prob
+                        stat.count += 1
+        return groups
+
     def fetch_data_from_high_freq_api(self) -> Tuple[bool, List[Dict[str, Any]], str]:
-        """从高频API获取比赛数据"""
+        """从高频API获取比赛数据（服务端只返回开赛窗口内的比赛及开赛前窗口内的赔率）"""
+        params = {
+            "kickoff_within_minutes": self.KICKOFF_WINDOW_MINUTES,
+            "odds_since_kickoff_minutes": self.ODDS_WINDOW_MINUTES
+        }
         try:
-            response = requests.get(self.HIGH_FREQ_API_URL, timeout=240)
+            response = requests.get(self.HIGH_FREQ_API_URL, params=params, timeout=240)
             response.raise_for_status()
             data = response.json()
 
@@ -395,58 +1132,48 @@ class HighFrequencyOddsCalculator:
         return f"{mode}_{item.get('league', '')}_{item.get('home_team', '')}_{item.get('away_team', '')}_" \
                f"{item.get('handicap', '')}_{item.get('side', '')}"
 
-    def send_to_target_server(self, item: Dict[str, Any], alert_type: str) -> bool:
-        """发送数据到目标服务器"""
-        try:
-            send_data = {
-                'alert': {
-                    'league_name': item.get('league', '未知联赛'),
-                    'home_team': item.get('home_team', '未知主队'),
-                    'away_team': item.get('away_team', '未知客队'),
-                    'bet_type_name': f"SPREAD_FT_{item.get('handicap', '')}",
-                    'odds_name': 'HomeOdds' if item.get('side', '').lower() == 'home' else 'AwayOdds',
-                    'match_type': '',
-                    'cancel_on_odds_change': False
-                },
-                'alert_type': alert_type
-            }
-
-            response = requests.post(self.TARGET_API_URL, json=send_data, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-
-            if result.get("status") == "success":
-                print(f"✅ 发送成功 [{alert_type}]：{item.get('home_team')} vs {item.get('away_team')}")
-                return True
-            else:
-                print(f"❌ 发送失败 [{alert_type}]：服务器返回 {result.get('message', '未知错误')}")
-                return False
-        except Exception as e:
-            print(f"❌ 发送异常 [{alert_type}]：{str(e)}")
-            return False
+    def build_send_payload(self, item: Dict[str, Any], alert_type: str) -> Dict[str, Any]:
+        """构造发送到目标服务器的请求体"""
+        return {
+            'alert': {
+                'league_name': item.get('league', '未知联赛'),
+                'home_team': item.get('home_team', '未知主队'),
+                'away_team': item.get('away_team', '未知客队'),
+                'bet_type_name': f"SPREAD_FT_{item.get('handicap', '')}",
+                'odds_name': 'HomeOdds' if item.get('side', '').lower() == 'home' else 'AwayOdds',
+                'match_type': '',
+                'cancel_on_odds_change': False
+            },
+            'alert_type': alert_type
+        }
 
-    def check_and_send_eligible_items(self):
-        """检查并发送符合条件的盘口（所有模式固定0分钟阈值，按模式区分发送限制）"""
-        for result_type in ["high", "low", "min"]:
+    def check_and_send_eligible_items(self, strategies: List[Strategy]):
+        """检查并发送符合条件的盘口（阈值按策略配置，发送限制按投递队列区分）"""
+        self.send_state.purge_expired()
+        for strategy in strategies:
             # 检查模式开关
-            if not getattr(self, f"SEND_{result_type.upper()}_ENABLED"):
+            if not strategy.send_enabled:
                 continue
+            result_type = strategy.target_queue
 
             items_to_keep = []
-            for item in self.latest_results[result_type]:
+            for item in self.latest_results.get(strategy.name, []):
                 item_id = self.create_unique_identifier(item, result_type)
                 home = item.get("home_team", "未知主队")
                 away = item.get("away_team", "未知客队")
                 match_key = f"{home}_{away}"
                 current_side = item.get("side", "").lower()
 
-                # 跳过已发送的盘口
-                if item_id in self.sent_items:
+                # 跳过已发送/投递中的盘口
+                if self.send_state.contains(item_id) or self.delivery_queue.is_pending(item_id):
                     items_to_keep.append(item)
                     continue
 
-                # 核心修改：按模式获取发送记录（不再全局共享）
-                match_record = self.match_sent_records[result_type].get(match_key, {"sent_count": 0, "side": None})
+                # 核心修改：按模式获取发送记录（不再全局共享），投递中的盘口计入发送数
+                match_record = self.send_state.get_match_record(result_type, match_key)
+                pending_count, pending_side = self.delivery_queue.pending_record(result_type, match_key)
+                if pending_count:
+                    match_record = {"sent_count": match_record["sent_count"] + pending_count, "side": pending_side}
                 send_allowed = False
 
                 if match_record["sent_count"] == 0:
@@ -458,98 +1185,27 @@ class HighFrequencyOddsCalculator:
                     items_to_keep.append(item)
                     continue
 
-                # 检查时间条件（固定0分钟）
+                # 检查时间条件（策略配置的阈值）
                 remaining_time = self.parse_remaining_time(item.get('time_remaining', ''))
-                if remaining_time is None or remaining_time > self.SEND_MIN_THRESHOLD_MINUTES:
+                if remaining_time is None or remaining_time > strategy.send_threshold_minutes:
                     items_to_keep.append(item)
                     continue
 
-                # 发送数据
-                if send_allowed and self.send_to_target_server(item, result_type):
-                    self.sent_items.add(item_id)
-                    # 核心修改：按模式更新发送记录
-                    self.match_sent_records[result_type][match_key] = {
-                        "sent_count": match_record["sent_count"] + 1,
-                        "side": current_side
-                    }
+                # 入队异步投递，投递成功后再按模式更新发送记录（持久化）
+                kickoff = item.get('start_time_beijing') or datetime.now(self.beijing_tz).strftime("%Y-%m-%d %H:%M:%S")
+                on_delivered = partial(self.send_state.record_sent, item_id, result_type, match_key, current_side,
+                                       kickoff)
+                if send_allowed and self.delivery_queue.submit(item_id, result_type, match_key, current_side,
+                                                               f"{home} vs {away}",
+                                                               self.build_send_payload(item, result_type),
+                                                               on_delivered):
                     print(
-                        f"📤 已发送 [{result_type}]：{match_key}（剩余{remaining_time}分钟，{result_type}模式累计{match_record['sent_count'] + 1}条）")
+                        f"📤 已入队 [{strategy.name}→{result_type}]：{match_key}（剩余{remaining_time}分钟，{result_type}队列累计{match_record['sent_count'] + 1}条）")
                 else:
                     items_to_keep.append(item)
 
             # 更新保留的未发送项
-            self.latest_results[result_type] = items_to_keep
-
-    # ---------------------- 对手盘过滤 ----------------------
-    def filter_opposite_handicaps(self, filtered_results: Dict[str, List[Dict[str, Any]]]) -> Dict[
-        str, List[Dict[str, Any]]]:
-        """过滤同一比赛的对手盘（保留差值绝对值更大的）"""
-        final_results = {"high": [], "low": [], "min": []}
-
-        for mode in ["high", "low", "min"]:
-            # 按比赛分组
-            match_groups = {}
-            for handicap in filtered_results[mode]:
-                match_key = f"{handicap.get('home_team')} vs {handicap.get('away_team')}"
-                if match_key not in match_groups:
-                    match_groups[match_key] = []
-                match_groups[match_key].append(handicap)
-
-            # 处理每组比赛的对手盘
-            for match_key, handicaps in match_groups.items():
-                if len(handicaps) <= 1:
-                    final_results[mode].extend(handicaps)
-                    continue
-
-                # 查找对手盘对
-                used = set()
-                opposite_pairs = []
-
-                for i, h1 in enumerate(handicaps):
-                    if i in used:
-                        continue
-                    h1_handi = self.safe_number(h1.get("handicap", 0)) or 0.0
-                    h1_side = h1.get("side", "")
-
-                    for j, h2 in enumerate(handicaps[i + 1:], i + 1):
-                        if j in used:
-                            continue
-                        h2_handi = self.safe_number(h2.get("handicap", 0)) or 0.0
-                        h2_side = h2.get("side", "")
-
-                        # 判断是否为对手盘
-                        is_opposite = False
-                        if h1_handi == 0.0 and h2_handi == 0.0 and h1_side != h2_side:
-                            is_opposite = True
-                        elif abs(h1_handi) == abs(h2_handi) and h1_handi * h2_handi < 0 and h1_side != h2_side:
-                            is_opposite = True
-
-                        if is_opposite:
-                            opposite_pairs.append((h1, h2))
-                            used.add(i)
-                            used.add(j)
-                            break
-
-                # 处理对手盘对（保留差值更大的）
-                for h1, h2 in opposite_pairs:
-                    h1_diff = abs(h1.get("difference", 0.0))
-                    h2_diff = abs(h2.get("difference", 0.0))
-
-                    if h1_diff > h2_diff:
-                        final_results[mode].append(h1)
-                        print(
-                            f"❌ 对手盘过滤 [{mode}]：{match_key} 过滤{h2.get('handicap')}/{h2.get('side')}（差值{h2_diff}<{h1_diff}）")
-                    else:
-                        final_results[mode].append(h2)
-                        print(
-                            f"❌ 对手盘过滤 [{mode}]：{match_key} 过滤{h1.get('handicap')}/{h1.get('side')}（差值{h1_diff}<{h2_diff}）")
-
-                # 保留非对手盘项
-                for idx, handicap in enumerate(handicaps):
-                    if idx not in used:
-                        final_results[mode].append(handicap)
-
-        return final_results
+            self.latest_results[strategy.name] = items_to_keep
 
     # ---------------------- 核心计算逻辑 ----------------------
     def high_frequency_calculation(self):
@@ -565,198 +1221,298 @@ class HighFrequencyOddsCalculator:
         print(f"📥 高频API数据：{message}")
 
         # 2. 筛选赛前5分钟内/已开赛的比赛
+        filtered_matches = self.filter_kickoff_window_matches(matches)
+
+        # 3. 计算基础结果（source2>source1）
+        base_results = []
+        for match in filtered_matches:
+            base_results.extend(self.calculate_match_base_results(match))
+
+        # 4~9. 模式过滤、source2过滤、对手盘过滤、更新结果并发送
+        self.apply_result_filters(base_results, current_time)
+
+    def event_driven_calculation(self):
+        """事件驱动计算：仅重算价格发生变化（或刚进入赛前窗口）的比赛，其余比赛沿用上次的基础结果"""
+        self.apply_ws_prices()
+        self.prune_price_windows()
+        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        with self.price_windows_lock:
+            dirty = self.dirty_matches
+            self.dirty_matches = set()
+            filtered_matches = self.filter_kickoff_window_matches(list(self.price_windows.values()), verbose=False)
+            eligible_keys = {self.make_match_key(m) for m in filtered_matches}
+
+            # 离开赛前窗口的比赛不再保留结果
+            for match_key in list(self.match_base_results):
+                if match_key not in eligible_keys:
+                    del self.match_base_results[match_key]
+
+            recomputed = 0
+            for match_key in eligible_keys:
+                if match_key in dirty or match_key not in self.match_base_results:
+                    self.match_base_results[match_key] = self.calculate_match_base_results(
+                        self.price_windows[match_key], self.probability_stats.setdefault(match_key, {}))
+                    recomputed += 1
+                else:
+                    # 未变化的比赛只刷新剩余时间（发送判断依赖该字段）
+                    time_remaining = self.get_time_remaining(self.price_windows[match_key].get('start_time_beijing', ''))
+                    for item in self.match_base_results[match_key]:
+                        item['time_remaining'] = time_remaining
+
+            base_results = [item for items in self.match_base_results.values() for item in items]
+            self.event_stats["recomputed_matches"] += recomputed
+            self.event_stats["last_recomputed"] = recomputed
+
+        if recomputed:
+            print(f"\n========== 事件驱动计算 [{current_time}] ==========")
+            print(f"📊 赛前窗口内{len(eligible_keys)}场比赛，重算{recomputed}场")
+
+        self.apply_result_filters(base_results, current_time)
+
+    def filter_kickoff_window_matches(self, matches: List[Dict[str, Any]], verbose: bool = True) -> List[Dict[str, Any]]:
+        """筛选赛前5分钟内/已开赛的比赛"""
         filtered_matches = []
         for match in matches:
             start_time = match.get('start_time_beijing', '')
             time_remaining_str = self.get_time_remaining(start_time)
             time_remaining_min = self.parse_remaining_time(time_remaining_str)
 
-            if time_remaining_min is not None and time_remaining_min <= 5 or time_remaining_str == "已开赛":
+            if time_remaining_min is not None and time_remaining_min <= self.KICKOFF_WINDOW_MINUTES or time_remaining_str == "已开赛":
                 filtered_matches.append(match)
-            else:
+            elif verbose:
                 print(
-                    f"⏰ 时间过滤：{match.get('home_team')} vs {match.get('away_team')}（剩余{time_remaining_str}，超过5分钟）")
-
-        print(f"📊 时间过滤后：{len(filtered_matches)}场比赛（赛前5分钟/已开赛）")
-
-        # 3. 计算基础结果（source2>source1）
+                    f"⏰ 时间过滤：{match.get('home_team')} vs {match.get('away_team')}（剩余{time_remaining_str}，超过{self.KICKOFF_WINDOW_MINUTES}分钟）")
+
+        if verbose:
+            print(f"📊 时间过滤后：{len(filtered_matches)}场比赛（赛前{self.KICKOFF_WINDOW_MINUTES}分钟/已开赛）")
+        return filtered_matches
+
+    def calculate_match_base_results(self, match: Dict[str, Any],
+                                     stats: Optional[Dict[Tuple[Any, Any, str], "RunningProbabilityMean"]] = None
+                                     ) -> List[Dict[str, Any]]:
+        """
+        计算单场比赛的基础结果（赛前N分钟内赔率，source2>source1的盘口）
+        :param stats: 该场比赛的运行均值（事件驱动模式跨周期保留）；不传时本次从头累加
+        """
         base_results = []
-        for match in filtered_matches:
-            home = match.get('home_team', '未知主队')
-            away = match.get('away_team', '未知客队')
-            league = match.get('league_name', '未知联赛')
-            start_time = match.get('start_time_beijing', '')
-            time_remaining = self.get_time_remaining(start_time)
+        home = match.get('home_team', '未知主队')
+        away = match.get('away_team', '未知客队')
+        league = match.get('league_name', '未知联赛')
+        start_time = match.get('start_time_beijing', '')
+        time_remaining = self.get_time_remaining(start_time)
 
-            print(f"\n🔍 处理比赛：{home} vs {away}（剩余{time_remaining}）")
+        print(f"\n🔍 处理比赛：{home} vs {away}（剩余{time_remaining}）")
 
-            # 解析开赛时间
-            try:
-                start_time_date = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S").replace(tzinfo=self.beijing_tz)
-            except ValueError:
-                print(f"❌ 时间解析失败：{home} vs {away}，跳过")
+        # 解析开赛时间
+        try:
+            start_time_date = datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S").replace(tzinfo=self.beijing_tz)
+        except ValueError:
+            print(f"❌ 时间解析失败：{home} vs {away}，跳过")
+            return base_results
+
+        # 累加赛前N分钟内的新增赔率（运行均值只消费上次之后追加的记录）
+        odds_time_threshold = start_time_date.replace(tzinfo=None) - timedelta(minutes=self.ODDS_WINDOW_MINUTES)
+        if stats is None:
+            stats = {}
+        groups = self.update_probability_stats(match, odds_time_threshold, stats)
+        odds_count = sum(stat.count for group in groups.values() for stat in group['sources'].values())
+
+        if not odds_count:
+            print(f"⏰ 赔率时间过滤：{home} vs {away} 无赛前{self.ODDS_WINDOW_MINUTES}分钟内赔率，跳过")
+            return base_results
+
+        print(f"📊 赔率数量：{odds_count}条赛前{self.ODDS_WINDOW_MINUTES}分钟内赔率")
+
+        # 按均值筛选source2>source1的盘口
+        for group_data in groups.values():
+            src1_stat = group_data['sources'].get('1')
+            src2_stat = group_data['sources'].get('2')
+            if not (src1_stat and src1_stat.count) and not (src2_stat and src2_stat.count):
                 continue
 
-            # 筛选赛前5分钟内的赔率
-            odds_time_threshold = start_time_date - timedelta(minutes=5)
-            raw_odds = self.find_odds_list(match)
-            filtered_odds = [o for o in raw_odds if datetime.strptime(o.get('time'), "%Y-%m-%d %H:%M:%S").replace(
-                tzinfo=self.beijing_tz) >= odds_time_threshold]
-
-            if not filtered_odds:
-                print(f"⏰ 赔率时间过滤：{home} vs {away} 无赛前5分钟内赔率，跳过")
+            if not (src1_stat and src1_stat.count and src2_stat and src2_stat.count):
+                print(f"❌ 数据源不全：{group_data['handicap']}/{group_data['side']}，跳过")
                 continue
 
-            print(f"📊 赔率数量：{len(filtered_odds)}条赛前5分钟内赔率")
-
-            # 按盘口+side分组
-            groups = {}
-            for odds in filtered_odds:
-                key = f"{odds.get('handicap')}||{odds.get('side')}"
-                if key not in groups:
-                    groups[key] = {'handicap': odds.get('handicap'), 'side': odds.get('side'),
-                                   'sources': {'1': [], '2': []}}
-                source = odds.get('source')
-                if source in ['1', '2']:
-                    groups[key]['sources'][source].append(odds.get('price'))
-
-            # 计算均值并筛选source2>source1的盘口
-            for group_data in groups.values():
-                src1_prices = group_data['sources']['1']
-                src2_prices = group_data['sources']['2']
-
-                if not (src1_prices and src2_prices):
-                    print(f"❌ 数据源不全：{group_data['handicap']}/{group_data['side']}，跳过")
-                    continue
-
-                # 计算平均概率
-                src1_probs = [self.malay_to_probability(p) for p in src1_prices if
-                              self.malay_to_probability(p) is not None]
-                src2_probs = [self.malay_to_probability(p) for p in src2_prices if
-                              self.malay_to_probability(p) is not None]
-
-                if not src1_probs or not src2_probs:
-                    print(f"❌ 概率计算失败：{group_data['handicap']}/{group_data['side']}，跳过")
-                    continue
+            # 计算平均赔率
+            src1_avg_prob = src1_stat.mean()
+            src2_avg_prob = src2_stat.mean()
+            src1_avg_decimal = 1 / src1_avg_prob if src1_avg_prob != 0 else None
+            src2_avg_decimal = 1 / src2_avg_prob if src2_avg_prob != 0 else None
 
-                # 计算平均赔率
-                src1_avg_prob = sum(src1_probs) / len(src1_probs)
-                src2_avg_prob = sum(src2_probs) / len(src2_probs)
-                src1_avg_decimal = 1 / src1_avg_prob if src1_avg_prob != 0 else None
-                src2_avg_decimal = 1 / src2_avg_prob if src2_avg_prob != 0 else None
-
-                if src1_avg_decimal is None or src2_avg_decimal is None:
-                    continue
-
-                # 仅保留source2>source1的盘口
-                if src2_avg_decimal > src1_avg_decimal:
-                    result_item = {
-                        'home_team': home,
-                        'away_team': away,
-                        'league': league,
-                        'time_remaining': time_remaining,
-                        'handicap': group_data['handicap'],
-                        'side': group_data['side'],
-                        'src1_avg_decimal': round(src1_avg_decimal, 4),
-                        'src1_avg_malay': round(self.probability_to_malay(src1_avg_prob),
-                                                4) if src1_avg_prob != 0 else None,
-                        'src2_avg_decimal': round(src2_avg_decimal, 4),
-                        'src2_avg_malay': round(self.probability_to_malay(src2_avg_prob),
-                                                4) if src2_avg_prob != 0 else None,
-                        'difference': round(src2_avg_decimal - src1_avg_decimal, 4)
-                    }
-                    base_results.append(result_item)
-                    print(
-                        f"✅ 保留盘口：{group_data['handicap']}/{group_data['side']} → 差值：{result_item['difference']}")
+            if src1_avg_decimal is None or src2_avg_decimal is None:
+                continue
 
-        # 4. 应用模式专属盘口过滤
-        results = {
-            "min": base_results.copy(),
-            "high": self.filter_high_mode_handicap(base_results.copy()),
-            "low": self.filter_low_mode_handicap(base_results.copy())
-        }
+            # 仅保留source2>source1的盘口
+            if src2_avg_decimal > src1_avg_decimal:
+                result_item = {
+                    'home_team': home,
+                    'away_team': away,
+                    'league': league,
+                    'time_remaining': time_remaining,
+                    'start_time_beijing': start_time,
+                    'handicap': group_data['handicap'],
+                    'side': group_data['side'],
+                    'src1_avg_decimal': round(src1_avg_decimal, 4),
+                    'src1_avg_malay': round(self.probability_to_malay(src1_avg_prob),
+                                            4) if src1_avg_prob != 0 else None,
+                    'src2_avg_decimal': round(src2_avg_decimal, 4),
+                    'src2_avg_malay': round(self.probability_to_malay(src2_avg_prob),
+                                            4) if src2_avg_prob != 0 else None,
+                    'difference': round(src2_avg_decimal - src1_avg_decimal, 4)
+                }
+                base_results.append(result_item)
+                print(
+                    f"✅ 保留盘口：{group_data['handicap']}/{group_data['side']} → 差值：{result_item['difference']}")
 
-        # 5. source2盘口过滤
-        filtered_results = self.filter_by_source2_spreads(results)
+        return base_results
 
-        # 6. 对手盘过滤
-        filtered_results = self.filter_opposite_handicaps(filtered_results)
+    def apply_result_filters(self, base_results: List[Dict[str, Any]], current_time: str):
+        """对基础结果运行策略管道（各模式谓词单次遍历求值 + 对手盘过滤），更新结果并检查发送"""
+        strategies = self.strategies  # 本次计算使用的策略快照（重新加载只替换引用）
+        filtered_results = self.run_strategies(base_results, strategies)
 
-        # 7. 更新结果
-        self.latest_results.update({
-            "high": filtered_results["high"],
-            "low": filtered_results["low"],
-            "min": filtered_results["min"],
-            "calculation_time": current_time
-        })
+        # 更新结果
+        self.latest_results.update(filtered_results)
+        self.latest_results["calculation_time"] = current_time
 
-        # 8. 检查并发送数据
-        self.check_and_send_eligible_items()
+        # 检查并发送数据
+        self.check_and_send_eligible_items(strategies)
 
-        # 9. 最终统计
-        print(
-            f"\n📊 最终结果统计：High={len(filtered_results['high'])} | Low={len(filtered_results['low'])} | Min={len(filtered_results['min'])}")
+        # 最终统计
+        summary = " | ".join(f"{name}={len(items)}" for name, items in filtered_results.items())
+        print(f"\n📊 最终结果统计：{summary}")
 
     # ---------------------- 循环控制（核心修改） ----------------------
-    def start_calculation_loop(self):
-        """启动计算循环（先启动WebSocket）"""
+    async def start_calculation_loop(self):
+        """启动计算调度（先启动WebSocket与异步投递）"""
         if self.calculation_active:
             return "计算已在运行中"
 
-        if self.calculation_thread and self.calculation_thread.is_alive():
-            self.calculation_thread.join()
+        if self.scheduler_task and not self.scheduler_task.done():
+            await self.scheduler_task
+
+        await self.delivery_queue.start()
 
         # 核心修改：启动计算前先启动WebSocket
-        self.ws_client_thread = threading.Thread(target=self.start_ws_client, daemon=True)
-        self.ws_client_thread.start()
-        # 短暂等待WebSocket线程启动
-        time.sleep(1)
+        self.start_ws_client()
 
         self.calculation_active = True
-        self.calculation_thread = threading.Thread(target=self._calculation_loop, daemon=True)
-        self.calculation_thread.start()
+        self.scheduler_task = asyncio.get_running_loop().create_task(self._scheduler_loop())
         return "✅ 计算已启动（后台运行），WebSocket已连接"
 
-    def _calculation_loop(self):
-        """计算循环主体"""
-        print(f"🔄 高频计算程序启动，检查间隔：{self.CHECK_INTERVAL}秒")
+    async def _scheduler_loop(self):
+        """
+        固定频率调度：按CHECK_INTERVAL对齐的节拍触发计算，计算在线程池中执行，不阻塞事件循环；
+        计算耗时超过间隔时跳过错过的节拍（计数，不补跑、不漂移）；
+        事件驱动模式下价格变化会提前触发计算，计算期间到达的变化合并到下一次
+        """
+        loop = asyncio.get_running_loop()
+        if self.EVENT_DRIVEN_ENABLED:
+            # 丢弃上次运行残留的价格变化；启动初始化期间收到的变化在初始化完成后的第一次计算中写入
+            self.ws_tick_queue = queue.SimpleQueue()
+            self.ws_last_prices = {}
+            print(f"🔄 高频计算程序启动（事件驱动模式），固定节拍间隔：{self.CHECK_INTERVAL}秒")
+            await asyncio.to_thread(self.seed_price_windows)
+            calculation = self.event_driven_calculation
+        else:
+            print(f"🔄 高频计算程序启动，固定节拍间隔：{self.CHECK_INTERVAL}秒")
+            calculation = self.high_frequency_calculation
+
+        next_tick = loop.time()
         while self.calculation_active:
+            trigger = "tick"
+            delay = next_tick - loop.time()
+            if delay > 0:
+                if self.EVENT_DRIVEN_ENABLED:
+                    try:
+                        await asyncio.wait_for(self.price_update_event.wait(), timeout=delay)
+                        trigger = "event"
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(delay)
+            if not self.calculation_active:
+                break
+            self.price_update_event.clear()
+
+            started = loop.time()
             try:
-                self.high_frequency_calculation()
+                await asyncio.to_thread(self.reload_strategies)  # 策略配置文件修改后热加载
+                await asyncio.to_thread(calculation)
             except Exception as e:
                 print(f"❌ 计算出错：{str(e)}")
-
-            # 分段sleep，支持快速停止
-            for _ in range(self.CHECK_INTERVAL):
-                if not self.calculation_active:
-                    break
-                time.sleep(1)
-
+            finished = loop.time()
+            self.record_cycle(trigger, (finished - started) * 1000)
+
+            if trigger == "tick":
+                next_tick += self.CHECK_INTERVAL
+            if finished > next_tick:
+                missed = int((finished - next_tick) // self.CHECK_INTERVAL) + 1
+                next_tick += missed * self.CHECK_INTERVAL
+                self.scheduler_stats["missed_ticks"] += missed
+                print(f"⚠️ 计算耗时{(finished - started) * 1000:.0f}ms超过间隔，跳过{missed}个节拍")
+
+        if self.EVENT_DRIVEN_ENABLED:
+            await asyncio.to_thread(self.clear_price_windows)
         print("🛑 计算已停止")
 
-    def stop_calculation_loop(self):
-        """停止计算循环（后停止WebSocket）"""
+    def record_cycle(self, trigger: str, duration_ms: float):
+        """记录一次计算的触发方式与耗时"""
+        stats = self.scheduler_stats
+        stats["cycles"] += 1
+        if trigger == "event":
+            stats["event_cycles"] += 1
+        stats["last_ms"] = round(duration_ms, 1)
+        stats["max_ms"] = max(stats["max_ms"], round(duration_ms, 1))
+        stats["durations_ms"].append(duration_ms)
+        stats["last_cycle_time"] = datetime.now(self.beijing_tz).strftime("%Y-%m-%d %H:%M:%S")
+
+    def get_scheduler_status(self) -> Dict[str, Any]:
+        """调度统计（节拍间隔、计算次数、跳过节拍数、每次计算耗时）"""
+        stats = self.scheduler_stats
+        durations = sorted(stats["durations_ms"])
+        return {
+            "interval_seconds": self.CHECK_INTERVAL,
+            "cycles": stats["cycles"],
+            "event_cycles": stats["event_cycles"],
+            "missed_ticks": stats["missed_ticks"],
+            "last_cycle_time": stats["last_cycle_time"],
+            "last_ms": stats["last_ms"],
+            "avg_ms": round(sum(durations) / len(durations), 1) if durations else None,
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1) if durations else None,
+            "max_ms": stats["max_ms"]
+        }
+
+    async def stop_calculation_loop(self):
+        """停止计算调度（后停止WebSocket与异步投递）"""
         if not self.calculation_active:
             return "计算已停止"
 
         self.calculation_active = False
-        # 等待计算线程结束
-        if self.calculation_thread and self.calculation_thread.is_alive():
-            self.calculation_thread.join(timeout=5)
+        self.price_update_event.set()  # 唤醒等待中的调度
+        # 等待当前计算结束（固定间隔等待中的调度直接取消）
+        if self.scheduler_task and not self.scheduler_task.done():
+            done, _ = await asyncio.wait({self.scheduler_task}, timeout=5)
+            if not done:
+                self.scheduler_task.cancel()
 
         # 核心修改：停止计算后关闭WebSocket
-        self.stop_ws_client()
+        await self.stop_ws_client()
+        await self.delivery_queue.stop()
         return "🛑 计算已停止，WebSocket已关闭"
 
     # ---------------------- 状态/配置管理 ----------------------
     def get_status(self):
         """获取当前状态（新增各模式发送记录统计）"""
-        # 统计各模式发送记录数
+        strategies = self.strategies
+        # 统计各投递队列发送记录数
         sent_stats = {}
-        for mode in ["high", "low", "min"]:
-            total_sent = sum([v["sent_count"] for v in self.match_sent_records[mode].values()])
+        for mode in dict.fromkeys(strategy.target_queue for strategy in strategies):
+            match_count, total_sent = self.send_state.match_stats(mode)
             sent_stats[mode] = {
-                "match_count": len(self.match_sent_records[mode]),
+                "match_count": match_count,
                 "total_sent": total_sent
             }
 
@@ -765,16 +1521,30 @@ class HighFrequencyOddsCalculator:
             "websocket_running": self.ws_running,  # 新增WebSocket状态
             "websocket_connected": self.old_program_connected,  # WebSocket连接状态
             "last_calculation_time": self.latest_results["calculation_time"],
-            "high_count": len(self.latest_results["high"]),
-            "low_count": len(self.latest_results["low"]),
-            "min_count": len(self.latest_results["min"]),
-            "send_config": {
-                "threshold_minutes": self.SEND_MIN_THRESHOLD_MINUTES,
-                "high_enabled": self.SEND_HIGH_ENABLED,
-                "low_enabled": self.SEND_LOW_ENABLED,
-                "min_enabled": self.SEND_MIN_ENABLED,
-                "sent_count": len(self.sent_items),
+            "high_count": len(self.latest_results.get("high", [])),
+            "low_count": len(self.latest_results.get("low", [])),
+            "min_count": len(self.latest_results.get("min", [])),
+            "result_counts": {strategy.name: len(self.latest_results.get(strategy.name, [])) for strategy in strategies},
+            "send_config": dict(self.get_send_config(), **{
+                "sent_count": len(self.send_state),
                 "sent_stats_by_mode": sent_stats  # 新增模式发送统计
+            }),
+            "delivery": self.delivery_queue.stats(),
+            "scheduler": self.get_scheduler_status(),
+            "strategies": {strategy.name: dict(strategy.stats) for strategy in strategies},
+            "strategy_config": {
+                "path": self.STRATEGY_CONFIG_PATH,
+                "kickoff_window_minutes": self.KICKOFF_WINDOW_MINUTES,
+                "odds_window_minutes": self.ODDS_WINDOW_MINUTES
+            },
+            "event_driven": {
+                "enabled": self.EVENT_DRIVEN_ENABLED,
+                "seeded": self.price_windows_seeded,
+                "tracked_matches": len(self.price_windows),
+                "pending_matches": len(self.dirty_matches),
+                "ws_ticks": self.event_stats["ws_ticks"],
+                "recomputed_matches": self.event_stats["recomputed_matches"],
+                "last_recomputed": self.event_stats["last_recomputed"]
             },
             "old_program_connection": {
                 "connected": self.old_program_connected,
@@ -783,133 +1553,169 @@ class HighFrequencyOddsCalculator:
             }
         }
 
-    def set_send_config(self, high_enabled: Optional[bool] = None,
-                        low_enabled: Optional[bool] = None,
-                        min_enabled: Optional[bool] = None) -> Dict[str, Any]:
-        """更新发送配置（仅开关，阈值固定0分钟）"""
-        if high_enabled is not None:
-            self.SEND_HIGH_ENABLED = high_enabled
-        if low_enabled is not None:
-            self.SEND_LOW_ENABLED = low_enabled
-        if min_enabled is not None:
-            self.SEND_MIN_ENABLED = min_enabled
-
+    def get_send_config(self) -> Dict[str, Any]:
+        """
+        各策略的发送开关（键名为"<策略名>_enabled"）与时间阈值：
+        threshold_minutes保持原有的单个数值（各策略一致时即为共同阈值，否则取最小值），各策略阈值见threshold_minutes_by_strategy
+        """
+        strategies = self.strategies
+        config = {f"{strategy.name}_enabled": strategy.send_enabled for strategy in strategies}
+        thresholds = {strategy.name: strategy.send_threshold_minutes for strategy in strategies}
+        threshold = min(thresholds.values()) if thresholds else 0
+        config["threshold_minutes"] = int(threshold) if float(threshold).is_integer() else threshold
+        config["threshold_minutes_by_strategy"] = thresholds
+        return config
+
+    def set_send_config(self, toggles: Dict[str, bool]) -> Dict[str, Any]:
+        """更新发送开关（{策略名: 开关}，未知策略忽略；重新加载策略配置后仍然生效）"""
+        strategies = {strategy.name: strategy for strategy in self.strategies}
+        for name, enabled in toggles.items():
+            if name in strategies:
+                strategies[name].send_enabled = enabled
+                self.send_overrides[name] = enabled
+
+        return self.get_send_config()
+
+    def get_strategy_config(self) -> Dict[str, Any]:
+        """当前生效的策略配置与各策略统计"""
         return {
-            "threshold_minutes": self.SEND_MIN_THRESHOLD_MINUTES,
-            "high_enabled": self.SEND_HIGH_ENABLED,
-            "low_enabled": self.SEND_LOW_ENABLED,
-            "min_enabled": self.SEND_MIN_ENABLED
+            "path": self.STRATEGY_CONFIG_PATH,
+            "kickoff_window_minutes": self.KICKOFF_WINDOW_MINUTES,
+            "odds_window_minutes": self.ODDS_WINDOW_MINUTES,
+            "strategies": {strategy.name: strategy.describe() for strategy in self.strategies}
         }
 
 
 # ---------------------- API接口 ----------------------
-@app.route('/start', methods=['GET'])
-def start_calculation():
+@web.middleware
+async def cors_middleware(request, handler):
+    """允许跨域请求"""
+    if request.method == "OPTIONS":
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+    return response
+
+
+def calculator_not_ready():
+    return web.json_response({"status": "error", "message": "计算器未初始化"}, status=500)
+
+
+@routes.get('/start')
+async def start_calculation(request):
     """启动计算"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
-    result = calculator_instance.start_calculation_loop()
-    return jsonify({"status": "success", "message": result})
+    result = await calculator_instance.start_calculation_loop()
+    return web.json_response({"status": "success", "message": result})
 
 
-@app.route('/stop', methods=['GET'])
-def stop_calculation():
+@routes.get('/stop')
+async def stop_calculation(request):
     """停止计算"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
-    result = calculator_instance.stop_calculation_loop()
-    return jsonify({"status": "success", "message": result})
+    result = await calculator_instance.stop_calculation_loop()
+    return web.json_response({"status": "success", "message": result})
 
 
-@app.route('/status', methods=['GET'])
-def get_calculation_status():
-    """获取状态（包含各模式发送统计）"""
+@routes.get('/status')
+async def get_calculation_status(request):
+    """获取状态（包含各模式发送统计与调度耗时）"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
     status = calculator_instance.get_status()
-    return jsonify({"status": "success", "data": status})
+    return web.json_response({"status": "success", "data": status})
 
 
-@app.route('/results', methods=['GET'])
-def get_results():
-    """获取计算结果"""
+@routes.get('/results')
+async def get_results(request):
+    """获取计算结果（high/low/min保持原字段，全部策略结果见by_strategy）"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
-    return jsonify({
+    latest_results = calculator_instance.latest_results
+    by_strategy = {strategy.name: latest_results.get(strategy.name, []) for strategy in calculator_instance.strategies}
+    return web.json_response({
         "status": "success",
-        "calculation_time": calculator_instance.latest_results["calculation_time"],
-        "high": calculator_instance.latest_results["high"],
-        "low": calculator_instance.latest_results["low"],
-        "min": calculator_instance.latest_results["min"],
-        "counts": {
-            "high": len(calculator_instance.latest_results["high"]),
-            "low": len(calculator_instance.latest_results["low"]),
-            "min": len(calculator_instance.latest_results["min"]),
-            "sent_total": len(calculator_instance.sent_items)
-        }
+        "calculation_time": latest_results["calculation_time"],
+        "high": latest_results.get("high", []),
+        "low": latest_results.get("low", []),
+        "min": latest_results.get("min", []),
+        "by_strategy": by_strategy,
+        "counts": dict({name: len(items) for name, items in by_strategy.items()},
+                       sent_total=len(calculator_instance.send_state))
     })
 
 
-@app.route('/send-config', methods=['GET'])
-def get_send_config():
+@routes.get('/send-config')
+async def get_send_config(request):
     """获取发送配置"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
-    return jsonify({
+    return web.json_response({
         "status": "success",
-        "data": {
-            "threshold_minutes": calculator_instance.SEND_MIN_THRESHOLD_MINUTES,
-            "high_enabled": calculator_instance.SEND_HIGH_ENABLED,
-            "low_enabled": calculator_instance.SEND_LOW_ENABLED,
-            "min_enabled": calculator_instance.SEND_MIN_ENABLED
-        },
-        "note": "所有模式阈值固定为0分钟，不可修改"
+        "data": calculator_instance.get_send_config(),
+        "note": "阈值由策略配置文件定义，开关可通过POST /send-config修改"
     })
 
 
-@app.route('/send-config', methods=['POST'])
-def update_send_config():
-    """更新发送配置（仅开关）"""
+@routes.post('/send-config')
+async def update_send_config(request):
+    """更新发送配置（仅开关，键名为"<策略名>_enabled"）"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
     try:
-        data = request.json
-        high_enabled = data.get('high_enabled')
-        low_enabled = data.get('low_enabled')
-        min_enabled = data.get('min_enabled')
-
+        data = await request.json()
         # 类型转换
-        if high_enabled is not None:
-            high_enabled = bool(high_enabled)
-        if low_enabled is not None:
-            low_enabled = bool(low_enabled)
-        if min_enabled is not None:
-            min_enabled = bool(min_enabled)
+        toggles = {key[:-len("_enabled")]: bool(value) for key, value in data.items()
+                   if key.endswith("_enabled") and value is not None}
 
-        config = calculator_instance.set_send_config(high_enabled, low_enabled, min_enabled)
+        config = calculator_instance.set_send_config(toggles)
 
-        return jsonify({
+        return web.json_response({
             "status": "success",
-            "message": "发送配置已更新（阈值固定0分钟）",
+            "message": "发送配置已更新（阈值由策略配置文件定义）",
             "data": config
         })
     except Exception as e:
-        return jsonify({"status": "error", "message": f"更新失败：{str(e)}"}), 400
+        return web.json_response({"status": "error", "message": f"更新失败：{str(e)}"}, status=400)
+
+
+@routes.get('/strategies')
+async def get_strategies(request):
+    """获取当前生效的策略配置与统计"""
+    if not calculator_instance:
+        return calculator_not_ready()
+
+    return web.json_response({"status": "success", "data": calculator_instance.get_strategy_config()})
+
+
+@routes.post('/strategies/reload')
+async def reload_strategies(request):
+    """立即重新加载策略配置文件（不影响WebSocket连接与计算调度）"""
+    if not calculator_instance:
+        return calculator_not_ready()
 
+    result = await asyncio.to_thread(calculator_instance.reload_strategies, True)
+    return web.json_response(result, status=200 if result["status"] == "success" else 400)
 
-@app.route('/old-program-data', methods=['GET'])
-def get_old_program_data():
+
+@routes.get('/old-program-data')
+async def get_old_program_data(request):
     """获取旧程序数据"""
     if not calculator_instance:
-        return jsonify({"status": "error", "message": "计算器未初始化"}), 500
+        return calculator_not_ready()
 
-    return jsonify({
+    return web.json_response({
         "status": "success",
         "connected": calculator_instance.old_program_connected,
         "websocket_running": calculator_instance.ws_running,  # 新增WebSocket运行状态
@@ -919,17 +1725,16 @@ def get_old_program_data():
 
 
 # ---------------------- 启动函数 ----------------------
-def run_api_server():
-    """运行API服务器"""
-    app.run(host='0.0.0.0', port=5010, debug=False, use_reloader=False)
-
-
-if __name__ == "__main__":
+async def run_runtime():
+    """单一asyncio运行时：API服务、WebSocket客户端、计算调度与信号投递共用同一个事件循环"""
+    global calculator_instance
     calculator_instance = HighFrequencyOddsCalculator()
 
-    # 启动API服务线程
-    api_thread = threading.Thread(target=run_api_server, daemon=True)
-    api_thread.start()
+    app = web.Application(middlewares=[cors_middleware])
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', 5010).start()
 
     # 启动提示
     print("=" * 50)
@@ -938,19 +1743,26 @@ if __name__ == "__main__":
     print("📋 可用接口：")
     print("  GET  /start          - 开始计算（同时启动WebSocket）")
     print("  GET  /stop           - 停止计算（同时关闭WebSocket）")
-    print("  GET  /status         - 查看状态（含WebSocket状态）")
+    print("  GET  /status         - 查看状态（含WebSocket状态、调度耗时）")
     print("  GET  /results        - 获取计算结果")
     print("  GET  /send-config    - 获取发送配置")
     print("  POST /send-config    - 更新发送开关（JSON）")
+    print("  GET  /strategies     - 查看策略配置与统计")
+    print("  POST /strategies/reload - 重新加载策略配置文件")
     print("  GET  /old-program-data - 获取旧程序数据（含WebSocket状态）")
     print("=" * 50)
     print("💡 提示：按Ctrl+C可退出程序")
 
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
+        await asyncio.Event().wait()
+    finally:
         print("\n🛑 收到退出信号，正在停止程序...")
-        if calculator_instance:
-            calculator_instance.stop_calculation_loop()
-        print("✅ 程序已安全退出")
\ No newline at end of file
+        await calculator_instance.stop_calculation_loop()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_runtime())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,121 @@
+"""
+对手盘（上下盘）配对工具：Analyzer的对手盘过滤与SportsOddsAnalyzer的上下盘识别共用
+每个盘口归一化为（市场, 盘口值, 方向类别）键，其对手盘键可直接算出，
+配对通过哈希桶一次遍历完成，替代两两比较的O(n²)扫描
+"""
+import re
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+LineKeys = Optional[Tuple[Hashable, Hashable]]
+
+OPPOSITE_SIDE_CLASS = {"home": "away", "away": "home", "over": "under", "under": "over"}
+
+
+def safe_number(v: Any) -> Optional[float]:
+    """安全转换为数字"""
+    try:
+        v = float(v)
+        return v if float('-inf') < v < float('inf') else None
+    except (ValueError, TypeError):
+        return None
+
+
+def spread_side_class(side: Any) -> Optional[str]:
+    """让分盘方向归类为home/away（兼容中文与h/a简写），无法判断时返回None"""
+    side = str(side).lower() if side else ''
+    is_home = 'home' in side or '主' in side or re.match(r'^h$', side) is not None
+    is_away = 'away' in side or '客' in side or re.match(r'^a$', side) is not None
+    if is_home == is_away:
+        return None
+    return "home" if is_home else "away"
+
+
+def total_side_class(side: Any) -> Optional[str]:
+    """大小球方向归类为over/under，无法判断时返回None"""
+    side = str(side).lower() if side else ''
+    if 'over' in side:
+        return "over"
+    if 'under' in side:
+        return "under"
+    return None
+
+
+def line_keys(market: str, handicap: Any, side: Any) -> LineKeys:
+    """
+    返回盘口的（自身键, 对手盘键），无法参与配对时返回None
+    让分盘：盘口值互为相反数（含0）且主客方向相反；大小球：盘口值相同且大小方向相反
+    """
+    if market == "spread":
+        value = safe_number(handicap)
+        side_class = spread_side_class(side)
+        if value is None or side_class is None:
+            return None
+        # 0.0与-0.0相等且哈希一致，让分0的主客两边自然互为对手盘
+        return ("spread", value, side_class), ("spread", -value, OPPOSITE_SIDE_CLASS[side_class])
+
+    if market == "total":
+        side_class = total_side_class(side)
+        if side_class is None:
+            return None
+        return ("total", handicap, side_class), ("total", handicap, OPPOSITE_SIDE_CLASS[side_class])
+
+    return None
+
+
+def pair_opposites(items: List[Any], keys_of: Callable[[Any], LineKeys]) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """
+    按出现顺序两两配对对手盘：每个盘口与其后第一个未配对的对手盘配对（每个盘口最多配对一次）
+    返回（按前者下标排序的配对下标列表, 未配对下标列表）
+    """
+    open_lines: Dict[Hashable, List[int]] = {}  # {盘口键: 尚未配对的下标（按出现顺序）}
+    open_heads: Dict[Hashable, int] = {}  # {盘口键: open_lines中第一个有效位置}
+    partner = [None] * len(items)
+
+    for idx, item in enumerate(items):
+        keys = keys_of(item)
+        if keys is None:
+            continue
+        own_key, opposite_key = keys
+        waiting = open_lines.get(opposite_key)
+        head = open_heads.get(opposite_key, 0)
+        if waiting is not None and head < len(waiting):
+            # 最早出现且尚未配对的对手盘，等价于它向后扫描时遇到的第一个对手盘
+            earlier = waiting[head]
+            open_heads[opposite_key] = head + 1
+            partner[earlier] = idx
+            partner[idx] = earlier
+        else:
+            open_lines.setdefault(own_key, []).append(idx)
+
+    pairs = [(idx, other) for idx, other in enumerate(partner) if other is not None and idx < other]
+    unpaired = [idx for idx, other in enumerate(partner) if other is None]
+    return pairs, unpaired
+
+
+def group_opposites(items: List[Any], keys_of: Callable[[Any], LineKeys]) -> List[List[int]]:
+    """
+    按出现顺序分组对手盘：每个盘口键下第一个出现的盘口（若其对手盘尚未被收集）收集其后出现的全部对手盘，
+    其余盘口单独成组；返回按组首下标排序的下标分组
+    """
+    keys = [keys_of(item) for item in items]
+    positions: Dict[Hashable, List[int]] = {}
+    for idx, item_keys in enumerate(keys):
+        if item_keys is not None:
+            positions.setdefault(item_keys[0], []).append(idx)
+
+    collected = [False] * len(items)
+    groups = []
+    for idx, item_keys in enumerate(keys):
+        if collected[idx]:
+            continue
+        group = [idx]
+        if item_keys is not None:
+            for other in positions.get(item_keys[1], []):
+                if other > idx and not collected[other]:
+                    collected[other] = True
+                    group.append(other)
+            # 对手盘已全部被收集，同键的后续盘口只能单独成组，清空避免重复遍历
+            if len(group) > 1:
+                positions[item_keys[1]] = []
+        groups.append(group)
+    return groups
@@ -3,15 +3,27 @@ import os
 import uvicorn
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Tuple, Set, Union
-import psycopg2
+from pydantic_core import to_json
+from typing import List, Dict, Optional, Set, Union
+from psycopg2 import pool
 from psycopg2.extras import DictCursor
 import logging
 import time
 from datetime import datetime, timedelta
+from decimal import Decimal
 import threading
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# 可选依赖：列式导出（Arrow IPC / Parquet）
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -44,6 +56,14 @@ DB_CONFIG = {
     "port": 5432
 }
 
+# 连接池配置（进程内各线程共享，API进程与监控worker进程各建一个）
+DB_POOL_CONFIG = {
+    "minconn": 2,  # 最小连接数
+    "maxconn": 20,  # 最大连接数（同时也是并发查询数上限）
+    **DB_CONFIG  # 继承基础数据库配置
+}
+DB_POOL_ACQUIRE_TIMEOUT = 30  # 连接池耗尽时等待空闲连接的最长时间（秒）
+
 
 # 新增配置模型字段
 class MonitorConfig(BaseModel):
@@ -86,6 +106,13 @@ MONITOR_CONFIG = {
 }
 
 
+# 盘口类型对应的赔率表与盘口值字段
+ODDS_TABLES = {
+    "spread": {"table": "spread_odds", "field": "spread_value"},
+    "total": {"table": "total_odds", "field": "total_value"}
+}
+
+
 # 数据模型
 class OddsRecord(BaseModel):
     source: int
@@ -151,17 +178,42 @@ class DailyOddsResponse(BaseModel):
     message: Optional[str] = None
 
 
-# 全局缓存 - 存储当前警告
-CURRENT_WARNINGS = []
-WARNING_LOCK = threading.Lock()  # 用于线程安全的锁
-# 在全局变量区域添加（如CURRENT_WARNINGS下方）
-# 存储已触发警告的唯一标识：{match_id_type_value_side_source}
-TRIGGERED_WARNINGS = set()
-TRIGGER_LOCK = threading.Lock()  # 线程安全锁
+# 盘口汇总（由聚合程序写入match_line_summary表）
+class LineSummary(BaseModel):
+    """单个盘口（盘口值+方向+数据源）的赔率汇总"""
+    type: str
+    value: str
+    side: str
+    source: int
+    first_odds: Optional[float] = None
+    first_time: str
+    last_odds: Optional[float] = None
+    last_time: str
+    min_odds: Optional[float] = None
+    max_odds: Optional[float] = None
+    move_count: int  # 首条之后赔率发生变化的次数
+
+
+class MatchSummary(BaseModel):
+    """单场比赛的全部盘口汇总"""
+    match_id: int
+    match_name: str
+    league_name: str
+    home_team: str
+    away_team: str
+    start_time_beijing: str
+    lines: List[LineSummary]
+
+
+class MatchSummaryResponse(BaseModel):
+    """日期区间比赛盘口汇总响应"""
+    status: str
+    start_date: str
+    end_date: str
+    count: int
+    data: Optional[List[MatchSummary]] = None
+    message: Optional[str] = None
 
-def get_unique_warning_key(match_id: int, odds_type: str, value: str, side: str, source_id: int) -> str:
-    """生成警告的唯一标识：比赛ID+盘口类型+盘口值+方向+数据源"""
-    return f"{match_id}_{odds_type}_{value}_{side}_{source_id}"
 
 # 首先在数据库配置后添加新的表创建函数（首次运行时执行）
 # 修改初始化点位警告表的函数
@@ -239,8 +291,7 @@ def init_point_warnings_table():
         logger.error(f"初始化点位警告表失败: {str(e)}", exc_info=True)
         conn.rollback()
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 # 添加一个手动修复约束的函数（可临时调用）
@@ -281,8 +332,7 @@ def repair_point_warnings_constraint():
         conn.rollback()
         return False
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 # 新增：将点位警告存入数据库的函数
@@ -331,8 +381,7 @@ def save_point_warning_to_db(warning: PointWarningMessage):
         logger.error(f"保存点位警告到数据库失败: {e}")
         conn.rollback()
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def load_point_warnings_from_db() -> List[PointWarningMessage]:
@@ -385,20 +434,190 @@ def load_point_warnings_from_db() -> List[PointWarningMessage]:
         logger.error(f"从数据库加载点位警告失败: {e}")
         return []
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
+
+
+# 监控worker与API进程之间的共享状态（均存于数据库）
+def init_monitor_tables():
+    """初始化监控配置表与连续下降警告快照表"""
+    conn = get_db_connection()
+    if not conn:
+        logger.error("数据库连接失败，无法初始化监控状态表")
+        return
+
+    try:
+        with conn.cursor() as cursor:
+            # 监控配置（单行），API写入、worker每秒读取
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monitor_config (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                config JSONB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            # 当前处于触发状态的连续下降警告（单行快照），worker每个周期整体替换
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monitor_warning_snapshot (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                warnings JSONB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            # 首次运行时写入默认配置
+            cursor.execute("""
+            INSERT INTO monitor_config (id, config) VALUES (1, %s)
+            ON CONFLICT (id) DO NOTHING
+            """, (json.dumps(MONITOR_CONFIG),))
+            conn.commit()
+            logger.info("监控状态表初始化成功")
+    except Exception as e:
+        logger.error(f"初始化监控状态表失败: {e}")
+        conn.rollback()
+    finally:
+        release_db_connection(conn)
+
+
+def load_monitor_config() -> Dict:
+    """从数据库读取监控配置并合并到MONITOR_CONFIG（读取失败时保留内存中的配置）"""
+    conn = get_db_connection()
+    if not conn:
+        logger.error("数据库连接失败，无法读取监控配置")
+        return MONITOR_CONFIG
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT config FROM monitor_config WHERE id = 1")
+            row = cursor.fetchone()
+        conn.rollback()
+        if row:
+            MONITOR_CONFIG.update({key: value for key, value in row[0].items() if key in MONITOR_CONFIG})
+    except Exception as e:
+        logger.error(f"读取监控配置失败: {e}")
+    finally:
+        release_db_connection(conn)
+    return MONITOR_CONFIG
+
+
+def save_monitor_config(config: Dict) -> bool:
+    """将监控配置写入数据库，worker在下一次读取时生效"""
+    conn = get_db_connection()
+    if not conn:
+        logger.error("数据库连接失败，无法保存监控配置")
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            INSERT INTO monitor_config (id, config, updated_at) VALUES (1, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE
+            SET config = EXCLUDED.config,
+                updated_at = EXCLUDED.updated_at
+            """, (json.dumps(config),))
+            conn.commit()
+            return True
+    except Exception as e:
+        logger.error(f"保存监控配置失败: {e}")
+        conn.rollback()
+        return False
+    finally:
+        release_db_connection(conn)
+
+
+def publish_warning_snapshot(warnings: List[WarningMessage]) -> bool:
+    """worker发布当前的连续下降警告快照"""
+    conn = get_db_connection()
+    if not conn:
+        logger.error("数据库连接失败，无法发布警告快照")
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            INSERT INTO monitor_warning_snapshot (id, warnings, updated_at) VALUES (1, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE
+            SET warnings = EXCLUDED.warnings,
+                updated_at = EXCLUDED.updated_at
+            """, (json.dumps([warning.dict() for warning in warnings]),))
+            conn.commit()
+            return True
+    except Exception as e:
+        logger.error(f"发布警告快照失败: {e}")
+        conn.rollback()
+        return False
+    finally:
+        release_db_connection(conn)
+
+
+def load_warning_snapshot() -> List[WarningMessage]:
+    """读取worker最近一次发布的连续下降警告"""
+    conn = get_db_connection()
+    if not conn:
+        logger.error("数据库连接失败，无法读取警告快照")
+        return []
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT warnings FROM monitor_warning_snapshot WHERE id = 1")
+            row = cursor.fetchone()
+        conn.rollback()
+        return [WarningMessage(**item) for item in row[0]] if row else []
+    except Exception as e:
+        logger.error(f"读取警告快照失败: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+# 数据库连接池
+postgres_pool = None
+POOL_INIT_LOCK = threading.Lock()
+# ThreadedConnectionPool在连接耗尽时直接抛错，用信号量让请求排队等待空闲连接
+POOL_SEMAPHORE = threading.BoundedSemaphore(DB_POOL_CONFIG["maxconn"])
+
+
+def init_db_pool() -> bool:
+    """初始化数据库连接池"""
+    global postgres_pool
+    try:
+        postgres_pool = pool.ThreadedConnectionPool(**DB_POOL_CONFIG)
+        logger.info(f"数据库连接池初始化成功，最小连接数: {DB_POOL_CONFIG['minconn']}，最大连接数: {DB_POOL_CONFIG['maxconn']}")
+        return True
+    except Exception as e:
+        logger.error(f"数据库连接池初始化失败: {e}")
+        return False
 
 
 # 数据库连接工具函数
 def get_db_connection():
+    """从连接池获取数据库连接（用完必须调用release_db_connection归还）"""
+    if postgres_pool is None:
+        with POOL_INIT_LOCK:
+            if postgres_pool is None and not init_db_pool():
+                return None
+
+    if not POOL_SEMAPHORE.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT):
+        logger.error(f"等待数据库连接超时（{DB_POOL_ACQUIRE_TIMEOUT}秒），连接池已耗尽")
+        return None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        return postgres_pool.getconn()
     except Exception as e:
+        POOL_SEMAPHORE.release()
         logger.error(f"数据库连接失败: {e}")
         return None
 
 
+def release_db_connection(conn):
+    """将数据库连接归还连接池（已断开的连接直接丢弃，未结束的事务由连接池回滚）"""
+    if not conn or postgres_pool is None:
+        return
+    try:
+        postgres_pool.putconn(conn, close=bool(conn.closed))
+    except Exception as e:
+        logger.error(f"释放连接回池失败: {e}")
+    finally:
+        POOL_SEMAPHORE.release()
+
+
 # 新增：连续相同赔率去重函数
 def deduplicate_consecutive_odds(records):
     """
@@ -425,9 +644,240 @@ def deduplicate_consecutive_odds(records):
     return deduplicated
 
 
+def json_default(obj):
+    """JSON序列化兜底：数据库返回的Decimal转为数字，时间转为统一格式字符串"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        return obj.strftime("%Y-%m-%d %H:%M:%S")
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+# 热点接口的预编码响应：跳过response_model对每个嵌套字典的逐层校验与重新序列化，
+# 按模型字段顺序补全字段（缺省为null）后直接用pydantic的JSON模式编码（Decimal输出字符串、
+# datetime输出ISO格式），输出与模型序列化结果逐字节一致；模型中声明了类型的字段由调用方先行转换
+HISTORY_RESPONSE_FIELDS = ["status", "data", "message"]
+DAILY_ODDS_RESPONSE_FIELDS = ["status", "start_date", "end_date", "count", "data", "message"]
+
+
+def encode_model_payload(fields: List[str], payload: Dict) -> bytes:
+    """按响应模型的字段顺序编码（未提供的字段输出null）"""
+    return to_json({field: payload.get(field) for field in fields})
+
+
+def format_odds_record(record: Dict) -> Dict:
+    """历史赔率记录转为OddsRecord的字段类型（数据库Decimal赔率转float，时间转字符串）"""
+    return {
+        "source": record["source"],
+        "odds": float(record["odds"]),
+        "time": record["time"].strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def history_response(payload: Dict) -> Response:
+    return json_response(encode_model_payload(HISTORY_RESPONSE_FIELDS, payload))
+
+
+def daily_odds_response(payload: Dict) -> Response:
+    return json_response(encode_model_payload(DAILY_ODDS_RESPONSE_FIELDS, payload))
+
+
+# 读接口响应缓存配置
+RESPONSE_CACHE_CONFIG = {
+    "max_entries": 5000,  # LRU容量上限（条）
+    "watch_interval": 1.0,  # 赔率表新增行检查间隔（秒）
+    "upcoming_ttl": 5,  # 未开赛全量接口的缓存有效期（秒），时间窗口随当前时间滑动
+    "id_overlap": 2000  # 每次检查从水位线之前多少个id处开始回读，补上较小id晚提交的行
+}
+
+
+class ResponseCache:
+    """
+    读接口的进程内LRU缓存
+    每条缓存记录依赖的match_id集合，赔率表出现这些比赛的新行时整条失效；
+    依赖为None表示依赖全部比赛（任意新行都会使其失效）；缓存内容为已编码的响应体，命中时无需再次序列化
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (value, match_ids, expires_at)
+        self.by_match = defaultdict(set)  # match_id -> 依赖该比赛的缓存key
+        self.global_keys = set()  # 依赖全部比赛的缓存key
+        self.active = False  # 失效监听线程运行后才启用缓存，避免读到无人维护的旧数据
+        self.version = 0  # 每次失效递增；查询期间发生过失效的结果不写入缓存
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key):
+        if not self.active:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version: int, match_ids: Optional[Set[int]] = None, ttl: Optional[float] = None):
+        """写入缓存；version为查询前读取的self.version"""
+        if not self.active:
+            return
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self.lock:
+            if version != self.version:
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, match_ids, expires_at)
+            if match_ids is None:
+                self.global_keys.add(key)
+            else:
+                for match_id in match_ids:
+                    self.by_match[match_id].add(key)
+            while len(self.entries) > self.max_entries:
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate_matches(self, match_ids: Set[int]):
+        """使依赖这些比赛的缓存失效"""
+        with self.lock:
+            keys = set(self.global_keys)
+            for match_id in match_ids:
+                keys |= self.by_match.get(match_id, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            self.version += 1
+
+    def clear(self):
+        with self.lock:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.by_match.clear()
+            self.global_keys.clear()
+            self.version += 1
+
+    def _remove(self, key):
+        """删除一条缓存及其反向索引（调用方持有锁）"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        match_ids = entry[1]
+        if match_ids is None:
+            self.global_keys.discard(key)
+            return
+        for match_id in match_ids:
+            keys = self.by_match.get(match_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_match[match_id]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "active": self.active,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions
+            }
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_CONFIG["max_entries"])
+# 赔率表已检查过的最大id（水位线）
+ODDS_WATERMARKS = {"spread_odds": None, "total_odds": None}
+# 赔率表重叠区间内已检查过的id（去重）
+ODDS_SEEN_IDS = {"spread_odds": set(), "total_odds": set()}
+
+
+def check_odds_watermarks():
+    """
+    检查赔率表水位线之后的新增行，按match_id使缓存失效；
+    从水位线之前id_overlap处开始回读，按id去重，较小id晚提交的行同样会使缓存失效
+    """
+    conn = get_db_connection()
+    if not conn:
+        # 无法确认数据是否变化时整体清空，宁可多查一次也不返回旧数据
+        RESPONSE_CACHE.clear()
+        return
+
+    overlap = RESPONSE_CACHE_CONFIG["id_overlap"]
+    try:
+        changed_match_ids = set()
+        with conn.cursor() as cursor:
+            for table, last_id in ODDS_WATERMARKS.items():
+                seen_ids = ODDS_SEEN_IDS[table]
+                if last_id is None:
+                    # 首次只记录水位线及重叠区间内已有的id
+                    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                    ODDS_WATERMARKS[table] = cursor.fetchone()[0]
+                    cursor.execute(f"SELECT id FROM {table} WHERE id > %s",
+                                   (ODDS_WATERMARKS[table] - overlap,))
+                    seen_ids.update(row[0] for row in cursor.fetchall())
+                    continue
+                cursor.execute(f"""
+                SELECT id, match_id FROM {table}
+                WHERE id > %s
+                """, (last_id - overlap,))
+                rows = [row for row in cursor.fetchall() if row[0] not in seen_ids]
+                for row_id, match_id in rows:
+                    seen_ids.add(row_id)
+                    changed_match_ids.add(match_id)
+                if rows:
+                    ODDS_WATERMARKS[table] = max(last_id, max(row[0] for row in rows))
+                    cutoff = ODDS_WATERMARKS[table] - overlap
+                    ODDS_SEEN_IDS[table] = {row_id for row_id in seen_ids if row_id > cutoff}
+        conn.rollback()
+
+        if changed_match_ids:
+            RESPONSE_CACHE.invalidate_matches(changed_match_ids)
+    except Exception as e:
+        logger.error(f"检查赔率表水位线失败: {e}")
+        RESPONSE_CACHE.clear()
+    finally:
+        release_db_connection(conn)
+
+
+def cache_watch_loop():
+    """缓存失效监听主循环"""
+    check_odds_watermarks()  # 首次只记录当前水位线
+    RESPONSE_CACHE.active = True
+    logger.info("响应缓存失效监听已启动")
+
+    while True:
+        time.sleep(RESPONSE_CACHE_CONFIG["watch_interval"])
+        check_odds_watermarks()
+
+
+def start_cache_watch_thread():
+    """启动缓存失效监听线程"""
+    watch_thread = threading.Thread(target=cache_watch_loop, daemon=True)
+    watch_thread.start()
+
+
 # API路由 - 历史赔率查询（核心修改：去重逻辑）
 @app.get("/api/odds-history", response_model=HistoryResponse)
-async def get_odds_history(
+def get_odds_history(
         match_name: str = Query(..., description="完整比赛名称，格式：联赛 - 主队 vs 客队-日期时间"),
         start_time_beijing: str = Query(..., description="比赛开始时间（北京时间）"),
         type: str = Query(..., enum=["spread", "total"], description="盘口类型"),
@@ -435,11 +885,17 @@ async def get_odds_history(
         side: str = Query(..., enum=["home", "away", "over", "under"], description="投注方向")
 ):
     """查询指定盘口的历史赔率记录"""
+    cache_key = ("odds-history", match_name, start_time_beijing, type, value, side)
+    cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return json_response(cached)
+    cache_version = RESPONSE_CACHE.version
+
     logger.info(f"收到历史赔率查询请求: match_name={match_name}, start_time={start_time_beijing}")
 
     conn = get_db_connection()
     if not conn:
-        return {"status": "error", "message": "数据库连接失败"}
+        return history_response({"status": "error", "message": "数据库连接失败"})
 
     try:
         # 确定表名和字段名
@@ -458,7 +914,7 @@ async def get_odds_history(
 
             if not match:
                 logger.warning(f"未找到匹配比赛: match_name={match_name}, start_time={start_time_beijing}")
-                return {"status": "error", "message": "比赛不存在"}
+                return history_response({"status": "error", "message": "比赛不存在"})
 
             match_id = match["id"]
             logger.info(f"找到比赛ID: {match_id}")
@@ -495,30 +951,27 @@ async def get_odds_history(
 
                 # 转换时间格式并限制数量（按时间倒序排列，最新的在前）
                 formatted_records = [
-                    {
-                        "source": r["source"],
-                        "odds": r["odds"],
-                        "time": r["time"].strftime("%Y-%m-%d %H:%M:%S")
-                    }
+                    format_odds_record(r)
                     for r in sorted(deduplicated_records, key=lambda x: x["time"], reverse=True)[:200]
                 ]
 
                 all_records.extend(formatted_records)
 
         logger.info(f"成功查询到 {len(all_records)} 条去重后的历史记录")
-        return {"status": "success", "data": all_records}
+        body = encode_model_payload(HISTORY_RESPONSE_FIELDS, {"status": "success", "data": all_records})
+        RESPONSE_CACHE.put(cache_key, body, cache_version, match_ids={match_id})
+        return json_response(body)
 
     except Exception as e:
         logger.error(f"查询历史赔率失败: {e}")
-        return {"status": "error", "message": "查询失败"}
+        return history_response({"status": "error", "message": "查询失败"})
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 @app.get("/api/latest-odds-source2", response_model=HistoryResponse)
-async def get_latest_odds_source2(
+def get_latest_odds_source2(
         match_name: str = Query(..., description="完整比赛名称，格式：联赛 - 主队 vs 客队-日期时间"),
         start_time_beijing: str = Query(..., description="比赛开始时间（北京时间）"),
         type: str = Query(..., enum=["spread", "total"], description="盘口类型"),
@@ -526,11 +979,17 @@ async def get_latest_odds_source2(
         side: str = Query(..., enum=["home", "away", "over", "under"], description="投注方向")
 ):
     """查询指定盘口的数据源2最新赔率记录"""
+    cache_key = ("latest-odds-source2", match_name, start_time_beijing, type, value, side)
+    cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return json_response(cached)
+    cache_version = RESPONSE_CACHE.version
+
     logger.info(f"收到数据源2最新赔率查询请求: match_name={match_name}, start_time={start_time_beijing}")
 
     conn = get_db_connection()
     if not conn:
-        return {"status": "error", "message": "数据库连接失败"}
+        return history_response({"status": "error", "message": "数据库连接失败"})
 
     try:
         # 确定表名和字段名
@@ -549,7 +1008,7 @@ async def get_latest_odds_source2(
 
             if not match:
                 logger.warning(f"未找到匹配比赛: match_name={match_name}, start_time={start_time_beijing}")
-                return {"status": "error", "message": "比赛不存在"}
+                return history_response({"status": "error", "message": "比赛不存在"})
 
             match_id = match["id"]
             logger.info(f"找到比赛ID: {match_id}")
@@ -589,28 +1048,25 @@ async def get_latest_odds_source2(
             if deduplicated_records:
                 # 按时间倒序排列，取第一条（最新的）
                 latest_record = sorted(deduplicated_records, key=lambda x: x["time"], reverse=True)[0]
-                formatted_records.append({
-                    "source": latest_record["source"],
-                    "odds": latest_record["odds"],
-                    "time": latest_record["time"].strftime("%Y-%m-%d %H:%M:%S")
-                })
+                formatted_records.append(format_odds_record(latest_record))
 
         logger.info(f"成功查询到数据源2的最新赔率记录: {len(formatted_records)} 条")
-        return {"status": "success", "data": formatted_records}
+        body = encode_model_payload(HISTORY_RESPONSE_FIELDS, {"status": "success", "data": formatted_records})
+        RESPONSE_CACHE.put(cache_key, body, cache_version, match_ids={match_id})
+        return json_response(body)
 
     except Exception as e:
         logger.error(f"查询数据源2最新赔率失败: {e}")
-        return {"status": "error", "message": "查询失败"}
+        return history_response({"status": "error", "message": "查询失败"})
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 # 新增：简化版批量查询比赛开赛时间接口
 @app.post("/api/match-start-time/simple")
-async def simple_batch_query_match_start_time(queries: List[dict]):
-    """修复时间格式处理，确保与调用方一致"""
+def simple_batch_query_match_start_time(queries: List[dict]):
+    """修复时间格式处理，确保与调用方一致（整批查询项合并为一条SQL解析）"""
     logger.info(f"收到简化版批量查询开赛时间请求，共 {len(queries)} 条")
 
     conn = get_db_connection()
@@ -618,73 +1074,81 @@ async def simple_batch_query_match_start_time(queries: List[dict]):
         return {"status": "error", "message": "数据库连接失败", "results": []}
 
     results = []
+    # 通过参数校验的查询项，按列拆成数组供unnest展开
+    batch_columns = {"idx": [], "league_name": [], "home_team": [], "away_team": [], "order_time": []}
 
     try:
-        with conn.cursor(cursor_factory=DictCursor) as cursor:
-            for query in queries:
+        for query in queries:
+            league = query.get("league_name")
+            home = query.get("home_team")
+            away = query.get("away_team")
+            order_time = query.get("order_time")
+
+            if not all([league, home, away, order_time]):
+                results.append({
+                    **query,
+                    "match_start_time": None,
+                    "status": "invalid_params"
+                })
+                continue
+
+            # 修复：兼容带毫秒的时间格式（与调用方一致）
+            try:
                 try:
-                    league = query.get("league_name")
-                    home = query.get("home_team")
-                    away = query.get("away_team")
-                    order_time = query.get("order_time")
-
-                    if not all([league, home, away, order_time]):
-                        results.append({
-                            **query,
+                    # 尝试解析带毫秒的时间（%Y-%m-%d %H:%M:%S.%f）
+                    order_datetime = datetime.strptime(order_time, "%Y-%m-%d %H:%M:%S.%f")
+                except ValueError:
+                    # 失败则尝试解析不带毫秒的时间（兼容容错）
+                    order_datetime = datetime.strptime(order_time, "%Y-%m-%d %H:%M:%S")
+            except (ValueError, TypeError) as e:
+                # 时间格式错误（无论是带不带毫秒）
+                results.append({
+                    **query,
+                    "match_start_time": None,
+                    "status": "invalid_time_format"
+                })
+                logger.warning(f"时间格式错误: {str(e)}, query: {query}")
+                continue
+
+            batch_columns["idx"].append(len(results))
+            batch_columns["league_name"].append(str(league))
+            batch_columns["home_team"].append(str(home))
+            batch_columns["away_team"].append(str(away))
+            batch_columns["order_time"].append(order_datetime)
+            results.append({**query,
                             "match_start_time": None,
-                            "status": "invalid_params"
-                        })
-                        continue
+                            "status": "not_found"
+                            })
+
+        if batch_columns["idx"]:
+            with conn.cursor(cursor_factory=DictCursor) as cursor:
+                # 每个查询项取开赛时间 > 订单时间的最近两场（第二场仅用于判断是否有多场匹配）
+                cursor.execute("""
+                SELECT q.idx, nm.start_time_beijing
+                FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[], %s::timestamp[])
+                     AS q(idx, league_name, home_team, away_team, order_time)
+                CROSS JOIN LATERAL (
+                    SELECT m.start_time_beijing, m.start_time_ts
+                    FROM matches m
+                    WHERE m.league_name = q.league_name
+                      AND m.home_team = q.home_team
+                      AND m.away_team = q.away_team
+                      AND m.start_time_ts > q.order_time
+                    ORDER BY m.start_time_ts ASC
+                    LIMIT 2
+                ) nm
+                ORDER BY q.idx, nm.start_time_ts ASC
+                """, (batch_columns["idx"], batch_columns["league_name"], batch_columns["home_team"],
+                      batch_columns["away_team"], batch_columns["order_time"]))
 
-                    # 修复：兼容带毫秒的时间格式（与调用方一致）
-                    try:
-                        # 尝试解析带毫秒的时间（%Y-%m-%d %H:%M:%S.%f）
-                        order_datetime = datetime.strptime(order_time, "%Y-%m-%d %H:%M:%S.%f")
-                    except ValueError:
-                        # 失败则尝试解析不带毫秒的时间（兼容容错）
-                        order_datetime = datetime.strptime(order_time, "%Y-%m-%d %H:%M:%S")
-
-                    # 查询符合条件的比赛（开赛时间 > 订单时间）
-                    cursor.execute("""
-                    SELECT start_time_beijing 
-                    FROM matches 
-                    WHERE league_name = %s
-                      AND home_team = %s
-                      AND away_team = %s
-                      AND start_time_beijing::timestamp > %s
-                    ORDER BY start_time_beijing::timestamp ASC
-                    """, (league, home, away, order_datetime))
-
-                    matches = cursor.fetchall()
-
-                    result = {**query,
-                              "match_start_time": None,
-                              "status": "not_found"
-                              }
-
-                    if matches:
+                for row in cursor.fetchall():
+                    result = results[row["idx"]]
+                    if result["match_start_time"] is None:
                         # 取第一个最接近的比赛时间
-                        result["match_start_time"] = matches[0]["start_time_beijing"]
+                        result["match_start_time"] = row["start_time_beijing"]
                         result["status"] = "success"
-                        if len(matches) > 1:
-                            result["status"] = "multiple_matches"
-
-                    results.append(result)
-
-                except ValueError as e:
-                    # 时间格式错误（无论是带不带毫秒）
-                    results.append({
-                        **query,
-                        "match_start_time": None,
-                        "status": "invalid_time_format"
-                    })
-                    logger.warning(f"时间格式错误: {str(e)}, query: {query}")
-                except Exception as e:
-                    logger.error(f"处理查询项失败: {e}")
-                    results.append({**query,
-                                    "match_start_time": None,
-                                    "status": "error"
-                                    })
+                    else:
+                        result["status"] = "multiple_matches"
 
         return {"status": "success", "results": results}
 
@@ -693,12 +1157,11 @@ async def simple_batch_query_match_start_time(queries: List[dict]):
         return {"status": "error", "message": str(e), "results": []}
 
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 @app.get("/api/debug/matches")
-async def debug_matches(
+def debug_matches(
         search: str = Query(..., description="搜索关键词")
 ):
     """搜索匹配的比赛名称（调试用）"""
@@ -714,546 +1177,38 @@ async def debug_matches(
 
             return {"status": "success", "data": cursor.fetchall()}
     finally:
-        conn.close()
-
-
-# 监控系统 - 获取所有赔率数据
-def get_all_odds_data(match_id: int, type: str, value: str, side: str) -> Dict[int, List[Dict]]:
-    """获取指定比赛和盘口的所有赔率数据"""
-    table = "spread_odds" if type == "spread" else "total_odds"
-    field = "spread_value" if type == "spread" else "total_value"
-
-    conn = get_db_connection()
-    if not conn:
-        logger.error(f"数据库连接失败，无法获取赔率数据 (match_id={match_id})")
-        return {}
-
-    try:
-        with conn.cursor(cursor_factory=DictCursor) as cursor:
-            # 查询所有数据源的赔率数据
-            cursor.execute(f"""
-            SELECT source, odds_value, recorded_at
-            FROM {table}
-            WHERE match_id = %s
-              AND {field} = %s
-              AND side = %s
-            ORDER BY source, recorded_at DESC
-            """, (match_id, value, side))
-
-            rows = cursor.fetchall()
-
-            # 按数据源分组
-            source_data = {}
-            for row in rows:
-                source = row["source"]
-                if source not in source_data:
-                    source_data[source] = []
-                source_data[source].append({
-                    "odds": row["odds_value"],
-                    "time": row["recorded_at"]
-                })
-
-            return source_data
-
-    except Exception as e:
-        logger.error(f"获取所有赔率数据失败: {e}")
-        return {}
-    finally:
-        if conn:
-            conn.close()
-
-
-# 监控系统 - 分析赔率趋势
-def analyze_odds_trend(odds_data: List[Dict], consecutive_decreases: int) -> bool:
-    """分析赔率趋势，判断是否连续下降指定次数（马来盘逻辑）"""
-    # 过滤掉None值的赔率记录
-    valid_odds = [record for record in odds_data if record["odds"] is not None]
-
-    if len(valid_odds) < consecutive_decreases:
-        return False
-
-    # 按时间排序（最新的在前）
-    sorted_data = sorted(valid_odds, key=lambda x: x["time"], reverse=True)
-
-    # 检查是否连续下降
-    for i in range(consecutive_decreases):
-        if i + 1 >= len(sorted_data):
-            return False
-
-        # 获取当前和前一个赔率
-        new_odds = sorted_data[i]["odds"]
-        old_odds = sorted_data[i + 1]["odds"]
-
-        # 转换为十进制赔率再比较
-        new_decimal = malay_to_decimal(new_odds)
-        old_decimal = malay_to_decimal(old_odds)
-
-        if new_decimal >= old_decimal:  # 十进制赔率未下降
-            return False
-
-    return True
-
-
-def malay_to_decimal(malay_odds: float) -> float:
-    """将马来盘赔率转换为十进制赔率"""
-    if malay_odds >= 0:
-        return 1 + malay_odds  # 正数马来赔率直接加1
-    else:
-        return 1 + (1 / abs(malay_odds))  # 负数马来赔率按公式转换
-
-
-# 新增：马来盘点位计算函数
-def calculate_malay_points(old_odds: float, new_odds: float) -> float:
-    """
-    计算马来盘赔率变化的点位
-    正数表示下跌，负数表示上涨
-    """
-    # 处理无效赔率
-    if old_odds is None or new_odds is None:
-        return 0.0
-
-    try:
-        # 转换为浮点数
-        old = float(old_odds)
-        new = float(new_odds)
-
-        # 情况1: 负数到正数（下跌）
-        if old < 0 and new >= 0:
-            return (100 - abs(old * 100)) + (100 - (new * 100))
-
-        # 情况2: 都为负数（-0.6到-0.9为跌幅30点位）
-        elif old < 0 and new < 0:
-            return abs(new * 100) - abs(old * 100)
-
-        # 情况3: 都为正数（0.9到0.6跌幅为30个点位）
-        elif old >= 0 and new >= 0:
-            return (old * 100) - (new * 100)
-
-        # 情况4: 正数到负数（上涨）
-        else:  # old >= 0 and new < 0
-            return 0.0
-
-    except (ValueError, TypeError):
-        return 0.0
-
-
-# 新增：赔率点位跌幅分析函数
-def analyze_odds_point_drop(odds_data: List[Dict], time_window_minutes: int) -> Tuple[bool, float, float, float]:
-    """
-    分析赔率在指定时间窗口内的跌幅是否超过阈值
-    :param odds_data: 赔率数据列表
-    :param time_window_minutes: 时间窗口(分钟)
-    :return: (是否超过阈值, 跌幅点位, 之前的赔率, 当前的赔率)
-    """
-    # 过滤无效数据
-    valid_odds = [record for record in odds_data if record["odds"] is not None]
-    if len(valid_odds) < 2:
-        return (False, 0.0, 0.0, 0.0)
-
-    # 按时间排序（最新的在前）
-    sorted_data = sorted(valid_odds, key=lambda x: x["time"], reverse=True)
-    current_time = sorted_data[0]["time"]
-    current_odds = sorted_data[0]["odds"]
-
-    # 计算时间窗口的起始时间
-    window_start_time = current_time - timedelta(minutes=time_window_minutes)
-
-    # 找到时间窗口内最早的赔率记录
-    previous_odds = None
-    for record in sorted_data:
-        if record["time"] <= window_start_time:
-            previous_odds = record["odds"]
-            break
-
-    # 如果没有找到时间窗口内的记录，使用最早的记录
-    if previous_odds is None:
-        return (False, 0.0, 0.0, 0.0)  # 无有效对比数据，不触发警告
-
-    # 计算跌幅点位
-    drop_points = calculate_malay_points(previous_odds, current_odds)
-
-    # 返回结果
-    return (True, drop_points, previous_odds, current_odds)
-
-
-# 修改：检查未开始比赛的函数（包含点位监控逻辑）
-def check_active_matches():
-    """检查所有未开始的比赛（开始时间 > 当前时间），看是否有赔率下降警告"""
-    conn = get_db_connection()
-    if not conn:
-        logger.error("数据库连接失败，无法检查未开始的比赛")
-        return []
-
-    try:
-        now = datetime.now()  # 获取当前时间（北京时间）
-        # 下限：当前时间 + time_window（例如配置为2，则表示2小时后）
-        start_time_threshold = now + timedelta(hours=MONITOR_CONFIG["time_window"])
-
-        # 上限：固定为12小时（无论time_window配置多少，上限都是12小时后）
-        end_time_threshold = now + timedelta(hours=12)
-
-        with conn.cursor(cursor_factory=DictCursor) as cursor:
-            # 查询开始时间在 [now, now+time_window] 内的未开始比赛
-            cursor.execute("""
-            SELECT id, match_name, start_time_beijing, 
-                   league_name, home_team, away_team, result_value
-            FROM matches 
-            WHERE start_time_beijing::timestamp >= %s  
-              AND start_time_beijing::timestamp < %s   
-            """, (start_time_threshold, end_time_threshold))
-
-            matches = cursor.fetchall()
-
-            warnings = []
-
-            # 检查每种盘口类型
-            for match in matches:
-                match_id = match["id"]
-                match_name = match["match_name"]
-                start_time = match["start_time_beijing"]
-                league_name = match["league_name"]
-                home_team = match["home_team"]
-                away_team = match["away_team"]
-
-                # 检查让分盘和大小球盘
-                check_types = [
-                    {"type": "spread", "table": "spread_odds", "field": "spread_value"},
-                    {"type": "total", "table": "total_odds", "field": "total_value"}
-                ]
-
-                for check_type in check_types:
-                    # 获取该比赛的所有盘口值和投注方向
-                    cursor.execute(f"""
-                    SELECT DISTINCT {check_type["field"]} as value, side 
-                    FROM {check_type["table"]}
-                    WHERE match_id = %s
-                    """, (match_id,))
-
-                    lines = cursor.fetchall()
-
-                    for line in lines:
-                        value = line["value"]
-                        side = line["side"]
-
-                        # 获取source2的原始赔率数据（用于计算具体盘口的189指数）
-                        cursor.execute(f"""
-                        SELECT {check_type["field"]} as value, side, odds_value 
-                        FROM {check_type["table"]}
-                        WHERE match_id = %s AND source = 2  -- 只取source2的数据
-                        """, (match_id,))
-                        source2_odds_rows = cursor.fetchall()
-
-                        # 格式化source2数据为字典（{盘口值: {方向: 赔率}}）
-                        source2_odds = defaultdict(dict)
-                        for row in source2_odds_rows:
-                            v = row["value"]
-                            s = row["side"]
-                            source2_odds[v][s] = row["odds_value"]
-
-                        # 计算当前盘口的189指数
-                        current_189 = -1
-                        if check_type["type"] == "spread":
-                            current_189 = calculate_single_spread_189(source2_odds, value, side)
-                        else:
-                            current_189 = calculate_single_total_189(source2_odds, value, side)
-
-                        # 获取所有赔率数据
-                        all_data = get_all_odds_data(
-                            match_id,
-                            check_type["type"],
-                            value,
-                            side
-                        )
-
-                        # 1. 原有连续下降监控逻辑
-                        required_sources = MONITOR_CONFIG["required_sources"]
-                        decreasing_sources = []
-                        for source_id in required_sources:
-                            if source_id in all_data and analyze_odds_trend(
-                                    all_data[source_id],
-                                    MONITOR_CONFIG["consecutive_decreases"]
-                            ):
-                                decreasing_sources.append(source_id)
-
-                        # 检查赔率范围
-                        if 2 in all_data and all_data[2]:
-                            latest_odds = all_data[2][0]["odds"]  # 取source=2的最新赔率
-                            if latest_odds is not None:
-                                # 判断是否符合赔率范围
-                                odds_in_range = False
-                                if latest_odds >= 0 and latest_odds >= MONITOR_CONFIG["min_odds"]:
-                                    odds_in_range = True
-                                elif latest_odds < 0 and latest_odds <= MONITOR_CONFIG["max_odds"]:
-                                    odds_in_range = True
-
-                                # 过滤：仅保留当前盘口189指数≥阈值的情况
-                                if current_189 >= MONITOR_CONFIG["threshold_189"]:
-                                    # 生成连续下降警告
-                                    if odds_in_range and len(decreasing_sources) == len(required_sources):
-                                        warning = WarningMessage(
-                                            match_name=match_name,
-                                            start_time_beijing=start_time,
-                                            type=check_type["type"],
-                                            value=value,
-                                            side=side,
-                                            warning_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                            sources=decreasing_sources,
-                                            league_name=league_name,
-                                            home_team=home_team,
-                                            away_team=away_team,
-                                            result_value=str(current_189)  # 显示当前盘口的189指数
-                                        )
-                                        warnings.append(warning)
-
-                        # 2. 新增点位监控逻辑
-                        if MONITOR_CONFIG["point_monitor_enabled"]:
-                            point_sources = MONITOR_CONFIG["point_monitor_sources"]
-                            time_window = MONITOR_CONFIG["point_check_minutes"]
-                            threshold = MONITOR_CONFIG["point_threshold"]
-
-                            for source_id in point_sources:
-                                if source_id in all_data and len(all_data[source_id]) >= 2:
-                                    # 分析点位跌幅
-                                    has_drop, drop_points, prev_odds, curr_odds = analyze_odds_point_drop(
-                                        all_data[source_id],
-                                        time_window
-                                    )
-
-                                    # 如果跌幅超过阈值，添加警告
-                                    if has_drop and drop_points >= threshold:
-                                        # 生成唯一标识
-                                        unique_key = get_unique_warning_key(
-                                            match_id=match_id,
-                                            odds_type=check_type["type"],
-                                            value=value,
-                                            side=side,
-                                            source_id=source_id
-                                        )
-
-                                        # 检查是否已触发过该警告
-                                        with TRIGGER_LOCK:
-                                            if unique_key in TRIGGERED_WARNINGS:
-                                                logger.info(f"重复点位警告拦截（唯一标识存在）：{unique_key}")
-                                                continue  # 已触发过，直接跳过
-                                            TRIGGERED_WARNINGS.add(unique_key)  # 未触发过，添加到集合
-                                        warning = PointWarningMessage(
-                                            match_name=match_name,
-                                            start_time_beijing=start_time,
-                                            type=check_type["type"],
-                                            value=value,
-                                            side=side,
-                                            warning_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                            sources=[source_id],
-                                            league_name=league_name,
-                                            home_team=home_team,
-                                            away_team=away_team,
-                                            result_value=f"跌幅{drop_points:.1f}点",
-                                            time_window=time_window,
-                                            drop_points=drop_points,
-                                            threshold_points=threshold,
-                                            previous_odds=prev_odds,
-                                            current_odds=curr_odds
-                                        )
-                                        warnings.append(warning)
-                                        # 新增：保存到数据库
-                                        save_point_warning_to_db(warning)
-
-            return warnings
-
-    except Exception as e:
-        logger.error(f"检查未开始的比赛失败: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
-
-
-# 监控系统 - 更新缓存中的警告
-def update_warnings_cache():
-    """更新缓存中的警告信息"""
-    global CURRENT_WARNINGS
-
-    try:
-        # 获取最新警告
-        new_warnings = check_active_matches()
-
-        # 使用锁保证线程安全
-        with WARNING_LOCK:
-            # 替换当前警告缓存
-            CURRENT_WARNINGS = new_warnings
-            logger.info(f"警告缓存已更新，当前有 {len(CURRENT_WARNINGS)} 条警告")
-
-    except Exception as e:
-        logger.error(f"更新警告缓存失败: {e}")
-
-
-# 监控系统 - 主循环
-def monitor_loop():
-    """赔率监控主循环"""
-    logger.info("赔率监控系统已启动")
-
-    # 初始更新一次警告缓存
-    update_warnings_cache()
-
-    while True:
-        # 检查是否需要运行（任一监控启用）
-        if MONITOR_CONFIG["enabled"] or MONITOR_CONFIG["point_monitor_enabled"]:
-            try:
-                start_time = time.time()
-
-                # 更新警告缓存
-                update_warnings_cache()
-
-                end_time = time.time()
-                execution_time = end_time - start_time
-
-                # 计算下一次检查的等待时间
-                wait_time = max(0, MONITOR_CONFIG["check_interval"])
-                logger.info(f"监控周期完成，耗时 {execution_time:.2f} 秒，下次检查将在 {wait_time:.2f} 秒后进行")
-
-                time.sleep(wait_time)
-
-            except Exception as e:
-                logger.error(f"监控循环异常: {e}")
-                time.sleep(MONITOR_CONFIG["check_interval"])
-        else:
-            # 两种监控都禁用时，休眠较长时间
-            time.sleep(60)
-
-
-# 新增：计算单个让分盘口的189指数
-def calculate_single_spread_189(source2_spreads, spread_value, side) -> float:
-    """
-    计算单个让分盘口的189指数（仅针对source2）
-    :param source2_spreads: source2的所有让分盘数据（{盘口值: {"home": 赔率, "away": 赔率}}）
-    :param spread_value: 当前盘口值（如"-1"）
-    :param side: 投注方向（"home"或"away"）
-    :return: 该盘口的189指数（保留2位小数），-1表示计算失败
-    """
-    try:
-        # 转换当前盘口为浮点数
-        spread_float = float(spread_value)
-        # 计算相对盘口（相反数）
-        opposite_spread_float = -spread_float
-
-        # 规范化盘口字符串（统一格式，如-1.0→"-1"）
-        def format_spread(s):
-            return f"{int(s)}" if s.is_integer() else f"{s}"
-
-        spread_str = format_spread(spread_float)
-        opposite_spread_str = format_spread(opposite_spread_float)
-
-        # 0盘口特殊处理（相对盘口还是0）
-        if spread_float == 0:
-            opposite_spread_str = spread_str
-
-        # 检查相对盘口是否存在
-        if opposite_spread_str not in source2_spreads:
-            return -1  # 相对盘口不存在，无效
-
-        # 获取当前盘口和相对盘口的赔率
-        current_odds = source2_spreads[spread_str].get(side)
-        opposite_side = "away" if side == "home" else "home"
-        opposite_odds = source2_spreads[opposite_spread_str].get(opposite_side)
-
-        # 0盘口兼容（可能在同一盘口下取相反方向）
-        if spread_float == 0 and opposite_odds is None:
-            opposite_odds = source2_spreads[spread_str].get(opposite_side)
-
-        # 转换赔率为浮点数
-        current_odds = float(current_odds) if current_odds else None
-        opposite_odds = float(opposite_odds) if opposite_odds else None
-
-        if not current_odds or not opposite_odds:
-            return -1  # 赔率无效
-
-        # 核心计算逻辑
-        if current_odds * opposite_odds > 0:  # 同号
-            result = (current_odds + opposite_odds) * 100
-        else:  # 异号
-            abs_diff = abs(abs(current_odds) - abs(opposite_odds))
-            result = (2 - abs_diff) * 100
-
-        return round(result, 2)
-    except (ValueError, KeyError, TypeError):
-        return -1  # 计算失败
-
-
-# 新增：计算单个大小球盘口的189指数
-def calculate_single_total_189(source2_totals, total_value, side) -> float:
-    """
-    计算单个大小球盘口的189指数（仅针对source2）
-    :param source2_totals: source2的所有大小球盘数据（{盘口值: {"over": 赔率, "under": 赔率}}）
-    :param total_value: 当前盘口值（如"220.5"）
-    :param side: 投注方向（"over"或"under"）
-    :return: 该盘口的189指数（保留2位小数），-1表示计算失败
-    """
-    try:
-        # 转换盘口为浮点数并规范化字符串
-        total_float = float(total_value)
-        total_str = f"{int(total_float)}" if total_float.is_integer() else f"{total_float}"
-
-        # 检查当前盘口是否存在且包含对应方向赔率
-        if total_str not in source2_totals:
-            return -1
-        total_data = source2_totals[total_str]
-        if side not in total_data:
-            return -1
-
-        # 获取大球/小球赔率
-        current_odds = total_data[side]
-        opposite_side = "under" if side == "over" else "over"
-        opposite_odds = total_data.get(opposite_side)
-
-        # 转换赔率为浮点数
-        current_odds = float(current_odds) if current_odds else None
-        opposite_odds = float(opposite_odds) if opposite_odds else None
-
-        if not current_odds or not opposite_odds:
-            return -1
-
-        # 核心计算逻辑
-        if current_odds * opposite_odds > 0:  # 同号
-            result = (current_odds + opposite_odds) * 100
-        else:  # 异号
-            abs_diff = abs(abs(current_odds) - abs(opposite_odds))
-            result = (2 - abs_diff) * 100
-
-        return round(result, 2)
-    except (ValueError, KeyError, TypeError):
-        return -1  # 计算失败
+        release_db_connection(conn)
 
 
 # 修改：更新获取警告的API接口，从数据库加载点位警告
 @app.get("/api/cached-warnings", response_model=List[Union[WarningMessage, PointWarningMessage]])
-async def get_cached_warnings():
-    """获取缓存中的赔率下降警告和数据库中的点位警告"""
-    with WARNING_LOCK:
-        # 获取普通警告（保持原有逻辑）
-        normal_warnings = CURRENT_WARNINGS
+def get_cached_warnings():
+    """获取监控worker发布的赔率下降警告和数据库中的点位警告"""
+    # 获取普通警告（由odds_monitor_worker.py每个监控周期发布）
+    normal_warnings = load_warning_snapshot()
 
-        # 从数据库获取点位警告
-        point_warnings = load_point_warnings_from_db()
+    # 从数据库获取点位警告
+    point_warnings = load_point_warnings_from_db()
 
-        # 合并两种警告，按警告时间倒序排列
-        all_warnings = normal_warnings + point_warnings
-        all_warnings.sort(key=lambda x: x.warning_time, reverse=True)
+    # 合并两种警告，按警告时间倒序排列
+    all_warnings = normal_warnings + point_warnings
+    all_warnings.sort(key=lambda x: x.warning_time, reverse=True)
 
-        return all_warnings
+    return all_warnings
 
 
 # API路由 - 获取当前监控配置
 @app.get("/api/monitor/config", response_model=MonitorConfig)
-async def get_monitor_config():
+def get_monitor_config():
     """获取当前监控系统配置参数"""
-    return MONITOR_CONFIG
+    return load_monitor_config()
 
 
 # 更新API路由 - 更新监控配置
 @app.put("/api/monitor/config", response_model=MonitorConfig)
-async def update_monitor_config(config: MonitorConfig):
-    """更新监控系统配置参数"""
-    global MONITOR_CONFIG
+def update_monitor_config(config: MonitorConfig):
+    """更新监控系统配置参数（写入数据库，由监控worker读取生效）"""
+    load_monitor_config()
 
     # 只更新传入的参数，未传入的保持不变
     if config.check_interval is not None:
@@ -1283,9 +1238,8 @@ async def update_monitor_config(config: MonitorConfig):
     if config.point_monitor_sources is not None:
         MONITOR_CONFIG["point_monitor_sources"] = config.point_monitor_sources
 
-    if config.enabled or config.point_monitor_enabled:
-        # 如果重新启用，立即更新一次缓存
-        threading.Thread(target=update_warnings_cache, daemon=True).start()
+    if not save_monitor_config(MONITOR_CONFIG):
+        raise HTTPException(status_code=503, detail="监控配置保存失败")
 
     logger.info(f"监控配置已更新: {MONITOR_CONFIG}")
     return MONITOR_CONFIG
@@ -1293,13 +1247,14 @@ async def update_monitor_config(config: MonitorConfig):
 
 # API路由 - 启用/禁用监控
 @app.post("/api/monitor/{status}")
-async def toggle_monitor(status: bool):
+def toggle_monitor(status: bool):
     """启用或禁用赔率监控系统"""
+    load_monitor_config()
     MONITOR_CONFIG["enabled"] = status
+    if not save_monitor_config(MONITOR_CONFIG):
+        return {"status": "error", "message": "监控配置保存失败"}
     if status:
         logger.info("赔率监控系统已启用")
-        # 如果重新启用，立即更新一次缓存
-        threading.Thread(target=update_warnings_cache, daemon=True).start()
     else:
         logger.info("赔率监控系统已禁用")
     return {"status": "success", "enabled": status}
@@ -1307,13 +1262,14 @@ async def toggle_monitor(status: bool):
 
 # 新增：启用/禁用点位监控
 @app.post("/api/monitor/point/{status}")
-async def toggle_point_monitor(status: bool):
+def toggle_point_monitor(status: bool):
     """启用或禁用点位监控功能"""
+    load_monitor_config()
     MONITOR_CONFIG["point_monitor_enabled"] = status
+    if not save_monitor_config(MONITOR_CONFIG):
+        return {"status": "error", "message": "监控配置保存失败"}
     if status:
         logger.info("赔率点位监控系统已启用")
-        # 立即更新一次缓存
-        threading.Thread(target=update_warnings_cache, daemon=True).start()
     else:
         logger.info("赔率点位监控系统已禁用")
     return {
@@ -1327,16 +1283,259 @@ async def toggle_point_monitor(status: bool):
     }
 
 
+# 日期区间查询 - 单场比赛的赔率整理
+MATCH_FETCH_SIZE = 200  # 服务端游标每批读取的比赛数
+ODDS_FETCH_SIZE = 5000  # 服务端游标每批读取的赔率行数
+# 多日区间按天分片并行查询（JSON格式）
+DAILY_ODDS_SHARD_CONFIG = {
+    "min_days": 2,  # 区间天数达到该值时启用分片
+    "max_workers": 6  # 全局同时执行的分片查询数上限（每个分片占用一个分片专用连接）
+}
+DAILY_ODDS_SHARD_EXECUTOR = ThreadPoolExecutor(max_workers=DAILY_ODDS_SHARD_CONFIG["max_workers"],
+                                               thread_name_prefix="daily-odds-shard")
+# 同时进行的分片请求数上限（与分片线程数相同）：请求在取主连接前占用名额，
+# 避免大量多日请求各持有一个主连接排队等待分片线程，耗尽主连接池
+DAILY_ODDS_SHARD_SEMAPHORE = threading.BoundedSemaphore(DAILY_ODDS_SHARD_CONFIG["max_workers"])
+# 分片专用连接池，容量与分片线程数相同：请求线程持有主连接池的连接导出快照，
+# 分片若也从主连接池取连接，并发的多日请求会各占一个连接互相等待直到超时，并拖垮其他接口
+shard_pool = None
+SHARD_POOL_LOCK = threading.Lock()
+
+
+def get_shard_connection():
+    """从分片专用连接池获取连接（分片线程数不超过池容量，无需排队）"""
+    global shard_pool
+    if shard_pool is None:
+        with SHARD_POOL_LOCK:
+            if shard_pool is None:
+                shard_pool = pool.ThreadedConnectionPool(minconn=0, maxconn=DAILY_ODDS_SHARD_CONFIG["max_workers"],
+                                                         **DB_CONFIG)
+    return shard_pool.getconn()
+
+
+def release_shard_connection(conn):
+    """归还分片专用连接（已断开的连接直接丢弃）"""
+    try:
+        shard_pool.putconn(conn, close=bool(conn.closed))
+    except Exception as e:
+        logger.error(f"释放分片连接失败: {e}")
+
+
+def group_line_odds(records, value_field: str) -> List[Dict]:
+    """按（盘口值+方向）分组整理赔率记录，每个数据源的连续相同赔率去重并格式化时间"""
+    lines = defaultdict(lambda: {value_field: None, "side": None, "sources": {}})
+    for rec in records:
+        key = (rec[value_field], rec["side"])
+        lines[key][value_field] = rec[value_field]
+        lines[key]["side"] = rec["side"]
+        # 按数据源分组，记录赔率历史
+        source = rec["source"]
+        if source not in lines[key]["sources"]:
+            lines[key]["sources"][source] = []
+        lines[key]["sources"][source].append({
+            "odds": rec["odds_value"],
+            "time": rec["recorded_at"]
+        })
+
+    # 对每个数据源的赔率进行连续去重+时间格式化
+    for line in lines.values():
+        for source in line["sources"]:
+            line["sources"][source] = deduplicate_consecutive_odds(line["sources"][source])
+            for rec in line["sources"][source]:
+                rec["time"] = rec["time"].strftime("%Y-%m-%d %H:%M:%S")
+    return list(lines.values())
+
+
+def begin_read_snapshot(conn, snapshot_id: Optional[str] = None):
+    """
+    开启只读REPEATABLE READ事务：本请求的所有查询看到同一份数据，不受聚合程序中途写入影响
+    :param snapshot_id: 其他连接通过pg_export_snapshot()导出的快照，传入时与该连接共享同一份数据
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        if snapshot_id:
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+
+
+class MatchRowStream:
+    """按比赛顺序消费服务端游标的赔率行（游标必须与比赛游标按同一顺序排序）"""
+
+    def __init__(self, cursor):
+        self.rows = iter(cursor)
+        self.pending = next(self.rows, None)
+
+    def take(self, match_id: int) -> list:
+        """取出属于match_id的全部连续行"""
+        records = []
+        while self.pending is not None and self.pending["match_id"] == match_id:
+            records.append(self.pending)
+            self.pending = next(self.rows, None)
+        return records
+
+
+def iter_period_match_odds(conn, match_condition: str, params: tuple,
+                           source_filter: Optional[List[int]] = None,
+                           odds_since_kickoff_minutes: Optional[int] = None):
+    """
+    逐场输出时间范围内比赛的让分盘与大小球盘全部赔率（DailyMatchOdds结构）
+    比赛、让分盘、大小球盘各用一个服务端游标按(开赛时间, 比赛ID)同序扫描后归并，
+    内存中只保留当前批次与当前比赛的数据；调用方须先调用begin_read_snapshot
+    :param match_condition: 比赛筛选条件（matches别名为m），如"m.start_time_ts BETWEEN %s AND %s"
+    :param odds_since_kickoff_minutes: 仅返回开赛前该分钟数以内记录的赔率（None为全部历史）
+    """
+    with conn.cursor(name="period_matches", cursor_factory=DictCursor) as match_cursor, \
+            conn.cursor(name="period_spread_odds", cursor_factory=DictCursor) as spread_cursor, \
+            conn.cursor(name="period_total_odds", cursor_factory=DictCursor) as total_cursor:
+        match_cursor.itersize = MATCH_FETCH_SIZE
+        match_cursor.execute(f"""
+        SELECT m.id, m.match_name, m.league_name, m.home_team, m.away_team, m.start_time_beijing,
+               m.full_time, m.half_time
+        FROM matches m
+        WHERE {match_condition}
+        ORDER BY m.start_time_ts ASC, m.id ASC
+        """, params)
+
+        streams = {}
+        for odds_type, odds_cursor in (("spread", spread_cursor), ("total", total_cursor)):
+            odds_table = ODDS_TABLES[odds_type]
+            query = f"""
+            SELECT o.match_id, o.{odds_table["field"]}, o.side, o.source, o.odds_value, o.recorded_at
+            FROM {odds_table["table"]} o
+            JOIN matches m ON m.id = o.match_id
+            WHERE {match_condition}
+            """
+            query_params = list(params)
+            # 应用数据源筛选
+            if source_filter:
+                query += " AND o.source = ANY(%s)"
+                query_params.append(source_filter)
+            # 应用赔率时间窗口筛选（开赛前N分钟起）
+            if odds_since_kickoff_minutes is not None:
+                query += " AND o.recorded_at >= m.start_time_ts - %s * INTERVAL '1 minute'"
+                query_params.append(odds_since_kickoff_minutes)
+            query += f"""
+            ORDER BY m.start_time_ts ASC, m.id ASC, o.{odds_table["field"]}, o.side, o.source, o.recorded_at ASC
+            """
+            odds_cursor.itersize = ODDS_FETCH_SIZE
+            odds_cursor.execute(query, query_params)
+            streams[odds_type] = MatchRowStream(odds_cursor)
+
+        for match in match_cursor:
+            match_id = match["id"]
+            yield {
+                "match_id": match_id,
+                "match_name": match["match_name"],
+                "league_name": match["league_name"],
+                "home_team": match["home_team"],
+                "away_team": match["away_team"],
+                "start_time_beijing": match["start_time_beijing"],
+                "full_time": match["full_time"],
+                "half_time": match["half_time"],
+                "spread_odds": group_line_odds(streams["spread"].take(match_id), "spread_value"),
+                "total_odds": group_line_odds(streams["total"].take(match_id), "total_value")
+            }
+
+
+def fetch_daily_odds_shard(snapshot_id: str, shard_start: datetime, shard_end: datetime,
+                           source_filter: Optional[List[int]] = None) -> List[Dict]:
+    """在共享快照中查询单个分片[shard_start, shard_end)内的比赛赔率（使用分片专用连接池）"""
+    try:
+        conn = get_shard_connection()
+    except Exception as e:
+        raise RuntimeError(f"数据库连接失败：{e}")
+
+    try:
+        begin_read_snapshot(conn, snapshot_id)
+        return list(iter_period_match_odds(conn, "m.start_time_ts >= %s AND m.start_time_ts < %s",
+                                           (shard_start, shard_end), source_filter))
+    finally:
+        release_shard_connection(conn)
+
+
+def fetch_daily_odds_sharded(conn, start_of_period: datetime, end_of_period: datetime,
+                             source_filter: Optional[List[int]] = None) -> List[Dict]:
+    """
+    多日区间按天拆分为分片并行查询，按开赛时间顺序合并
+    conn负责导出快照并在分片查询期间保持事务，所有分片看到同一份数据；
+    分片连接来自分片专用连接池，不占用主连接池
+    """
+    begin_read_snapshot(conn)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_export_snapshot()")
+        snapshot_id = cursor.fetchone()[0]
+
+    shards = []
+    shard_start = start_of_period
+    while shard_start <= end_of_period:
+        shard_end = shard_start + timedelta(days=1)
+        shards.append((shard_start, shard_end))
+        shard_start = shard_end
+
+    # 分片按时间先后排列且互不重叠，按提交顺序拼接即为整体开赛时间顺序
+    futures = [
+        DAILY_ODDS_SHARD_EXECUTOR.submit(fetch_daily_odds_shard, snapshot_id, shard_start, shard_end, source_filter)
+        for shard_start, shard_end in shards
+    ]
+    result_data = []
+    try:
+        for future in futures:
+            result_data.extend(future.result())
+    except Exception:
+        # 任一分片失败时取消尚未开始的分片，避免在快照失效后继续占用连接
+        for future in futures:
+            future.cancel()
+        raise
+    return result_data
+
+
+def iter_daily_odds_ndjson(start_date: str, end_date: str, start_of_period: datetime, end_of_period: datetime,
+                           source_filter: Optional[List[int]] = None):
+    """
+    逐场比赛输出NDJSON：在只读快照中用服务端游标分批读取，每整理完一场立即输出一行，
+    最后输出一行汇总（含status与count），调用方据此判断数据是否完整
+    """
+    def trailer(status: str, count: int, message: Optional[str] = None) -> str:
+        return json.dumps({
+            "status": status,
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": count,
+            "message": message
+        }, ensure_ascii=False) + "\n"
+
+    conn = get_db_connection()
+    if not conn:
+        yield trailer("error", 0, "数据库连接失败")
+        return
+
+    count = 0
+    try:
+        begin_read_snapshot(conn)
+        for match_odds in iter_period_match_odds(conn, "m.start_time_ts BETWEEN %s AND %s",
+                                                 (start_of_period, end_of_period), source_filter):
+            count += 1
+            yield json.dumps(match_odds, ensure_ascii=False, default=json_default) + "\n"
+
+        yield trailer("success", count, None if count else "该日期范围内无比赛记录")
+    except Exception as e:
+        logger.error(f"流式查询日期区间盘口赔率失败：{e}")
+        yield trailer("error", count, f"查询失败：{str(e)}")
+    finally:
+        release_db_connection(conn)
+
+
 # 修改API接口实现
 @app.get("/api/daily-odds", response_model=DailyOddsResponse)
-async def get_daily_odds(
+def get_daily_odds(
         # 将单个日期参数改为日期区间参数，start_date为必填，end_date可选
         start_date: str = Query(..., description="查询开始日期，格式：YYYY-MM-DD"),
         end_date: Optional[str] = Query(None, description="查询结束日期，格式：YYYY-MM-DD，默认与开始日期相同"),
-        source_filter: Optional[List[int]] = Query(None, description="可选：筛选数据源，如[1,2,3]")
+        source_filter: Optional[List[int]] = Query(None, description="可选：筛选数据源，如[1,2,3]"),
+        format: str = Query("json", enum=["json", "ndjson"],
+                            description="返回格式：json为完整响应；ndjson为每行一场比赛的流式输出，末行为汇总")
 ):
     """查询指定日期范围内所有比赛的所有盘口（让分+大小球）历史赔率记录"""
-    logger.info(f"收到日期区间赔率查询请求：开始日期={start_date}，结束日期={end_date}，数据源筛选={source_filter}")
+    logger.info(f"收到日期区间赔率查询请求：开始日期={start_date}，结束日期={end_date}，数据源筛选={source_filter}，格式={format}")
 
     # 处理结束日期，默认为开始日期
     if not end_date:
@@ -1348,6 +1547,114 @@ async def get_daily_odds(
         end_query_date = datetime.strptime(end_date, "%Y-%m-%d")
 
         # 确保开始日期不晚于结束日期
+        if start_query_date > end_query_date:
+            return daily_odds_response({
+                "status": "error",
+                "start_date": start_date,
+                "end_date": end_date,
+                "count": 0,
+                "message": "开始日期不能晚于结束日期"
+            })
+    except ValueError:
+        return daily_odds_response({
+            "status": "error",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": 0,
+            "message": "日期格式错误，请使用YYYY-MM-DD"
+        })
+
+    # 计算查询日期范围的时间区间（开始日期00:00:00至结束日期23:59:59）
+    start_of_period = start_query_date.replace(hour=0, minute=0, second=0)
+    end_of_period = end_query_date.replace(hour=23, minute=59, second=59)
+
+    # 流式输出：内存占用与首字节时间不再随区间内比赛数增长
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_daily_odds_ndjson(start_date, end_date, start_of_period, end_of_period, source_filter),
+            media_type="application/x-ndjson"
+        )
+
+    sharded = (end_query_date - start_query_date).days + 1 >= DAILY_ODDS_SHARD_CONFIG["min_days"]
+    if sharded and not DAILY_ODDS_SHARD_SEMAPHORE.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT):
+        logger.error(f"等待分片查询名额超时（{DB_POOL_ACQUIRE_TIMEOUT}秒）")
+        return daily_odds_response({
+            "status": "error",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": 0,
+            "message": "查询繁忙，请稍后重试"
+        })
+
+    conn = get_db_connection()
+    if not conn:
+        if sharded:
+            DAILY_ODDS_SHARD_SEMAPHORE.release()
+        return daily_odds_response({
+            "status": "error",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": 0,
+            "message": "数据库连接失败"
+        })
+
+    try:
+        if sharded:
+            # 多日区间：按天分片并行查询（共享同一快照）
+            result_data = fetch_daily_odds_sharded(conn, start_of_period, end_of_period, source_filter)
+        else:
+            # 在同一只读快照中扫描比赛与全部盘口赔率（含full_time和half_time字段）
+            begin_read_snapshot(conn)
+            result_data = list(iter_period_match_odds(conn, "m.start_time_ts BETWEEN %s AND %s",
+                                                      (start_of_period, end_of_period), source_filter))
+        if not result_data:
+            return daily_odds_response({
+                "status": "success",
+                "start_date": start_date,
+                "end_date": end_date,
+                "count": 0,
+                "data": [],
+                "message": "该日期范围内无比赛记录"
+            })
+
+        return daily_odds_response({
+            "status": "success",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": len(result_data),
+            "data": result_data
+        })
+
+    except Exception as e:
+        logger.error(f"查询日期区间盘口赔率失败：{e}")
+        return daily_odds_response({
+            "status": "error",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": 0,
+            "message": f"查询失败：{str(e)}"
+        })
+    finally:
+        release_db_connection(conn)
+        if sharded:
+            DAILY_ODDS_SHARD_SEMAPHORE.release()
+
+
+@app.get("/api/match-summary", response_model=MatchSummaryResponse)
+def get_match_summary(
+        start_date: str = Query(..., description="查询开始日期，格式：YYYY-MM-DD"),
+        end_date: Optional[str] = Query(None, description="查询结束日期，格式：YYYY-MM-DD，默认与开始日期相同"),
+        source_filter: Optional[List[int]] = Query(None, description="可选：筛选数据源，如[1,2,3]")
+):
+    """查询日期范围内每场比赛各盘口的首/末/最低/最高赔率与变化次数（只读汇总表，不扫描赔率明细）"""
+    logger.info(f"收到盘口汇总查询请求：开始日期={start_date}，结束日期={end_date}，数据源筛选={source_filter}")
+
+    if not end_date:
+        end_date = start_date
+
+    try:
+        start_query_date = datetime.strptime(start_date, "%Y-%m-%d")
+        end_query_date = datetime.strptime(end_date, "%Y-%m-%d")
         if start_query_date > end_query_date:
             return {
                 "status": "error",
@@ -1365,7 +1672,6 @@ async def get_daily_odds(
             "message": "日期格式错误，请使用YYYY-MM-DD"
         }
 
-    # 计算查询日期范围的时间区间（开始日期00:00:00至结束日期23:59:59）
     start_of_period = start_query_date.replace(hour=0, minute=0, second=0)
     end_of_period = end_query_date.replace(hour=23, minute=59, second=59)
 
@@ -1381,132 +1687,59 @@ async def get_daily_odds(
 
     try:
         with conn.cursor(cursor_factory=DictCursor) as cursor:
-            # 1. 查询该日期范围内的所有比赛，新增full_time和half_time字段
-            cursor.execute("""
-            SELECT id, match_name, league_name, home_team, away_team, start_time_beijing,
-                   full_time, half_time  -- 新增字段
-            FROM matches
-            WHERE start_time_beijing::timestamp BETWEEN %s AND %s
-            ORDER BY start_time_beijing ASC
-            """, (start_of_period, end_of_period))
-            period_matches = cursor.fetchall()
-            if not period_matches:
-                return {
-                    "status": "success",
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "count": 0,
-                    "data": [],
-                    "message": "该日期范围内无比赛记录"
-                }
-
-            result_data = []
-            # 2. 遍历每场比赛，查询其所有盘口的赔率记录（原有逻辑保持不变）
-            for match in period_matches:
-                match_id = match["id"]
-                # 2.1 查询让分盘数据（原有逻辑保持不变）
-                spread_query = f"""
-                SELECT spread_value, side, source, odds_value, recorded_at
-                FROM spread_odds
-                WHERE match_id = %s
-                """
-                spread_params = [match_id]
-                # 应用数据源筛选
-                if source_filter:
-                    spread_query += " AND source = ANY(%s)"
-                    spread_params.append(source_filter)
-                spread_query += " ORDER BY spread_value, side, source, recorded_at ASC"
-
-                cursor.execute(spread_query, spread_params)
-                spread_records = cursor.fetchall()
-
-                # 按（盘口值+方向）分组整理让分盘数据
-                spread_odds = defaultdict(lambda: {"spread_value": None, "side": None, "sources": {}})
-                for rec in spread_records:
-                    key = (rec["spread_value"], rec["side"])
-                    spread_odds[key]["spread_value"] = rec["spread_value"]
-                    spread_odds[key]["side"] = rec["side"]
-                    # 按数据源分组，记录赔率历史（去重连续相同赔率）
-                    source = rec["source"]
-                    if source not in spread_odds[key]["sources"]:
-                        spread_odds[key]["sources"][source] = []
-                    spread_odds[key]["sources"][source].append({
-                        "odds": rec["odds_value"],
-                        "time": rec["recorded_at"]
-                    })
-                # 对每个数据源的赔率进行连续去重
-                for key in spread_odds:
-                    for source in spread_odds[key]["sources"]:
-                        spread_odds[key]["sources"][source] = deduplicate_consecutive_odds(
-                            spread_odds[key]["sources"][source]
-                        )
-                        # 转换时间格式
-                        for rec in spread_odds[key]["sources"][source]:
-                            rec["time"] = rec["time"].strftime("%Y-%m-%d %H:%M:%S")
-                # 转换为列表格式
-                formatted_spread = list(spread_odds.values())
-
-                # 2.2 查询大小球盘数据（原有逻辑保持不变）
-                total_query = f"""
-                SELECT total_value, side, source, odds_value, recorded_at
-                FROM total_odds
-                WHERE match_id = %s
-                """
-                total_params = [match_id]
-                if source_filter:
-                    total_query += " AND source = ANY(%s)"
-                    total_params.append(source_filter)
-                total_query += " ORDER BY total_value, side, source, recorded_at ASC"
-
-                cursor.execute(total_query, total_params)
-                total_records = cursor.fetchall()
-
-                total_odds = defaultdict(lambda: {"total_value": None, "side": None, "sources": {}})
-                for rec in total_records:
-                    key = (rec["total_value"], rec["side"])
-                    total_odds[key]["total_value"] = rec["total_value"]
-                    total_odds[key]["side"] = rec["side"]
-                    source = rec["source"]
-                    if source not in total_odds[key]["sources"]:
-                        total_odds[key]["sources"][source] = []
-                    total_odds[key]["sources"][source].append({
-                        "odds": rec["odds_value"],
-                        "time": rec["recorded_at"]
-                    })
-                # 连续去重+时间格式化
-                for key in total_odds:
-                    for source in total_odds[key]["sources"]:
-                        total_odds[key]["sources"][source] = deduplicate_consecutive_odds(
-                            total_odds[key]["sources"][source]
-                        )
-                        for rec in total_odds[key]["sources"][source]:
-                            rec["time"] = rec["time"].strftime("%Y-%m-%d %H:%M:%S")
-                formatted_total = list(total_odds.values())
-
-                # 3. 整理单场比赛数据，包含新增的full_time和half_time字段
-                result_data.append({
-                    "match_id": match_id,
-                    "match_name": match["match_name"],
-                    "league_name": match["league_name"],
-                    "home_team": match["home_team"],
-                    "away_team": match["away_team"],
-                    "start_time_beijing": match["start_time_beijing"],
-                    "full_time": match.get("full_time"),  # 新增字段
-                    "half_time": match.get("half_time"),  # 新增字段
-                    "spread_odds": formatted_spread,
-                    "total_odds": formatted_total
+            query = """
+            SELECT m.id, m.match_name, m.league_name, m.home_team, m.away_team, m.start_time_beijing,
+                   s.type, s.line_value, s.side, s.source, s.first_odds, s.first_time,
+                   s.last_odds, s.last_time, s.min_odds, s.max_odds, s.move_count
+            FROM matches m
+            JOIN match_line_summary s ON s.match_id = m.id
+            WHERE m.start_time_ts BETWEEN %s AND %s
+            """
+            params = [start_of_period, end_of_period]
+            if source_filter:
+                query += " AND s.source = ANY(%s)"
+                params.append(source_filter)
+            query += " ORDER BY m.start_time_ts ASC, m.id, s.type, s.line_value, s.side, s.source"
+            cursor.execute(query, params)
+
+            matches = {}
+            for row in cursor.fetchall():
+                match = matches.get(row["id"])
+                if match is None:
+                    match = matches[row["id"]] = {
+                        "match_id": row["id"],
+                        "match_name": row["match_name"],
+                        "league_name": row["league_name"],
+                        "home_team": row["home_team"],
+                        "away_team": row["away_team"],
+                        "start_time_beijing": row["start_time_beijing"],
+                        "lines": []
+                    }
+                match["lines"].append({
+                    "type": row["type"],
+                    "value": row["line_value"],
+                    "side": row["side"],
+                    "source": row["source"],
+                    "first_odds": row["first_odds"],
+                    "first_time": row["first_time"].strftime("%Y-%m-%d %H:%M:%S"),
+                    "last_odds": row["last_odds"],
+                    "last_time": row["last_time"].strftime("%Y-%m-%d %H:%M:%S"),
+                    "min_odds": row["min_odds"],
+                    "max_odds": row["max_odds"],
+                    "move_count": row["move_count"]
                 })
 
-            return {
-                "status": "success",
-                "start_date": start_date,
-                "end_date": end_date,
-                "count": len(period_matches),
-                "data": result_data
-            }
+        return {
+            "status": "success",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": len(matches),
+            "data": list(matches.values()),
+            "message": None if matches else "该日期范围内无比赛记录"
+        }
 
     except Exception as e:
-        logger.error(f"查询日期区间盘口赔率失败：{e}")
+        logger.error(f"查询盘口汇总失败：{e}")
         return {
             "status": "error",
             "start_date": start_date,
@@ -1515,22 +1748,190 @@ async def get_daily_odds(
             "message": f"查询失败：{str(e)}"
         }
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
+
+
+# 列式导出 - 每行一次赔率变化（供回测程序使用）
+EXPORT_FETCH_SIZE = 5000  # 导出时服务端游标每批读取的行数
+EXPORT_EPOCH = datetime(1970, 1, 1)  # 时间戳基准（北京时间按无时区墙上时间编码）
+EXPORT_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """将无时区的北京时间转换为int64毫秒时间戳（与系统时区无关）"""
+    return int((value - EXPORT_EPOCH).total_seconds() * 1000)
+
+
+def collect_odds_changes(conn, start_of_period: datetime, end_of_period: datetime,
+                         source_filter: Optional[List[int]] = None) -> Dict[str, list]:
+    """
+    以服务端游标顺序扫描区间内全部赔率记录，按(比赛, 盘口值, 方向, 数据源)做连续相同赔率去重
+    （与/api/daily-odds的deduplicate_consecutive_odds一致：保留一串相同赔率中最新的一条），按列收集
+    """
+    columns = {name: [] for name in (
+        "match_id", "match_name", "league_name", "home_team", "away_team", "start_time",
+        "full_time", "half_time", "market", "line", "side", "source", "odds", "recorded_at")}
+    start_times = {}  # match_id -> 开赛时间毫秒（每场比赛只换算一次）
+
+    def append_row(market: str, row):
+        match_id = row["match_id"]
+        if match_id not in start_times:
+            start_times[match_id] = to_epoch_ms(row["start_time_ts"])
+        columns["match_id"].append(match_id)
+        columns["match_name"].append(row["match_name"])
+        columns["league_name"].append(row["league_name"])
+        columns["home_team"].append(row["home_team"])
+        columns["away_team"].append(row["away_team"])
+        columns["start_time"].append(start_times[match_id])
+        columns["full_time"].append(row["full_time"])
+        columns["half_time"].append(row["half_time"])
+        columns["market"].append(market)
+        columns["line"].append(row["value"])
+        columns["side"].append(row["side"])
+        columns["source"].append(row["source"])
+        columns["odds"].append(float(row["odds_value"]) if row["odds_value"] is not None else None)
+        columns["recorded_at"].append(to_epoch_ms(row["recorded_at"]))
+
+    for market, check_type in ODDS_TABLES.items():
+        query = f"""
+        SELECT o.match_id, m.match_name, m.league_name, m.home_team, m.away_team, m.start_time_ts,
+               m.full_time, m.half_time, o.{check_type["field"]} AS value, o.side, o.source,
+               o.odds_value, o.recorded_at
+        FROM {check_type["table"]} o
+        JOIN matches m ON m.id = o.match_id
+        WHERE m.start_time_ts BETWEEN %s AND %s
+        """
+        params = [start_of_period, end_of_period]
+        if source_filter:
+            query += " AND o.source = ANY(%s)"
+            params.append(source_filter)
+        query += f" ORDER BY o.match_id, o.{check_type['field']}, o.side, o.source, o.recorded_at ASC"
+
+        with conn.cursor(name=f"export_{market}_odds", cursor_factory=DictCursor) as cursor:
+            cursor.itersize = EXPORT_FETCH_SIZE
+            cursor.execute(query, params)
+
+            pending = None  # 当前连续相同赔率串中最新的一条，遇到变化时才写出
+            for row in cursor:
+                if pending is not None and (
+                        (pending["match_id"], pending["value"], pending["side"], pending["source"])
+                        == (row["match_id"], row["value"], row["side"], row["source"])
+                        and pending["odds_value"] == row["odds_value"]):
+                    pending = row
+                    continue
+                if pending is not None:
+                    append_row(market, pending)
+                pending = row
+            if pending is not None:
+                append_row(market, pending)
+
+    return columns
+
+
+def build_odds_changes_table(columns: Dict[str, list]):
+    """将列数据转换为Arrow表：字符串列字典编码，时间列为int64毫秒"""
+    dictionary_columns = ["match_name", "league_name", "home_team", "away_team",
+                          "full_time", "half_time", "market", "line", "side"]
+    arrays = {
+        "match_id": pa.array(columns["match_id"], pa.int32()),
+        "start_time": pa.array(columns["start_time"], pa.int64()),
+        "source": pa.array(columns["source"], pa.int8()),
+        "odds": pa.array(columns["odds"], pa.float64()),
+        "recorded_at": pa.array(columns["recorded_at"], pa.int64())
+    }
+    for name in dictionary_columns:
+        arrays[name] = pa.array(columns[name], pa.string()).dictionary_encode()
+
+    ordered_names = ["match_id", "match_name", "league_name", "home_team", "away_team", "start_time",
+                     "full_time", "half_time", "market", "line", "side", "source", "odds", "recorded_at"]
+    return pa.table([arrays[name] for name in ordered_names], names=ordered_names)
+
+
+@app.get("/api/daily-odds/export")
+def export_daily_odds(
+        start_date: str = Query(..., description="查询开始日期，格式：YYYY-MM-DD"),
+        end_date: Optional[str] = Query(None, description="查询结束日期，格式：YYYY-MM-DD，默认与开始日期相同"),
+        source_filter: Optional[List[int]] = Query(None, description="可选：筛选数据源，如[1,2,3]"),
+        format: str = Query("arrow", enum=["arrow", "parquet"], description="导出格式：Arrow IPC流或Parquet")
+):
+    """
+    列式导出日期区间内的全部赔率变化（每行一次变化）
+    比赛/盘口/方向等字符串列字典编码，开赛时间与记录时间为int64毫秒时间戳
+    """
+    logger.info(f"收到列式导出请求：开始日期={start_date}，结束日期={end_date}，数据源筛选={source_filter}，格式={format}")
+
+    if pa is None:
+        raise HTTPException(status_code=501, detail="服务端未安装pyarrow，无法使用列式导出")
+
+    if not end_date:
+        end_date = start_date
+    try:
+        start_query_date = datetime.strptime(start_date, "%Y-%m-%d")
+        end_query_date = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式错误，请使用YYYY-MM-DD")
+    if start_query_date > end_query_date:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+
+    start_of_period = start_query_date.replace(hour=0, minute=0, second=0)
+    end_of_period = end_query_date.replace(hour=23, minute=59, second=59)
+
+    conn = get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="数据库连接失败")
+
+    try:
+        columns = collect_odds_changes(conn, start_of_period, end_of_period, source_filter)
+    except Exception as e:
+        logger.error(f"列式导出查询失败：{e}")
+        raise HTTPException(status_code=500, detail=f"查询失败：{str(e)}")
+    finally:
+        release_db_connection(conn)
+
+    table = build_odds_changes_table(columns)
+    sink = pa.BufferOutputStream()
+    if format == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    logger.info(f"列式导出完成：{table.num_rows}行，{sink.tell()}字节")
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="odds_{start_date}_{end_date}.{format}"'}
+    )
 
 
 @app.get("/api/upcoming-odds-full", response_model=DailyOddsResponse)
-async def get_upcoming_odds_full():
+def get_upcoming_odds_full(
+        kickoff_within_minutes: Optional[int] = Query(None, ge=1,
+                                                      description="可选：仅返回该分钟数内开赛的比赛，默认未来1天"),
+        odds_since_kickoff_minutes: Optional[int] = Query(None, ge=0,
+                                                          description="可选：仅返回开赛前该分钟数以内的赔率，默认完整历史")
+):
     """
-    获取所有未开赛比赛的完整赔率数据（无参数）
-    返回所有未来开赛的比赛及其所有盘口和完整历史赔率，格式与get_daily_odds一致
-    优化了查询性能以支持高频率调用
+    获取未开赛比赛的完整赔率数据
+    返回未来开赛的比赛及其所有盘口和历史赔率，格式与get_daily_odds一致
+    优化了查询性能以支持高频率调用；临场计算可用两个可选参数把比赛和赔率范围收窄到开赛窗口
     """
+    cache_key = ("upcoming-odds-full", kickoff_within_minutes, odds_since_kickoff_minutes)
+    cached = RESPONSE_CACHE.get(cache_key)
+    if cached is not None:
+        return json_response(cached)
+    cache_version = RESPONSE_CACHE.version
+
     try:
         # 获取当前时间，用于判断未开赛比赛
         now = datetime.now()
         # 设定合理的未来时间范围（可根据业务调整）
         future_limit = now + timedelta(days=1)  # 只查询未来7天内的比赛
+        if kickoff_within_minutes is not None:
+            future_limit = now + timedelta(minutes=kickoff_within_minutes)
 
         # 保留：查询开始提示（含时间范围）
         print(
@@ -1539,149 +1940,57 @@ async def get_upcoming_odds_full():
         conn = get_db_connection()
         if not conn:
             print(f"[{datetime.now()}] 数据库连接失败")
-            return {
+            return daily_odds_response({
                 "status": "error",
                 "start_date": now.strftime("%Y-%m-%d"),
                 "end_date": future_limit.strftime("%Y-%m-%d"),
                 "count": 0,
                 "message": "数据库连接失败"
-            }
-
-        with conn.cursor(cursor_factory=DictCursor) as cursor:
-            # 1. 查询所有未开赛的比赛（当前时间之后开赛）
-            cursor.execute("""
-            SELECT id, match_name, league_name, home_team, away_team, start_time_beijing
-            FROM matches
-            WHERE start_time_beijing::timestamp > %s
-              AND start_time_beijing::timestamp <= %s
-            ORDER BY start_time_beijing ASC
-            """, (now, future_limit))
-
-            upcoming_matches = cursor.fetchall()
-            # 保留：总比赛数量
-            print(f"[{datetime.now()}] 共查询到 {len(upcoming_matches)} 场未开赛比赛")
-
-            if not upcoming_matches:
-                print(f"[{datetime.now()}] 未查询到任何未开赛比赛")
-                return {
-                    "status": "success",
-                    "start_date": now.strftime("%Y-%m-%d"),
-                    "end_date": future_limit.strftime("%Y-%m-%d"),
-                    "count": 0,
-                    "data": [],
-                    "message": "当前无未开赛比赛"
-                }
-
-            result_data = []
-            spread_total = 0  # 统计总让分盘数量
-            total_total = 0  # 统计总大小球盘数量
-
-            # 2. 为每一场比赛获取完整的赔率数据
-            for match in upcoming_matches:
-                match_id = match["id"]
-                match_name = match["match_name"]
-
-                # 移除：单场比赛处理进度打印
-
-                # 2.1 查询让分盘所有数据
-                cursor.execute("""
-                SELECT spread_value, side, source, odds_value, recorded_at
-                FROM spread_odds
-                WHERE match_id = %s
-                ORDER BY spread_value, side, source, recorded_at ASC
-                """, (match_id,))
-
-                spread_records = cursor.fetchall()
-                spread_odds = defaultdict(lambda: {"spread_value": None, "side": None, "sources": {}})
-
-                for rec in spread_records:
-                    key = (rec["spread_value"], rec["side"])
-                    spread_odds[key]["spread_value"] = rec["spread_value"]
-                    spread_odds[key]["side"] = rec["side"]
-                    source = rec["source"]
-
-                    if source not in spread_odds[key]["sources"]:
-                        spread_odds[key]["sources"][source] = []
-                    spread_odds[key]["sources"][source].append({
-                        "odds": rec["odds_value"],
-                        "time": rec["recorded_at"]
-                    })
-
-                # 处理让分盘数据
-                for key in spread_odds:
-                    for source in spread_odds[key]["sources"]:
-                        spread_odds[key]["sources"][source] = deduplicate_consecutive_odds(
-                            spread_odds[key]["sources"][source]
-                        )
-                        for rec in spread_odds[key]["sources"][source]:
-                            rec["time"] = rec["time"].strftime("%Y-%m-%d %H:%M:%S")
-
-                spread_count = len(spread_odds)
-                spread_total += spread_count
-
-                # 2.2 查询大小球盘所有数据
-                cursor.execute("""
-                SELECT total_value, side, source, odds_value, recorded_at
-                FROM total_odds
-                WHERE match_id = %s
-                ORDER BY total_value, side, source, recorded_at ASC
-                """, (match_id,))
-
-                total_records = cursor.fetchall()
-                total_odds = defaultdict(lambda: {"total_value": None, "side": None, "sources": {}})
-
-                for rec in total_records:
-                    key = (rec["total_value"], rec["side"])
-                    total_odds[key]["total_value"] = rec["total_value"]
-                    total_odds[key]["side"] = rec["side"]
-                    source = rec["source"]
-
-                    if source not in total_odds[key]["sources"]:
-                        total_odds[key]["sources"][source] = []
-                    total_odds[key]["sources"][source].append({
-                        "odds": rec["odds_value"],
-                        "time": rec["recorded_at"]
-                    })
-
-                # 处理大小球盘数据
-                for key in total_odds:
-                    for source in total_odds[key]["sources"]:
-                        total_odds[key]["sources"][source] = deduplicate_consecutive_odds(
-                            total_odds[key]["sources"][source]
-                        )
-                        for rec in total_odds[key]["sources"][source]:
-                            rec["time"] = rec["time"].strftime("%Y-%m-%d %H:%M:%S")
-
-                total_count = len(total_odds)
-                total_total += total_count
-
-                # 移除：单场比赛处理完成的详细打印
-
-                # 3. 整理结果数据
-                result_data.append({
-                    "match_id": match_id,
-                    "match_name": match_name,
-                    "league_name": match["league_name"],
-                    "home_team": match["home_team"],
-                    "away_team": match["away_team"],
-                    "start_time_beijing": match["start_time_beijing"],
-                    "full_time": None,
-                    "half_time": None,
-                    "spread_odds": list(spread_odds.values()),
-                    "total_odds": list(total_odds.values())
-                })
-
-            # 保留：总体统计信息（关键指标）
-            print(
-                f"[{datetime.now()}] 数据处理完成：{len(upcoming_matches)}场比赛，总让分盘{spread_total}个，总大小球盘{total_total}个")
-
-            return {
+            })
+
+        # 在同一只读快照中扫描所有未开赛的比赛（当前时间之后开赛）及其完整赔率
+        begin_read_snapshot(conn)
+        result_data = []
+        spread_total = 0  # 统计总让分盘数量
+        total_total = 0  # 统计总大小球盘数量
+        for match_odds in iter_period_match_odds(conn, "m.start_time_ts > %s AND m.start_time_ts <= %s",
+                                                 (now, future_limit),
+                                                 odds_since_kickoff_minutes=odds_since_kickoff_minutes):
+            # 未开赛比赛不返回比赛结果
+            match_odds["full_time"] = None
+            match_odds["half_time"] = None
+            spread_total += len(match_odds["spread_odds"])
+            total_total += len(match_odds["total_odds"])
+            result_data.append(match_odds)
+
+        # 保留：总比赛数量
+        print(f"[{datetime.now()}] 共查询到 {len(result_data)} 场未开赛比赛")
+
+        if not result_data:
+            print(f"[{datetime.now()}] 未查询到任何未开赛比赛")
+            return daily_odds_response({
                 "status": "success",
                 "start_date": now.strftime("%Y-%m-%d"),
                 "end_date": future_limit.strftime("%Y-%m-%d"),
-                "count": len(upcoming_matches),
-                "data": result_data
-            }
+                "count": 0,
+                "data": [],
+                "message": "当前无未开赛比赛"
+            })
+
+        # 保留：总体统计信息（关键指标）
+        print(
+            f"[{datetime.now()}] 数据处理完成：{len(result_data)}场比赛，总让分盘{spread_total}个，总大小球盘{total_total}个")
+
+        body = encode_model_payload(DAILY_ODDS_RESPONSE_FIELDS, {
+            "status": "success",
+            "start_date": now.strftime("%Y-%m-%d"),
+            "end_date": future_limit.strftime("%Y-%m-%d"),
+            "count": len(result_data),
+            "data": result_data
+        })
+        # 结果覆盖全部未开赛比赛，任意新赔率行都会使其失效；另设短TTL跟随时间窗口滑动
+        RESPONSE_CACHE.put(cache_key, body, cache_version, ttl=RESPONSE_CACHE_CONFIG["upcoming_ttl"])
+        return json_response(body)
 
     except Exception as e:
         error_msg = f"查询未开赛比赛完整赔率失败：{e}"
@@ -1689,37 +1998,40 @@ async def get_upcoming_odds_full():
         logger.error(error_msg)
         current_date = now.strftime("%Y-%m-%d") if 'now' in locals() else ""
         end_date = future_limit.strftime("%Y-%m-%d") if 'future_limit' in locals() else ""
-        return {
+        return daily_odds_response({
             "status": "error",
             "start_date": current_date,
             "end_date": end_date,
             "count": 0,
             "message": f"查询失败：{str(e)}"
-        }
+        })
     finally:
         if 'conn' in locals() and conn:
-            conn.close()
-            # 保留：连接关闭提示
-            print(f"[{datetime.now()}] 数据库连接已关闭")
+            release_db_connection(conn)
+            # 保留：连接归还提示
+            print(f"[{datetime.now()}] 数据库连接已归还连接池")
 
 
-# 启动监控线程
-def start_monitor_thread():
-    """启动赔率监控线程"""
-    monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
-    monitor_thread.start()
-    logger.info("赔率监控线程已启动")
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """读接口响应缓存的命中/未命中统计"""
+    return RESPONSE_CACHE.stats()
 
 
 # 启动应用
 if __name__ == "__main__":
+    # 初始化数据库连接池
+    init_db_pool()
+
     # 初始化点位警告表（首次运行时创建表）
     init_point_warnings_table()
 
     # 额外检查并修复约束（确保万无一失）
     repair_point_warnings_constraint()
-    # 启动监控线程
-    #start_monitor_thread()
+    # 初始化监控配置与警告快照表（监控本身由odds_monitor_worker.py独立进程运行）
+    init_monitor_tables()
+    # 启动响应缓存失效监听线程
+    start_cache_watch_thread()
 
     # 启动API服务
     uvicorn.run(app, host="0.0.0.0", port=8766)
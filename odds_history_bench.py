@@ -0,0 +1,662 @@
+import argparse
+import json
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import requests
+
+# 压测配置
+BASE_URL = "http://127.0.0.1:8766"  # odds_history API地址
+DEFAULT_CONCURRENCY = 20  # 并发数
+DEFAULT_REQUESTS = 500  # 总请求数
+REQUEST_TIMEOUT = 60  # 单个请求超时（秒）
+
+_thread_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """每个压测线程复用一个HTTP会话（保持长连接，避免把建连耗时算进接口延迟）"""
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_load(method: str, url: str, concurrency: int, total_requests: int, **kwargs) -> Dict:
+    """以固定并发对单个接口发起total_requests次请求，返回吞吐与延迟统计"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_request(_):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            response = get_session().request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(total_requests)))
+    wall_time = time.perf_counter() - wall_start
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(total_requests / wall_time, 2) if wall_time > 0 else 0.0,
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2)
+    }
+
+
+def print_report(title: str, stats: Dict):
+    """打印单项压测结果"""
+    print(f"\n===== {title} =====")
+    for key, value in stats.items():
+        print(f"  {key:<16}{value}")
+
+
+def bench_odds_history(args):
+    """/api/odds-history 串行基线 vs 并发吞吐"""
+    params = {
+        "match_name": args.match_name,
+        "start_time_beijing": args.start_time,
+        "type": args.type,
+        "value": args.value,
+        "side": args.side
+    }
+
+    # 先以并发1测得串行基线，再以目标并发测试，两者吞吐之比即并发收益
+    baseline = run_load("GET", f"{args.base_url}/api/odds-history", 1,
+                        min(args.requests, 50), params=params)
+    print_report("/api/odds-history 串行基线", baseline)
+
+    concurrent_stats = run_load("GET", f"{args.base_url}/api/odds-history", args.concurrency,
+                                args.requests, params=params)
+    print_report(f"/api/odds-history 并发{args.concurrency}", concurrent_stats)
+
+    if baseline["throughput_rps"] > 0:
+        speedup = concurrent_stats["throughput_rps"] / baseline["throughput_rps"]
+        print(f"\n📊 并发吞吐提升：{speedup:.2f}x")
+
+
+def bench_daily_range(args):
+    """/api/daily-odds 不同区间长度的墙钟耗时（观察按天分片并行后耗时随天数的增长）"""
+    end = datetime.now()
+    rows = []
+    for days in args.days:
+        start = end - timedelta(days=days - 1)
+        params = {"start_date": start.strftime("%Y-%m-%d"), "end_date": end.strftime("%Y-%m-%d")}
+        timings = []
+        count = 0
+        for _ in range(args.repeat):
+            request_start = time.perf_counter()
+            response = requests.get(f"{args.base_url}/api/daily-odds", params=params, timeout=600)
+            response.raise_for_status()
+            timings.append(time.perf_counter() - request_start)
+            count = response.json().get("count", 0)
+        rows.append((days, count, statistics.median(timings)))
+
+    print(f"\n===== /api/daily-odds 区间长度 vs 耗时（{args.repeat}次取中位数） =====")
+    print(f"  {'天数':<8}{'比赛数':<10}{'耗时(s)':<10}{'每天耗时(s)':<10}")
+    for days, count, wall_time in rows:
+        print(f"  {days:<10}{count:<13}{wall_time:<12.3f}{wall_time / days:.3f}")
+
+
+def build_synthetic_daily_payload(matches: int, lines: int, changes: int) -> Dict:
+    """构造与/api/daily-odds结构一致的合成响应（赔率为数据库返回的Decimal）"""
+    from decimal import Decimal
+
+    def line_entries(value_field: str, values: List[str], sides: List[str]) -> List[Dict]:
+        return [
+            {
+                value_field: value,
+                "side": side,
+                "sources": {
+                    source: [{"odds": Decimal("0.950") - Decimal(k) / 1000,
+                              "time": f"2025-01-01 12:{k % 60:02d}:00"} for k in range(changes)]
+                    for source in (1, 2, 3)
+                }
+            }
+            for value in values for side in sides
+        ]
+
+    spread_values = [str((i - lines // 2) * 0.25) for i in range(lines)]
+    total_values = [str(2 + i * 0.25) for i in range(lines)]
+    data = [
+        {
+            "match_id": match_id,
+            "match_name": f"Bench League - Home {match_id} vs Away {match_id}",
+            "league_name": "Bench League",
+            "home_team": f"Home {match_id}",
+            "away_team": f"Away {match_id}",
+            "start_time_beijing": "2025-01-01 20:00:00",
+            "full_time": None,
+            "half_time": None,
+            "spread_odds": line_entries("spread_value", spread_values, ["home", "away"]),
+            "total_odds": line_entries("total_value", total_values, ["over", "under"])
+        }
+        for match_id in range(1, matches + 1)
+    ]
+    return {"status": "success", "start_date": "2025-01-01", "end_date": "2025-01-01",
+            "count": len(data), "data": data}
+
+
+def bench_serialize(args):
+    """DailyOddsResponse序列化：response_model校验+序列化 与 预编码快速路径 的CPU耗时/MB对比"""
+    import odds_history
+
+    payload = build_synthetic_daily_payload(args.matches, args.lines, args.changes)
+
+    def model_path() -> bytes:
+        # 与FastAPI对response_model的处理一致：校验为模型 -> pydantic JSON模式序列化
+        return odds_history.DailyOddsResponse(**payload).model_dump_json().encode("utf-8")
+
+    def fast_path() -> bytes:
+        return odds_history.encode_model_payload(odds_history.DAILY_ODDS_RESPONSE_FIELDS, payload)
+
+    results = {}
+    for name, encode in (("response_model", model_path), ("fast_path", fast_path)):
+        cpu_start = time.process_time()
+        for _ in range(args.repeat):
+            body = encode()
+        cpu_time = (time.process_time() - cpu_start) / args.repeat
+        megabytes = len(body) / 1024 / 1024
+        results[name] = body
+        print_report(name, {
+            "bytes": len(body),
+            "cpu_s": round(cpu_time, 4),
+            "cpu_s_per_mb": round(cpu_time / megabytes, 4) if megabytes else 0.0
+        })
+
+    same_bytes = results["response_model"] == results["fast_path"]
+    print(f"\n输出逐字节一致: {'✅' if same_bytes else '❌'}")
+    if not same_bytes:
+        raise SystemExit(1)
+
+
+def bench_export_compare(args):
+    """同一日期区间：/api/daily-odds JSON 与列式导出的体积、下载与解析耗时对比"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    end = datetime.now()
+    start = end - timedelta(days=args.days)
+    params = {"start_date": start.strftime("%Y-%m-%d"), "end_date": end.strftime("%Y-%m-%d")}
+
+    stats = {}
+
+    download_start = time.perf_counter()
+    response = requests.get(f"{args.base_url}/api/daily-odds", params=params, timeout=600)
+    response.raise_for_status()
+    download_time = time.perf_counter() - download_start
+    parse_start = time.perf_counter()
+    payload = json.loads(response.content)
+    parse_time = time.perf_counter() - parse_start
+    stats["json"] = {
+        "bytes": len(response.content),
+        "download_s": round(download_time, 3),
+        "parse_s": round(parse_time, 3),
+        "rows": sum(len(records)
+                    for match in payload.get("data") or []
+                    for line in match["spread_odds"] + match["total_odds"]
+                    for records in line["sources"].values())
+    }
+
+    for export_format in ("arrow", "parquet"):
+        download_start = time.perf_counter()
+        response = requests.get(f"{args.base_url}/api/daily-odds/export",
+                                params={**params, "format": export_format}, timeout=600)
+        response.raise_for_status()
+        download_time = time.perf_counter() - download_start
+        parse_start = time.perf_counter()
+        if export_format == "arrow":
+            table = pa.ipc.open_stream(response.content).read_all()
+        else:
+            table = pq.read_table(pa.BufferReader(response.content))
+        parse_time = time.perf_counter() - parse_start
+        stats[export_format] = {
+            "bytes": len(response.content),
+            "download_s": round(download_time, 3),
+            "parse_s": round(parse_time, 3),
+            "rows": table.num_rows
+        }
+
+    for name, item in stats.items():
+        print_report(f"{args.days}天 {name}", item)
+    for name in ("arrow", "parquet"):
+        if stats[name]["bytes"] and stats[name]["parse_s"]:
+            print(f"\n📊 {name} 相对JSON：体积 {stats['json']['bytes'] / stats[name]['bytes']:.1f}x 更小，"
+                  f"解析 {stats['json']['parse_s'] / stats[name]['parse_s']:.1f}x 更快")
+
+
+# 合成数据（基准测试用）：所有比赛归属于该联赛，便于整体清理
+FIXTURE_LEAGUE = "Bench League"
+BENCH_TABLES = ["matches", "spread_odds", "total_odds"]  # 统计扫描行数的表
+STATS_FLUSH_WAIT = 1.5  # 读取pg_stat_user_tables前的等待时间（秒），等待服务端进程刷新统计
+# 写入合成数据的数据库名必须以此结尾，且不能是odds_history的DB_CONFIG（线上库），
+# 否则监控worker与Analyzer会把合成比赛当作真实比赛处理
+BENCH_DATABASE_SUFFIX = "_bench"
+
+
+def db_params(args) -> Dict:
+    """连接参数：--dsn（libpq连接串）优先，其次为DB_CONFIG替换--database后的库名，都未指定时为DB_CONFIG"""
+    from odds_history import DB_CONFIG
+
+    if args.dsn:
+        from psycopg2.extensions import parse_dsn
+        params = parse_dsn(args.dsn)
+        params["database"] = params.pop("dbname", params.get("database", ""))
+        return params
+    params = dict(DB_CONFIG)
+    if args.database:
+        params["database"] = args.database
+    return params
+
+
+def connect_db(args, bench_only: bool = False):
+    """连接数据库；bench_only=True时只允许连接独立的测试库（写入或依赖合成数据的子命令）"""
+    import psycopg2
+    from odds_history import DB_CONFIG
+
+    params = db_params(args)
+    if bench_only:
+        database = params.get("database") or ""
+        is_production = (database == DB_CONFIG["database"]
+                         and params.get("host", "localhost") == DB_CONFIG["host"]
+                         and str(params.get("port", 5432)) == str(DB_CONFIG["port"]))
+        if is_production or not database.endswith(BENCH_DATABASE_SUFFIX):
+            raise SystemExit(f"拒绝在数据库 {database!r} 上执行：请通过 --dsn 或 --database 指定"
+                             f"以 {BENCH_DATABASE_SUFFIX} 结尾的独立测试库（不能是线上库）")
+    return psycopg2.connect(**params)
+
+
+def delete_fixture(cursor) -> int:
+    """删除合成数据写入的全部行（含聚合程序为这些比赛派生的行），返回删除的比赛数"""
+    cursor.execute("SELECT id FROM matches WHERE league_name = %s", (FIXTURE_LEAGUE,))
+    existing_ids = [row[0] for row in cursor.fetchall()]
+    if existing_ids:
+        for table in ["spread_odds", "total_odds", "line_189_index", "match_line_summary"]:
+            cursor.execute(f"DELETE FROM {table} WHERE match_id = ANY(%s)", (existing_ids,))
+        cursor.execute("DELETE FROM matches WHERE id = ANY(%s)", (existing_ids,))
+    return len(existing_ids)
+
+
+def bench_cleanup(args):
+    """清理fixture子命令生成的合成数据"""
+    conn = connect_db(args, bench_only=True)
+    try:
+        with conn.cursor() as cursor:
+            deleted = delete_fixture(cursor)
+        conn.commit()
+        print(f"已清理合成数据：{deleted} 场比赛")
+    finally:
+        conn.close()
+
+
+def bench_fixture(args):
+    """生成合成数据（先清理旧数据）：N场比赛 × M个盘口 × 2个方向 × 3个数据源 × 每个K次变化"""
+    conn = connect_db(args, bench_only=True)
+    try:
+        with conn.cursor() as cursor:
+            deleted = delete_fixture(cursor)
+            if deleted:
+                print(f"已清理旧的合成数据：{deleted} 场比赛")
+
+            # 比赛每10分钟一场，一半已开赛、一半未开赛
+            cursor.execute("""
+                INSERT INTO matches (match_name, league_name, home_team, away_team,
+                                     start_time_beijing, start_time_ts, time_until_start)
+                SELECT %(league)s || ' - Home ' || g || ' vs Away ' || g, %(league)s, 'Home ' || g, 'Away ' || g,
+                       to_char(ts, 'YYYY-MM-DD HH24:MI:SS'), ts, ''
+                FROM (
+                    SELECT g, date_trunc('minute', NOW()::timestamp) + (g - %(matches)s / 2) * INTERVAL '10 minutes' AS ts
+                    FROM generate_series(1, %(matches)s) AS g
+                ) fixture
+            """, {"league": FIXTURE_LEAGUE, "matches": args.matches})
+
+            odds_params = {"league": FIXTURE_LEAGUE, "lines": args.lines, "changes": args.changes}
+            # 让分盘：盘口值以0.25为步长分布在0附近，赔率在马来盘正负区间随机波动
+            cursor.execute("""
+                INSERT INTO spread_odds (match_id, source, spread_value, side, odds_value, recorded_at)
+                SELECT m.id, src, ((l - 1 - %(lines)s / 2) * 0.25)::float8::text, side,
+                       round((CASE WHEN random() < 0.8 THEN 0.7 + random() * 0.3 ELSE -0.7 - random() * 0.3 END)::numeric, 3),
+                       m.start_time_ts - (%(changes)s - k) * INTERVAL '5 minutes'
+                FROM matches m
+                CROSS JOIN generate_series(1, %(lines)s) AS l
+                CROSS JOIN unnest(ARRAY['home', 'away']) AS side
+                CROSS JOIN generate_series(1, 3) AS src
+                CROSS JOIN generate_series(1, %(changes)s) AS k
+                WHERE m.league_name = %(league)s
+            """, odds_params)
+            spread_rows = cursor.rowcount
+            cursor.execute("""
+                INSERT INTO total_odds (match_id, source, total_value, side, odds_value, recorded_at)
+                SELECT m.id, src, (2 + (l - 1) * 0.25)::float8::text, side,
+                       round((CASE WHEN random() < 0.8 THEN 0.7 + random() * 0.3 ELSE -0.7 - random() * 0.3 END)::numeric, 3),
+                       m.start_time_ts - (%(changes)s - k) * INTERVAL '5 minutes'
+                FROM matches m
+                CROSS JOIN generate_series(1, %(lines)s) AS l
+                CROSS JOIN unnest(ARRAY['over', 'under']) AS side
+                CROSS JOIN generate_series(1, 3) AS src
+                CROSS JOIN generate_series(1, %(changes)s) AS k
+                WHERE m.league_name = %(league)s
+            """, odds_params)
+            total_rows = cursor.rowcount
+            conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for table in BENCH_TABLES:
+                cursor.execute(f"ANALYZE {table}")
+        print(f"已生成合成数据：{args.matches} 场比赛，让分盘 {spread_rows} 行，大小球 {total_rows} 行")
+    finally:
+        conn.close()
+
+
+def read_scan_counters(cursor) -> Dict[str, int]:
+    """读取各表累计扫描的行数（顺序扫描读取行 + 索引扫描取回行）"""
+    time.sleep(STATS_FLUSH_WAIT)
+    cursor.execute("SELECT pg_stat_clear_snapshot()")
+    cursor.execute("""
+        SELECT relname, COALESCE(seq_tup_read, 0) + COALESCE(idx_tup_fetch, 0)
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(%s)
+    """, (BENCH_TABLES,))
+    return dict(cursor.fetchall())
+
+
+def build_suite_endpoints(cursor, args) -> List[Dict]:
+    """根据合成数据构造各接口的请求参数"""
+    cursor.execute("""
+        SELECT m.match_name, m.start_time_beijing, m.league_name, m.home_team, m.away_team, m.start_time_ts,
+               (SELECT spread_value FROM spread_odds WHERE match_id = m.id LIMIT 1) AS spread_value
+        FROM matches m
+        WHERE m.league_name = %s AND m.start_time_ts > NOW()
+        ORDER BY m.start_time_ts
+        LIMIT %s
+    """, (FIXTURE_LEAGUE, args.batch_items))
+    rows = cursor.fetchall()
+    if not rows:
+        raise SystemExit("未找到合成数据，请先执行 fixture 子命令")
+
+    match_name, start_time, _, _, _, _, spread_value = rows[0]
+    batch_queries = [
+        {
+            "league_name": league,
+            "home_team": home,
+            "away_team": away,
+            "order_time": (start_ts - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S.%f")
+        }
+        for _, _, league, home, away, start_ts, _ in rows
+    ]
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    return [
+        {
+            "name": "/api/odds-history",
+            "method": "GET",
+            "kwargs": {"params": {"match_name": match_name, "start_time_beijing": start_time,
+                                  "type": "spread", "value": spread_value, "side": "home"}}
+        },
+        {
+            "name": "/api/daily-odds",
+            "method": "GET",
+            "kwargs": {"params": {"start_date": today, "end_date": today}}
+        },
+        {
+            "name": "/api/upcoming-odds-full",
+            "method": "GET",
+            "kwargs": {}
+        },
+        {
+            "name": "/api/match-start-time/simple",
+            "method": "POST",
+            "kwargs": {"json": batch_queries}
+        }
+    ]
+
+
+def bench_suite(args):
+    """
+    对各接口依次压测，输出p50/p95/p99与每请求扫描行数
+    扫描行数取自pg_stat_user_tables的前后差值（实例级统计，应在没有其他负载的测试库上运行）
+    """
+    conn = connect_db(args, bench_only=True)
+    conn.autocommit = True
+    results = {}
+    try:
+        with conn.cursor() as cursor:
+            endpoints = build_suite_endpoints(cursor, args)
+            for endpoint in endpoints:
+                if args.only and endpoint["name"] not in args.only:
+                    continue
+                before = read_scan_counters(cursor)
+                stats = run_load(endpoint["method"], f"{args.base_url}{endpoint['name']}", args.concurrency,
+                                 args.requests, **endpoint["kwargs"])
+                after = read_scan_counters(cursor)
+                for table in BENCH_TABLES:
+                    scanned = after.get(table, 0) - before.get(table, 0)
+                    stats[f"rows_{table}"] = round(scanned / args.requests, 1)
+                results[endpoint["name"]] = stats
+                print_report(f"{endpoint['name']} 并发{args.concurrency}", stats)
+    finally:
+        conn.close()
+
+    try:
+        cache_stats = requests.get(f"{args.base_url}/api/cache/stats", timeout=REQUEST_TIMEOUT).json()
+        print_report("响应缓存", cache_stats)
+    except (requests.exceptions.RequestException, ValueError):
+        pass
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, stats in results.items():
+            base = baseline.get(name)
+            if not base:
+                continue
+            for key in ["p95_ms", "p99_ms", "rows_matches", "rows_spread_odds", "rows_total_odds"]:
+                if base.get(key) and stats[key] > base[key] * (1 + args.tolerance):
+                    regressions.append(f"{name} {key}: {base[key]} -> {stats[key]}")
+        if regressions:
+            print("\n❌ 相对基线出现退化：")
+            for item in regressions:
+                print(f"  - {item}")
+            raise SystemExit(1)
+        print(f"\n✅ 相对基线无退化（容差{args.tolerance:.0%}）")
+
+
+def bench_batch_start_time(args):
+    """/api/match-start-time/simple 单请求携带大批量查询项的延迟"""
+    # 从现有比赛中取样构造查询项（订单时间设为开赛前1小时，保证能命中）
+    conn = connect_db(args)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT league_name, home_team, away_team, start_time_ts
+                FROM matches
+                WHERE start_time_ts IS NOT NULL
+                ORDER BY id DESC
+                LIMIT %s
+            """, (args.items,))
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        print("matches表中没有可用于取样的比赛")
+        return
+
+    queries = [
+        {
+            "league_name": league,
+            "home_team": home,
+            "away_team": away,
+            "order_time": (start_time - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S.%f")
+        }
+        for league, home, away, start_time in rows
+    ]
+    # 样本不足时循环补齐到目标条数
+    queries = (queries * (args.items // len(queries) + 1))[:args.items]
+
+    stats = run_load("POST", f"{args.base_url}/api/match-start-time/simple", args.concurrency,
+                     args.requests, json=queries)
+    print_report(f"/api/match-start-time/simple 每请求{len(queries)}项", stats)
+
+
+EXPLAIN_WINDOW_QUERIES = {
+    "TEXT::timestamp 强转": """
+        SELECT id, match_name, start_time_beijing FROM {table}
+        WHERE start_time_beijing::timestamp BETWEEN %s AND %s
+        ORDER BY start_time_beijing ASC
+    """,
+    "start_time_ts 索引列": """
+        SELECT id, match_name, start_time_beijing FROM {table}
+        WHERE start_time_ts BETWEEN %s AND %s
+        ORDER BY start_time_ts ASC
+    """
+}
+
+
+def bench_explain_window(args):
+    """时间窗口查询：TEXT强转 vs TIMESTAMP索引列的 EXPLAIN ANALYZE 对比
+
+    --fixture-rows > 0 时在临时表中生成合成比赛数据（会话结束自动删除），否则直接对线上matches表执行
+    """
+    conn = connect_db(args)
+    try:
+        cursor = conn.cursor()
+        table = "matches"
+        if args.fixture_rows > 0:
+            table = "bench_matches"
+            cursor.execute("CREATE TEMP TABLE bench_matches (LIKE matches INCLUDING ALL)")
+            # 合成数据：每分钟一场比赛，从当前时间往前铺开
+            cursor.execute("""
+                INSERT INTO bench_matches (match_name, league_name, home_team, away_team,
+                                           start_time_beijing, start_time_ts, time_until_start)
+                SELECT 'Bench League - Home ' || g || ' vs Away ' || g,
+                       'Bench League', 'Home ' || g, 'Away ' || g,
+                       to_char(ts, 'YYYY-MM-DD HH24:MI:SS'), ts, ''
+                FROM (
+                    SELECT g, date_trunc('minute', NOW()::timestamp) - g * INTERVAL '1 minute' AS ts
+                    FROM generate_series(1, %s) AS g
+                ) fixture
+            """, (args.fixture_rows,))
+            cursor.execute("ANALYZE bench_matches")
+            print(f"已生成 {args.fixture_rows} 行合成比赛数据")
+
+        window_end = datetime.now()
+        window_start = window_end - timedelta(days=args.days)
+        for title, sql in EXPLAIN_WINDOW_QUERIES.items():
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql.format(table=table),
+                           (window_start.strftime("%Y-%m-%d %H:%M:%S"),
+                            window_end.strftime("%Y-%m-%d %H:%M:%S")))
+            print(f"\n===== {title}（{table}，{args.days}天窗口） =====")
+            for (line,) in cursor.fetchall():
+                print(f"  {line}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="odds_history API 压测与基准")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--dsn", help="数据库连接串（libpq格式），fixture/cleanup/suite要求指向独立测试库")
+    parser.add_argument("--database", help="沿用DB_CONFIG的连接参数，仅替换数据库名")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    history_parser = subparsers.add_parser("odds-history", help="/api/odds-history 并发吞吐")
+    history_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    history_parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    history_parser.add_argument("--match-name", required=True, help="完整比赛名称")
+    history_parser.add_argument("--start-time", required=True, help="比赛开始时间（北京时间）")
+    history_parser.add_argument("--type", default="spread", choices=["spread", "total"])
+    history_parser.add_argument("--value", required=True, help="盘口值")
+    history_parser.add_argument("--side", default="home", choices=["home", "away", "over", "under"])
+    history_parser.set_defaults(func=bench_odds_history)
+
+    range_parser = subparsers.add_parser("daily-range", help="/api/daily-odds 区间长度与耗时关系")
+    range_parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30], help="要测试的区间天数")
+    range_parser.add_argument("--repeat", type=int, default=3, help="每个区间的重复次数")
+    range_parser.set_defaults(func=bench_daily_range)
+
+    serialize_parser = subparsers.add_parser("serialize", help="响应序列化CPU耗时对比（进程内，无需服务）")
+    serialize_parser.add_argument("--matches", type=int, default=300)
+    serialize_parser.add_argument("--lines", type=int, default=6)
+    serialize_parser.add_argument("--changes", type=int, default=20)
+    serialize_parser.add_argument("--repeat", type=int, default=5)
+    serialize_parser.set_defaults(func=bench_serialize)
+
+    export_parser = subparsers.add_parser("export-compare", help="JSON与列式导出的体积/解析耗时对比")
+    export_parser.add_argument("--days", type=int, default=30, help="日期区间天数")
+    export_parser.set_defaults(func=bench_export_compare)
+
+    fixture_parser = subparsers.add_parser("fixture", help="生成合成比赛与赔率数据")
+    fixture_parser.add_argument("--matches", type=int, default=2000, help="比赛数")
+    fixture_parser.add_argument("--lines", type=int, default=6, help="每场比赛每种盘口类型的盘口数")
+    fixture_parser.add_argument("--changes", type=int, default=20, help="每个盘口/方向/数据源的赔率变化次数")
+    fixture_parser.set_defaults(func=bench_fixture)
+
+    cleanup_parser = subparsers.add_parser("cleanup", help="删除fixture生成的合成数据")
+    cleanup_parser.set_defaults(func=bench_cleanup)
+
+    suite_parser = subparsers.add_parser("suite", help="各接口延迟与扫描行数基准")
+    suite_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    suite_parser.add_argument("--requests", type=int, default=200)
+    suite_parser.add_argument("--batch-items", type=int, default=1000, help="批量开赛时间接口每请求的查询项数")
+    suite_parser.add_argument("--only", nargs="*", help="只测试指定接口路径")
+    suite_parser.add_argument("--save", help="将结果保存为JSON（作为后续对比的基线）")
+    suite_parser.add_argument("--compare", help="与已保存的基线JSON对比，退化时以非零状态退出")
+    suite_parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    suite_parser.set_defaults(func=bench_suite)
+
+    batch_parser = subparsers.add_parser("batch-start-time", help="批量开赛时间查询延迟")
+    batch_parser.add_argument("--items", type=int, default=1000, help="每个请求的查询项数")
+    batch_parser.add_argument("--concurrency", type=int, default=4)
+    batch_parser.add_argument("--requests", type=int, default=50)
+    batch_parser.set_defaults(func=bench_batch_start_time)
+
+    explain_parser = subparsers.add_parser("explain-window", help="时间窗口查询 EXPLAIN ANALYZE 对比")
+    explain_parser.add_argument("--days", type=int, default=1, help="查询窗口天数")
+    explain_parser.add_argument("--fixture-rows", type=int, default=1000000,
+                                help="合成数据行数（0表示直接查线上matches表）")
+    explain_parser.set_defaults(func=bench_explain_window)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,707 @@
+"""
+赔率监控worker（独立进程）
+从odds_history.py中拆出的监控循环：增量计算连续下降/点位跌幅警告，
+连续下降警告以快照形式发布到monitor_warning_snapshot表，点位警告写入point_warnings表，
+API进程只负责读取（/api/cached-warnings），配置通过monitor_config表下发
+
+启动方式：python odds_monitor_worker.py
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import DictCursor
+
+from odds_history import (
+    DB_CONFIG, MONITOR_CONFIG, ODDS_TABLES, WarningMessage, PointWarningMessage,
+    init_db_pool, get_db_connection, release_db_connection,
+    init_point_warnings_table, repair_point_warnings_constraint, save_point_warning_to_db,
+    init_monitor_tables, load_monitor_config, publish_warning_snapshot
+)
+
+logger = logging.getLogger(__name__)
+
+# worker配置
+CONFIG_POLL_INTERVAL = 1  # 等待下一周期期间读取监控配置的间隔（秒）
+MONITOR_ADVISORY_LOCK_KEY = 2026103301  # PostgreSQL会话级咨询锁，保证全局只有一个worker在运行
+# 轮询时回读的id重叠区间：并发写入时较小的id可能晚于较大的id提交，回读last_id之前的这段区间补上晚提交的记录
+POLL_ID_OVERLAP = 2000
+
+
+# 已触发点位警告的去重记录配置
+TRIGGERED_WARNING_CONFIG = {
+    "retention_hours": 3,  # 开赛后保留去重记录的小时数（比赛早已离开监控窗口，之后不会再触发）
+    "max_matches": 20000  # 最多保留的比赛数（超出时淘汰最早过期的比赛）
+}
+
+
+class TriggeredWarningRegistry:
+    """
+    已触发点位警告的去重记录（按比赛分组，开赛+N小时后整组过期）
+    内存占用只与近期比赛数量相关，不随运行时间增长；启动时从point_warnings一次性恢复
+    """
+
+    def __init__(self, retention_hours: int, max_matches: int):
+        self.retention = timedelta(hours=retention_hours)
+        self.max_matches = max_matches
+        self.lock = threading.Lock()
+        self.by_match = {}  # match_id -> {"expires_at": 过期时间, "keys": {(type, value, side, source)}}
+
+    def _entry(self, match_id: int, start_time: Optional[datetime]) -> Dict:
+        """获取比赛的去重记录（不存在时创建，调用方持有锁）"""
+        entry = self.by_match.get(match_id)
+        if entry is None:
+            expires_at = (start_time or datetime.now()) + self.retention
+            entry = self.by_match[match_id] = {"expires_at": expires_at, "keys": set()}
+            if len(self.by_match) > self.max_matches:
+                oldest = min(self.by_match, key=lambda k: self.by_match[k]["expires_at"])
+                del self.by_match[oldest]
+        return entry
+
+    def add(self, match_id: int, start_time: Optional[datetime], odds_type: str, value: str, side: str,
+            source_id: int) -> bool:
+        """登记一条警告，已登记过时返回False"""
+        key = (odds_type, value, side, source_id)
+        with self.lock:
+            entry = self._entry(match_id, start_time)
+            if key in entry["keys"]:
+                return False
+            entry["keys"].add(key)
+            return True
+
+    def purge_expired(self):
+        """移除已过期比赛的全部去重记录"""
+        now = datetime.now()
+        with self.lock:
+            expired = [match_id for match_id, entry in self.by_match.items() if entry["expires_at"] <= now]
+            for match_id in expired:
+                del self.by_match[match_id]
+        if expired:
+            logger.info(f"已清理 {len(expired)} 场过期比赛的点位警告去重记录")
+
+    def load_from_db(self):
+        """从point_warnings恢复未过期比赛的去重记录（一次查询）"""
+        conn = get_db_connection()
+        if not conn:
+            logger.error("数据库连接失败，无法恢复点位警告去重记录")
+            return
+
+        try:
+            with conn.cursor(cursor_factory=DictCursor) as cursor:
+                cursor.execute("""
+                SELECT m.id AS match_id, m.start_time_ts, pw.type, pw.value, pw.side, pw.source_first
+                FROM point_warnings pw
+                JOIN matches m ON m.match_name = pw.match_name
+                              AND m.start_time_ts = pw.start_time_beijing
+                WHERE pw.start_time_beijing > %s
+                """, (datetime.now() - self.retention,))
+                rows = cursor.fetchall()
+            conn.rollback()
+
+            with self.lock:
+                for row in rows:
+                    entry = self._entry(row["match_id"], row["start_time_ts"])
+                    entry["keys"].add((row["type"], row["value"], row["side"], row["source_first"]))
+            logger.info(f"已从数据库恢复 {len(rows)} 条点位警告去重记录，涉及 {len(self.by_match)} 场比赛")
+        except Exception as e:
+            logger.error(f"恢复点位警告去重记录失败: {e}")
+        finally:
+            release_db_connection(conn)
+
+
+TRIGGERED_WARNINGS = TriggeredWarningRegistry(TRIGGERED_WARNING_CONFIG["retention_hours"],
+                                              TRIGGERED_WARNING_CONFIG["max_matches"])
+
+
+# 监控系统 - 分析赔率趋势
+def analyze_odds_trend(odds_data: List[Dict], consecutive_decreases: int) -> bool:
+    """分析赔率趋势，判断是否连续下降指定次数（马来盘逻辑）"""
+    # 过滤掉None值的赔率记录
+    valid_odds = [record for record in odds_data if record["odds"] is not None]
+
+    if len(valid_odds) < consecutive_decreases:
+        return False
+
+    # 按时间排序（最新的在前）
+    sorted_data = sorted(valid_odds, key=lambda x: x["time"], reverse=True)
+
+    # 检查是否连续下降
+    for i in range(consecutive_decreases):
+        if i + 1 >= len(sorted_data):
+            return False
+
+        # 获取当前和前一个赔率
+        new_odds = sorted_data[i]["odds"]
+        old_odds = sorted_data[i + 1]["odds"]
+
+        # 转换为十进制赔率再比较
+        new_decimal = malay_to_decimal(new_odds)
+        old_decimal = malay_to_decimal(old_odds)
+
+        if new_decimal >= old_decimal:  # 十进制赔率未下降
+            return False
+
+    return True
+
+
+def malay_to_decimal(malay_odds: float) -> float:
+    """将马来盘赔率转换为十进制赔率"""
+    if malay_odds >= 0:
+        return 1 + malay_odds  # 正数马来赔率直接加1
+    else:
+        return 1 + (1 / abs(malay_odds))  # 负数马来赔率按公式转换
+
+
+# 新增：马来盘点位计算函数
+def calculate_malay_points(old_odds: float, new_odds: float) -> float:
+    """
+    计算马来盘赔率变化的点位
+    正数表示下跌，负数表示上涨
+    """
+    # 处理无效赔率
+    if old_odds is None or new_odds is None:
+        return 0.0
+
+    try:
+        # 转换为浮点数
+        old = float(old_odds)
+        new = float(new_odds)
+
+        # 情况1: 负数到正数（下跌）
+        if old < 0 and new >= 0:
+            return (100 - abs(old * 100)) + (100 - (new * 100))
+
+        # 情况2: 都为负数（-0.6到-0.9为跌幅30点位）
+        elif old < 0 and new < 0:
+            return abs(new * 100) - abs(old * 100)
+
+        # 情况3: 都为正数（0.9到0.6跌幅为30个点位）
+        elif old >= 0 and new >= 0:
+            return (old * 100) - (new * 100)
+
+        # 情况4: 正数到负数（上涨）
+        else:  # old >= 0 and new < 0
+            return 0.0
+
+    except (ValueError, TypeError):
+        return 0.0
+
+
+# 新增：赔率点位跌幅分析函数
+def analyze_odds_point_drop(odds_data: List[Dict], time_window_minutes: int) -> Tuple[bool, float, float, float]:
+    """
+    分析赔率在指定时间窗口内的跌幅是否超过阈值
+    :param odds_data: 赔率数据列表
+    :param time_window_minutes: 时间窗口(分钟)
+    :return: (是否超过阈值, 跌幅点位, 之前的赔率, 当前的赔率)
+    """
+    # 过滤无效数据
+    valid_odds = [record for record in odds_data if record["odds"] is not None]
+    if len(valid_odds) < 2:
+        return (False, 0.0, 0.0, 0.0)
+
+    # 按时间排序（最新的在前）
+    sorted_data = sorted(valid_odds, key=lambda x: x["time"], reverse=True)
+    current_time = sorted_data[0]["time"]
+    current_odds = sorted_data[0]["odds"]
+
+    # 计算时间窗口的起始时间
+    window_start_time = current_time - timedelta(minutes=time_window_minutes)
+
+    # 找到时间窗口内最早的赔率记录
+    previous_odds = None
+    for record in sorted_data:
+        if record["time"] <= window_start_time:
+            previous_odds = record["odds"]
+            break
+
+    # 如果没有找到时间窗口内的记录，使用最早的记录
+    if previous_odds is None:
+        return (False, 0.0, 0.0, 0.0)  # 无有效对比数据，不触发警告
+
+    # 计算跌幅点位
+    drop_points = calculate_malay_points(previous_odds, current_odds)
+
+    # 返回结果
+    return (True, drop_points, previous_odds, current_odds)
+
+
+def normalize_line_value(value: str) -> str:
+    """规范化盘口值字符串（与聚合程序写入line_189_index的格式一致，如-1.0→"-1"）"""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return value
+    return f"{int(number)}" if number.is_integer() else f"{number}"
+
+
+# 监控系统 - 单个盘口的赔率环形缓冲区
+class OddsLineWindow:
+    """单个(比赛, 盘口类型, 盘口值, 方向, 数据源)的近期赔率缓冲区"""
+
+    def __init__(self):
+        self.records = deque()  # 有效赔率记录（按时间升序），格式与analyze_*函数的输入一致
+        self.latest_odds = None  # 最新一条原始赔率（可能为None，用于赔率范围判断）
+        self.latest_time = None  # 最新一条原始赔率的记录时间
+
+    def push(self, odds, recorded_at: datetime, trend_size: int, time_window_minutes: int):
+        """追加一条新赔率，并裁剪掉连续下降与点位跌幅两种分析都不再需要的旧记录"""
+        if self.latest_time is not None and recorded_at < self.latest_time:
+            # 晚提交的较早记录：按时间插入，不改变最新赔率
+            if odds is not None:
+                index = len(self.records)
+                while index > 0 and self.records[index - 1]["time"] > recorded_at:
+                    index -= 1
+                self.records.insert(index, {"odds": odds, "time": recorded_at})
+            return
+
+        self.latest_odds = odds
+        self.latest_time = recorded_at
+        if odds is None:
+            return
+
+        self.records.append({"odds": odds, "time": recorded_at})
+
+        # 保留：最近trend_size条 + 时间窗口内的记录 + 窗口起点之前最近的一条（点位对比基准）
+        window_start = recorded_at - timedelta(minutes=time_window_minutes)
+        while len(self.records) > trend_size and self.records[1]["time"] <= window_start:
+            self.records.popleft()
+
+
+# 监控系统 - 增量监控引擎
+class IncrementalOddsMonitor:
+    """
+    增量赔率监控引擎
+    按自增id轮询新增的赔率记录，只对受影响的盘口重新计算，并在状态跃迁时触发警告，
+    单次监控的开销与新增变化量成正比，而不是与历史数据总量成正比
+    """
+
+    CHECK_TYPES = ODDS_TABLES
+
+    # 影响盘口判定结果的配置项，变化时需要重新评估全部盘口
+    EVALUATION_CONFIG_KEYS = [
+        "min_odds", "max_odds", "required_sources", "threshold_189",
+        "point_monitor_enabled", "point_threshold", "point_monitor_sources"
+    ]
+
+    def __init__(self):
+        self.lock = threading.Lock()  # 保证同一时刻只有一个监控周期修改引擎状态
+        self.reset()
+
+    def reset(self):
+        """清空全部增量状态（窗口参数变化时调用，下一周期重新加载）"""
+        self.windows = {}  # (match_id, type, value, side, source) -> OddsLineWindow
+        self.lines = defaultdict(set)  # (match_id, type) -> {(value, side)}
+        self.line_index = defaultdict(dict)  # (match_id, type) -> {(规范化盘口值, 方向): 189指数}
+        self.matches = {}  # match_id -> 比赛信息
+        self.last_ids = None  # {"spread": 最后处理的id, "total": 最后处理的id}
+        self.seen_ids = {odds_type: set() for odds_type in self.CHECK_TYPES}  # 重叠区间内已读取的id（去重）
+        self.last_index_revision = None  # line_189_index最后处理的revision
+        self.trend_warnings = {}  # (match_id, type, value, side) -> WarningMessage
+        self.point_states = {}  # (match_id, type, value, side, source) -> 上次是否超过阈值
+        self.window_config = None
+        self.evaluation_config = None
+
+    def run_pass(self) -> Optional[List[WarningMessage]]:
+        """执行一个监控周期，返回当前处于触发状态的连续下降警告；上一周期尚未结束时返回None"""
+        if not self.lock.acquire(blocking=False):
+            logger.warning("上一个监控周期仍在执行，跳过本次")
+            return None
+        try:
+            window_config = (MONITOR_CONFIG["consecutive_decreases"], MONITOR_CONFIG["point_check_minutes"])
+            if window_config != self.window_config:
+                if self.window_config is not None:
+                    logger.info(f"监控窗口参数已变化 {self.window_config} -> {window_config}，重建增量状态")
+                self.reset()
+                self.window_config = window_config
+
+            conn = get_db_connection()
+            if not conn:
+                logger.error("数据库连接失败，无法执行增量监控")
+                return list(self.trend_warnings.values())
+
+            try:
+                with conn.cursor(cursor_factory=DictCursor) as cursor:
+                    if self.last_ids is None:
+                        self.last_ids = {}
+                        for odds_type, check_type in self.CHECK_TYPES.items():
+                            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {check_type['table']}")
+                            self.last_ids[odds_type] = cursor.fetchone()[0]
+                        cursor.execute("SELECT COALESCE(MAX(revision), 0) FROM line_189_index")
+                        self.last_index_revision = cursor.fetchone()[0]
+
+                    dirty_lines = set()
+                    self._refresh_active_matches(cursor, dirty_lines)
+
+                    new_rows = 0
+                    for odds_type in self.CHECK_TYPES:
+                        new_rows += self._poll_new_rows(cursor, odds_type, dirty_lines)
+                    self._poll_index_updates(cursor, dirty_lines)
+
+                evaluation_config = json.dumps({key: MONITOR_CONFIG[key] for key in self.EVALUATION_CONFIG_KEYS})
+                if evaluation_config != self.evaluation_config:
+                    self.evaluation_config = evaluation_config
+                    dirty_lines = {
+                        (match_id, odds_type, value, side)
+                        for (match_id, odds_type), lines in self.lines.items()
+                        for value, side in lines
+                    }
+
+                for line in dirty_lines:
+                    self._evaluate_line(*line)
+
+                logger.info(
+                    f"增量监控完成：活跃比赛{len(self.matches)}场，新增赔率{new_rows}条，重算盘口{len(dirty_lines)}个")
+                return list(self.trend_warnings.values())
+
+            except Exception as e:
+                logger.error(f"增量监控周期失败: {e}")
+                conn.rollback()
+                return list(self.trend_warnings.values())
+            finally:
+                release_db_connection(conn)
+        finally:
+            self.lock.release()
+
+    def _refresh_active_matches(self, cursor, dirty_lines: set):
+        """刷新监控时间窗口内的比赛：新进入的比赛一次性加载历史，离开窗口的比赛释放状态"""
+        now = datetime.now()  # 获取当前时间（北京时间）
+        # 下限：当前时间 + time_window（例如配置为2，则表示2小时后）
+        start_time_threshold = now + timedelta(hours=MONITOR_CONFIG["time_window"])
+        # 上限：固定为12小时（无论time_window配置多少，上限都是12小时后）
+        end_time_threshold = now + timedelta(hours=12)
+
+        cursor.execute("""
+        SELECT id, match_name, start_time_beijing, start_time_ts,
+               league_name, home_team, away_team, result_value
+        FROM matches
+        WHERE start_time_ts >= %s
+          AND start_time_ts < %s
+        """, (start_time_threshold, end_time_threshold))
+        active = {row["id"]: dict(row) for row in cursor.fetchall()}
+
+        for match_id in set(self.matches) - set(active):
+            self._drop_match(match_id)
+
+        new_match_ids = [match_id for match_id in active if match_id not in self.matches]
+        if not new_match_ids:
+            self.matches = active
+            return
+
+        # 新进入窗口的比赛：加载其截至last_id的历史（之后的记录由轮询补齐）
+        # 历史全部加载成功后才加入self.matches，失败时撤销已写入的部分状态，下一周期重新加载
+        try:
+            for odds_type, check_type in self.CHECK_TYPES.items():
+                cursor.execute(f"""
+                SELECT id, match_id, source, {check_type["field"]} AS value, side, odds_value, recorded_at
+                FROM {check_type["table"]}
+                WHERE match_id = ANY(%s)
+                  AND id <= %s
+                ORDER BY id
+                """, (new_match_ids, self.last_ids[odds_type]))
+                for row in cursor.fetchall():
+                    self._apply_row(odds_type, row, dirty_lines)
+                    if row["id"] > self.last_ids[odds_type] - POLL_ID_OVERLAP:
+                        self.seen_ids[odds_type].add(row["id"])
+
+            # 以及截至last_index_revision的189指数
+            cursor.execute("""
+            SELECT match_id, type, line_value, side, index_value
+            FROM line_189_index
+            WHERE match_id = ANY(%s)
+              AND revision <= %s
+            """, (new_match_ids, self.last_index_revision))
+            for row in cursor.fetchall():
+                self._apply_index_row(row, dirty_lines)
+        except Exception:
+            for match_id in new_match_ids:
+                self._drop_match(match_id)
+            self.matches = {match_id: match for match_id, match in active.items() if match_id in self.matches}
+            raise
+
+        self.matches = active
+
+    def _poll_new_rows(self, cursor, odds_type: str, dirty_lines: set) -> int:
+        """
+        读取新增赔率记录，只把活跃比赛的记录放入缓冲区；
+        从last_id之前POLL_ID_OVERLAP处开始回读，按id去重，补上较小id晚提交的记录
+        """
+        check_type = self.CHECK_TYPES[odds_type]
+        seen_ids = self.seen_ids[odds_type]
+        cursor.execute(f"""
+        SELECT id, match_id, source, {check_type["field"]} AS value, side, odds_value, recorded_at
+        FROM {check_type["table"]}
+        WHERE id > %s
+        ORDER BY id
+        """, (self.last_ids[odds_type] - POLL_ID_OVERLAP,))
+        rows = [row for row in cursor.fetchall() if row["id"] not in seen_ids]
+
+        for row in rows:
+            seen_ids.add(row["id"])
+            if row["match_id"] in self.matches:
+                self._apply_row(odds_type, row, dirty_lines)
+        if rows:
+            self.last_ids[odds_type] = max(self.last_ids[odds_type], rows[-1]["id"])
+            cutoff = self.last_ids[odds_type] - POLL_ID_OVERLAP
+            self.seen_ids[odds_type] = {row_id for row_id in seen_ids if row_id > cutoff}
+        return len(rows)
+
+    def _apply_row(self, odds_type: str, row, dirty_lines: set):
+        """将一条赔率记录写入对应盘口的缓冲区，并标记需要重算的盘口"""
+        match_id = row["match_id"]
+        value = row["value"]
+        side = row["side"]
+        source = row["source"]
+        odds = float(row["odds_value"]) if row["odds_value"] is not None else None
+
+        window_key = (match_id, odds_type, value, side, source)
+        window = self.windows.get(window_key)
+        if window is None:
+            window = self.windows[window_key] = OddsLineWindow()
+        window.push(odds, row["recorded_at"], self.window_config[0] + 1, self.window_config[1])
+
+        self.lines[(match_id, odds_type)].add((value, side))
+        dirty_lines.add((match_id, odds_type, value, side))
+
+    def _poll_index_updates(self, cursor, dirty_lines: set):
+        """读取revision大于上次位置的189指数变化（由聚合程序每轮写入）"""
+        cursor.execute("""
+        SELECT match_id, type, line_value, side, index_value, revision
+        FROM line_189_index
+        WHERE revision > %s
+        ORDER BY revision
+        """, (self.last_index_revision,))
+        rows = cursor.fetchall()
+
+        for row in rows:
+            if row["match_id"] in self.matches:
+                self._apply_index_row(row, dirty_lines)
+        if rows:
+            self.last_index_revision = rows[-1]["revision"]
+
+    def _apply_index_row(self, row, dirty_lines: set):
+        """更新单个盘口的189指数，并标记该盘口需要重算"""
+        match_id = row["match_id"]
+        odds_type = row["type"]
+        index_key = (row["line_value"], row["side"])
+        self.line_index[(match_id, odds_type)][index_key] = float(row["index_value"])
+
+        for value, side in self.lines.get((match_id, odds_type), ()):
+            if (normalize_line_value(value), side) == index_key:
+                dirty_lines.add((match_id, odds_type, value, side))
+
+    def _drop_match(self, match_id: int):
+        """比赛离开监控窗口，释放其全部状态"""
+        for odds_type in self.CHECK_TYPES:
+            self.lines.pop((match_id, odds_type), None)
+            self.line_index.pop((match_id, odds_type), None)
+        self.windows = {k: v for k, v in self.windows.items() if k[0] != match_id}
+        self.trend_warnings = {k: v for k, v in self.trend_warnings.items() if k[0] != match_id}
+        self.point_states = {k: v for k, v in self.point_states.items() if k[0] != match_id}
+
+    def _evaluate_line(self, match_id: int, odds_type: str, value: str, side: str):
+        """重新评估单个盘口的连续下降与点位跌幅状态"""
+        match = self.matches.get(match_id)
+        if match is None:
+            return
+
+        # 当前盘口的189指数（由聚合程序计算并写入line_189_index，-1表示暂无）
+        current_189 = self.line_index.get((match_id, odds_type), {}).get((normalize_line_value(value), side), -1)
+
+        # 1. 连续下降监控（条件成立时保留警告，不成立时撤销）
+        required_sources = MONITOR_CONFIG["required_sources"]
+        decreasing_sources = []
+        for source_id in required_sources:
+            window = self.windows.get((match_id, odds_type, value, side, source_id))
+            if window and analyze_odds_trend(list(window.records), MONITOR_CONFIG["consecutive_decreases"]):
+                decreasing_sources.append(source_id)
+
+        trend_triggered = False
+        source2_window = self.windows.get((match_id, odds_type, value, side, 2))
+        latest_odds = source2_window.latest_odds if source2_window else None
+        if latest_odds is not None:
+            # 判断是否符合赔率范围
+            odds_in_range = False
+            if latest_odds >= 0 and latest_odds >= MONITOR_CONFIG["min_odds"]:
+                odds_in_range = True
+            elif latest_odds < 0 and latest_odds <= MONITOR_CONFIG["max_odds"]:
+                odds_in_range = True
+
+            # 过滤：仅保留当前盘口189指数≥阈值的情况
+            trend_triggered = (odds_in_range
+                               and current_189 >= MONITOR_CONFIG["threshold_189"]
+                               and len(decreasing_sources) == len(required_sources))
+
+        trend_key = (match_id, odds_type, value, side)
+        if not trend_triggered:
+            self.trend_warnings.pop(trend_key, None)
+        elif trend_key not in self.trend_warnings:
+            self.trend_warnings[trend_key] = WarningMessage(
+                match_name=match["match_name"],
+                start_time_beijing=match["start_time_beijing"],
+                type=odds_type,
+                value=value,
+                side=side,
+                warning_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                sources=decreasing_sources,
+                league_name=match["league_name"],
+                home_team=match["home_team"],
+                away_team=match["away_team"],
+                result_value=str(current_189)  # 显示当前盘口的189指数
+            )
+
+        # 2. 点位监控（仅在未触发→触发的跃迁时产生警告）
+        if not MONITOR_CONFIG["point_monitor_enabled"]:
+            return
+
+        time_window = MONITOR_CONFIG["point_check_minutes"]
+        threshold = MONITOR_CONFIG["point_threshold"]
+        for source_id in MONITOR_CONFIG["point_monitor_sources"]:
+            state_key = (match_id, odds_type, value, side, source_id)
+            window = self.windows.get(state_key)
+            if not window or len(window.records) < 2:
+                continue
+
+            has_drop, drop_points, prev_odds, curr_odds = analyze_odds_point_drop(list(window.records), time_window)
+            point_triggered = has_drop and drop_points >= threshold
+            was_triggered = self.point_states.get(state_key, False)
+            self.point_states[state_key] = point_triggered
+            if not point_triggered or was_triggered:
+                continue
+
+            # 检查是否已触发过该警告（已触发过直接跳过，不再写数据库）
+            if not TRIGGERED_WARNINGS.add(match_id, match["start_time_ts"], odds_type, value, side, source_id):
+                logger.info(f"重复点位警告拦截：match_id={match_id}, {odds_type} {value} {side} source={source_id}")
+                continue
+
+            warning = PointWarningMessage(
+                match_name=match["match_name"],
+                start_time_beijing=match["start_time_beijing"],
+                type=odds_type,
+                value=value,
+                side=side,
+                warning_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                sources=[source_id],
+                league_name=match["league_name"],
+                home_team=match["home_team"],
+                away_team=match["away_team"],
+                result_value=f"跌幅{drop_points:.1f}点",
+                time_window=time_window,
+                drop_points=drop_points,
+                threshold_points=threshold,
+                previous_odds=prev_odds,
+                current_odds=curr_odds
+            )
+            # 点位警告持久化到数据库，由/api/cached-warnings统一读取
+            save_point_warning_to_db(warning)
+
+
+MONITOR_ENGINE = IncrementalOddsMonitor()
+
+
+# 监控系统 - 发布警告快照
+def update_warnings_cache():
+    """执行一个监控周期，并把当前警告发布到数据库供API读取"""
+    try:
+        TRIGGERED_WARNINGS.purge_expired()
+
+        # 获取最新警告（增量引擎只处理上次之后新增的赔率记录）
+        new_warnings = MONITOR_ENGINE.run_pass()
+        if new_warnings is None:
+            return
+
+        if publish_warning_snapshot(new_warnings):
+            logger.info(f"警告快照已发布，当前有 {len(new_warnings)} 条警告")
+
+    except Exception as e:
+        logger.error(f"更新警告缓存失败: {e}")
+
+
+def wait_for_next_pass(seconds: float):
+    """等待下一个监控周期；期间每秒刷新配置，启用状态或参数变化时提前开始下一周期"""
+    current_config = json.dumps(MONITOR_CONFIG, sort_keys=True)
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        time.sleep(min(CONFIG_POLL_INTERVAL, max(0, deadline - time.time())))
+        load_monitor_config()
+        if json.dumps(MONITOR_CONFIG, sort_keys=True) != current_config:
+            logger.info(f"监控配置已变化: {MONITOR_CONFIG}")
+            return
+
+
+# 监控系统 - 主循环
+def monitor_loop():
+    """赔率监控主循环"""
+    logger.info("赔率监控系统已启动")
+
+    # 初始更新一次警告缓存
+    load_monitor_config()
+    update_warnings_cache()
+
+    while True:
+        # 检查是否需要运行（任一监控启用）
+        if MONITOR_CONFIG["enabled"] or MONITOR_CONFIG["point_monitor_enabled"]:
+            try:
+                start_time = time.time()
+
+                # 更新警告缓存
+                update_warnings_cache()
+
+                end_time = time.time()
+                execution_time = end_time - start_time
+
+                # 计算下一次检查的等待时间
+                wait_time = max(0, MONITOR_CONFIG["check_interval"])
+                logger.info(f"监控周期完成，耗时 {execution_time:.2f} 秒，下次检查将在 {wait_time:.2f} 秒后进行")
+
+                wait_for_next_pass(wait_time)
+
+            except Exception as e:
+                logger.error(f"监控循环异常: {e}")
+                wait_for_next_pass(MONITOR_CONFIG["check_interval"])
+        else:
+            # 两种监控都禁用时，休眠较长时间
+            wait_for_next_pass(60)
+
+
+def acquire_worker_lock():
+    """
+    获取全局唯一的worker咨询锁（会话级，连接断开时自动释放）
+    :return: 持有锁的数据库连接（进程存活期间必须保持打开）；已有其他worker运行时返回None
+    """
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (MONITOR_ADVISORY_LOCK_KEY,))
+            if cursor.fetchone()[0]:
+                return conn
+        conn.close()
+        logger.error("已有其他监控worker正在运行，本进程退出")
+    except Exception as e:
+        logger.error(f"获取监控worker锁失败: {e}")
+    return None
+
+
+# 启动worker
+if __name__ == "__main__":
+    lock_conn = acquire_worker_lock()
+    if lock_conn is not None:
+        try:
+            # 初始化数据库连接池
+            init_db_pool()
+            # 初始化点位警告表与监控状态表
+            init_point_warnings_table()
+            repair_point_warnings_constraint()
+            init_monitor_tables()
+            # 恢复点位警告去重记录
+            TRIGGERED_WARNINGS.load_from_db()
+
+            monitor_loop()
+        finally:
+            lock_conn.close()
@@ -1,4 +1,5 @@
 import re
+import json
 import time
 import requests
 import psycopg2
@@ -13,6 +14,8 @@ from flask import Flask, request, jsonify
 import threading
 from threading import local
 
+from handicap_pairing import group_opposites, line_keys
+
 app = Flask(__name__)
 analyzer = None  # 全局分析器实例
 CORS(app)  # 允许跨域请求
@@ -34,6 +37,7 @@ class SportsOddsAnalyzer:
         # 常量定义
         self.STAKE_PER_BET = 100  # 每单下注金额
         self.API_URL = "http://160.25.20.18:8766/api/daily-odds"  # 全量计算API地址
+        self.API_STREAM_ENABLED = True  # 使用NDJSON流式格式拉取（边下载边解析，不必等待整月数据序列化完成）
 
         # 新增：同方向盘口过滤开关
         self.side_filter_enabled = False  # 默认开启同方向盘口过滤
@@ -498,6 +502,9 @@ class SportsOddsAnalyzer:
         if source_filter:
             params["source_filter"] = source_filter
 
+        if self.API_STREAM_ENABLED:
+            return self.fetch_data_from_api_stream(params)
+
         try:
             # 发送请求
             response = requests.get(self.API_URL, params=params, timeout=300)
@@ -514,6 +521,38 @@ class SportsOddsAnalyzer:
         except requests.exceptions.RequestException as e:
             return False, [], f"请求API失败: {str(e)}"
 
+    def fetch_data_from_api_stream(self, params: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]], str]:
+        """
+        以NDJSON流式格式获取赛事数据：每行一场比赛，末行为汇总（含status和count）
+
+        返回:
+            (是否成功, 数据列表, 消息)
+        """
+        matches = []
+        try:
+            with requests.get(self.API_URL, params={**params, "format": "ndjson"},
+                              timeout=300, stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    item = json.loads(line)
+
+                    # 汇总行：校验完整性后返回
+                    if "status" in item:
+                        if item.get("status") != "success":
+                            return False, [], f"API返回错误: {item.get('message', '未知错误')}"
+                        if item.get("count") != len(matches):
+                            return False, [], f"数据不完整: 汇总{item.get('count')}场，实收{len(matches)}场"
+                        return True, matches, f"成功获取 {len(matches)} 场比赛数据"
+
+                    matches.append(item)
+
+            return False, [], "数据流意外结束（缺少汇总行）"
+
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return False, [], f"请求API失败: {str(e)}"
+
 
     # 修改1：重写早收盘过滤函数，按盘口分组判断
     def filter_odds_by_early_close(self, match: Dict[str, Any], odds_list: List[Dict[str, Any]]) -> List[
@@ -1092,63 +1131,9 @@ class SportsOddsAnalyzer:
 
         return pass_min and pass_max
 
-    # 判断两个盘口是否为上下盘关系
-    def are_opposite_odds(self, a: Dict[str, Any], b: Dict[str, Any]) -> bool:
-        # 必须是同一场比赛
-        if a.get('match') != b.get('match'):
-            return False
-
-        # 必须是同一类型的盘口
-        if a.get('market') != b.get('market'):
-            return False
-
-        # 让分盘上下盘判断
-        if a.get('market') == 'spread':
-            a_handicap = self.safe_number(a.get('handicap'))
-            b_handicap = self.safe_number(b.get('handicap'))
-
-            if a_handicap is None or b_handicap is None:
-                return False
-
-            # 让分0的情况，只需队伍方向相反
-            if a_handicap == 0 and b_handicap == 0:
-                return self.are_opposite_sides(a.get('side'), b.get('side'))
-
-            # 盘口绝对值相同，符号相反，且队伍方向相反
-            return (abs(a_handicap) == abs(b_handicap) and
-                    a_handicap == -b_handicap and
-                    self.are_opposite_sides(a.get('side'), b.get('side')))
-
-        # 大小球盘上下盘判断
-        if a.get('market') == 'total':
-            # 盘口值相同，方向相反(over/under)
-            a_side = str(a.get('side')).lower() if a.get('side') else ''
-            b_side = str(b.get('side')).lower() if b.get('side') else ''
-
-            return (a.get('handicap') == b.get('handicap') and
-                    (('over' in a_side and 'under' in b_side) or
-                     ('under' in a_side and 'over' in b_side)))
-
-        return False
-
-    # 判断两个队伍方向是否相反
-    def are_opposite_sides(self, side_a: Any, side_b: Any) -> bool:
-        side_a = str(side_a).lower() if side_a else ''
-        side_b = str(side_b).lower() if side_b else ''
-
-        is_home_a = ('home' in side_a or '主' in side_a or
-                     re.match(r'^h$', side_a) or side_a == '主队')
-
-        is_away_a = ('away' in side_a or '客' in side_a or
-                     re.match(r'^a$', side_a) or side_a == '客队')
-
-        is_home_b = ('home' in side_b or '主' in side_b or
-                     re.match(r'^h$', side_b) or side_b == '主队')
-
-        is_away_b = ('away' in side_b or '客' in side_b or
-                     re.match(r'^a$', side_b) or side_b == '客队')
-
-        return (is_home_a and is_away_b) or (is_away_a and is_home_b)
+    # 盘口的（自身键, 上下盘键），用于哈希配对
+    def odds_line_keys(self, odd: Dict[str, Any]):
+        return line_keys(odd.get('market'), odd.get('handicap'), odd.get('side'))
 
     # 从上下盘中选择最优投注项
     def select_best_odd_from_opposites(self, opposites: List[Dict[str, Any]], comparison_type: str) -> List[
@@ -1514,30 +1499,14 @@ class SportsOddsAnalyzer:
                         'predictedWin': predicted_win
                     })
 
-            # 识别并处理上下盘
+            # 识别并处理上下盘（同一场比赛内按盘口键哈希分组，线性时间）
             processed_odds = []
-            processed_indices = set()
-
-            # 找出所有上下盘组合
-            for i in range(len(match_odds)):
-                if i in processed_indices:
-                    continue
-
-                current = match_odds[i]
-                opposites = [current]
-
-                for j in range(i + 1, len(match_odds)):
-                    if j in processed_indices:
-                        continue
-
-                    if self.are_opposite_odds(current, match_odds[j]):
-                        opposites.append(match_odds[j])
-                        processed_indices.add(j)
+            for group in group_opposites(match_odds, self.odds_line_keys):
+                opposites = [match_odds[idx] for idx in group]
 
                 # 从上下盘中选择最优的一个
                 best_odds = self.select_best_odd_from_opposites(opposites, comparison_type)
                 processed_odds.extend(best_odds)
-                processed_indices.add(i)
 
             # 新增：应用同方向盘口过滤（默认开启）
             if self.side_filter_enabled:
@@ -0,0 +1,184 @@
+"""
+handicap_pairing的等价性测试：以哈希配对替换前的两两比较实现作为参照，
+在随机盘口（含±0、重复盘口、中文方向）上比较配对与分组结果
+"""
+import random
+import re
+
+import pytest
+
+from handicap_pairing import group_opposites, line_keys, pair_opposites, safe_number
+
+SEEDS = range(200)
+
+SPREAD_VALUES = [0, 0.0, -0.0, "0", "-0", "0.0", "-0.0", 0.25, -0.25, "0.5", "-0.5", 0.5, -0.5,
+                 "0.50", "-0.50", 1, -1, "1", "-1", "1.0", "-1.0", 1.25, "-1.25", "2.5", "-2.5"]
+TOTAL_VALUES = ["2", "2.0", "2.25", "2.5", "3", 2.5, 3]
+SPREAD_SIDES = ["home", "away", "HOME", "Away", "h", "a", "H", "A", "主", "客", "主队", "客队", "draw", "", None]
+TOTAL_SIDES = ["over", "under", "Over", "UNDER", "over 2.5", "under 2.5", "", None]
+
+
+# ---------------------- 参照实现（替换前的两两比较逻辑） ----------------------
+def reference_analyzer_pairs(handicaps):
+    """Analyzer原filter_opposite_handicaps：每个盘口与其后第一个未配对的对手盘配对"""
+    used = set()
+    opposite_pairs = []
+    for i, h1 in enumerate(handicaps):
+        if i in used:
+            continue
+        h1_handi = safe_number(h1.get("handicap", 0)) or 0.0
+        h1_side = h1.get("side", "")
+
+        for j, h2 in enumerate(handicaps[i + 1:], i + 1):
+            if j in used:
+                continue
+            h2_handi = safe_number(h2.get("handicap", 0)) or 0.0
+            h2_side = h2.get("side", "")
+
+            is_opposite = False
+            if h1_handi == 0.0 and h2_handi == 0.0 and h1_side != h2_side:
+                is_opposite = True
+            elif abs(h1_handi) == abs(h2_handi) and h1_handi * h2_handi < 0 and h1_side != h2_side:
+                is_opposite = True
+
+            if is_opposite:
+                opposite_pairs.append((i, j))
+                used.add(i)
+                used.add(j)
+                break
+
+    unpaired = [idx for idx in range(len(handicaps)) if idx not in used]
+    return opposite_pairs, unpaired
+
+
+def reference_are_opposite_sides(side_a, side_b):
+    """SportsOddsAnalyzer原are_opposite_sides"""
+    side_a = str(side_a).lower() if side_a else ''
+    side_b = str(side_b).lower() if side_b else ''
+
+    is_home_a = ('home' in side_a or '主' in side_a or
+                 re.match(r'^h$', side_a) or side_a == '主队')
+    is_away_a = ('away' in side_a or '客' in side_a or
+                 re.match(r'^a$', side_a) or side_a == '客队')
+    is_home_b = ('home' in side_b or '主' in side_b or
+                 re.match(r'^h$', side_b) or side_b == '主队')
+    is_away_b = ('away' in side_b or '客' in side_b or
+                 re.match(r'^a$', side_b) or side_b == '客队')
+
+    return bool((is_home_a and is_away_b) or (is_away_a and is_home_b))
+
+
+def reference_are_opposite_odds(a, b):
+    """SportsOddsAnalyzer原are_opposite_odds"""
+    if a.get('match') != b.get('match'):
+        return False
+    if a.get('market') != b.get('market'):
+        return False
+
+    if a.get('market') == 'spread':
+        a_handicap = safe_number(a.get('handicap'))
+        b_handicap = safe_number(b.get('handicap'))
+        if a_handicap is None or b_handicap is None:
+            return False
+        if a_handicap == 0 and b_handicap == 0:
+            return reference_are_opposite_sides(a.get('side'), b.get('side'))
+        return (abs(a_handicap) == abs(b_handicap) and
+                a_handicap == -b_handicap and
+                reference_are_opposite_sides(a.get('side'), b.get('side')))
+
+    if a.get('market') == 'total':
+        a_side = str(a.get('side')).lower() if a.get('side') else ''
+        b_side = str(b.get('side')).lower() if b.get('side') else ''
+        return (a.get('handicap') == b.get('handicap') and
+                (('over' in a_side and 'under' in b_side) or
+                 ('under' in a_side and 'over' in b_side)))
+
+    return False
+
+
+def reference_full_scan_groups(match_odds):
+    """SportsOddsAnalyzer原do_full_scan的上下盘分组"""
+    groups = []
+    processed_indices = set()
+    for i in range(len(match_odds)):
+        if i in processed_indices:
+            continue
+        group = [i]
+        for j in range(i + 1, len(match_odds)):
+            if j in processed_indices:
+                continue
+            if reference_are_opposite_odds(match_odds[i], match_odds[j]):
+                group.append(j)
+                processed_indices.add(j)
+        processed_indices.add(i)
+        groups.append(group)
+    return groups
+
+
+# ---------------------- 随机盘口 ----------------------
+def random_analyzer_handicaps(rng):
+    """Analyzer的候选盘口：数值盘口、home/away方向，包含重复盘口"""
+    lines = [{"handicap": rng.choice(SPREAD_VALUES), "side": rng.choice(["home", "away"])}
+             for _ in range(rng.randint(0, 12))]
+    return lines + [dict(rng.choice(lines)) for _ in range(rng.randint(0, 4))] if lines else lines
+
+
+def random_match_odds(rng):
+    """SportsOddsAnalyzer的单场比赛盘口：让分与大小球混合，方向含中文与简写，包含重复盘口"""
+    odds = []
+    for _ in range(rng.randint(0, 14)):
+        if rng.random() < 0.6:
+            odds.append({"match": "m", "market": "spread", "handicap": rng.choice(SPREAD_VALUES + ["abc", None]),
+                         "side": rng.choice(SPREAD_SIDES)})
+        else:
+            odds.append({"match": "m", "market": "total", "handicap": rng.choice(TOTAL_VALUES),
+                         "side": rng.choice(TOTAL_SIDES)})
+    return odds + [dict(rng.choice(odds)) for _ in range(rng.randint(0, 4))] if odds else odds
+
+
+def odds_line_keys(odd):
+    """与SportsOddsAnalyzer.odds_line_keys一致"""
+    return line_keys(odd.get('market'), odd.get('handicap'), odd.get('side'))
+
+
+# ---------------------- 测试 ----------------------
+@pytest.mark.parametrize("seed", SEEDS)
+def test_pair_opposites_matches_nested_scan(seed):
+    rng = random.Random(seed)
+    handicaps = random_analyzer_handicaps(rng)
+    expected = reference_analyzer_pairs(handicaps)
+    actual = pair_opposites(handicaps, lambda h: line_keys("spread", h.get("handicap"), h.get("side")))
+    assert actual == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_group_opposites_matches_full_scan(seed):
+    rng = random.Random(seed)
+    match_odds = random_match_odds(rng)
+    assert group_opposites(match_odds, odds_line_keys) == reference_full_scan_groups(match_odds)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_line_keys_agree_with_pairwise_rule(seed):
+    rng = random.Random(seed)
+    match_odds = random_match_odds(rng)
+    for a in match_odds:
+        for b in match_odds:
+            a_keys, b_keys = odds_line_keys(a), odds_line_keys(b)
+            assert (a_keys is not None and b_keys is not None and a_keys[1] == b_keys[0]) == \
+                reference_are_opposite_odds(a, b)
+
+
+def test_signed_zero_spreads_pair_across_sides():
+    handicaps = [{"handicap": "-0", "side": "home"}, {"handicap": 0.0, "side": "home"},
+                 {"handicap": "0", "side": "away"}]
+    pairs, unpaired = pair_opposites(handicaps, lambda h: line_keys("spread", h["handicap"], h["side"]))
+    assert pairs == [(0, 2)]
+    assert unpaired == [1]
+
+
+def test_chinese_side_labels_group_with_english():
+    match_odds = [{"market": "spread", "handicap": "-0.5", "side": "主队"},
+                  {"market": "spread", "handicap": "0.5", "side": "away"},
+                  {"market": "spread", "handicap": 0.5, "side": "客"}]
+    assert group_opposites(match_odds, odds_line_keys) == [[0, 1, 2]]
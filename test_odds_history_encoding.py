@@ -0,0 +1,60 @@
+"""
+odds_history预编码快速路径的等价性测试：以response_model的序列化结果（model_dump_json）作为参照，
+在含Decimal赔率、datetime时间与缺省字段的载荷上逐字节比较
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from odds_history import (DAILY_ODDS_RESPONSE_FIELDS, HISTORY_RESPONSE_FIELDS, DailyOddsResponse,
+                          HistoryResponse, encode_model_payload, format_odds_record)
+
+
+def daily_payload():
+    return {
+        "status": "success",
+        "start_date": "2025-01-01",
+        "end_date": "2025-01-02",
+        "count": 1,
+        "data": [{
+            "match_id": 1,
+            "match_name": "主队 vs 客队",
+            "league_name": "联赛",
+            "home_team": "主队",
+            "away_team": "客队",
+            "start_time_beijing": "2025-01-01 20:00:00",
+            "full_time": None,
+            "half_time": "1-0",
+            "spread_odds": [{"handicap": Decimal("-0.25"), "side": "home", "sources": {
+                1: [{"odds": Decimal("0.850"), "time": datetime(2025, 1, 1, 0, 0, 0)},
+                    {"odds": Decimal("0.875"), "time": "2025-01-01 00:05:00"}]}}],
+            "total_odds": [{"total": Decimal("2.5"), "side": "over", "sources": {
+                2: [{"odds": Decimal("1.01"), "time": datetime(2025, 1, 1, 0, 0, 30, 123456)}]}}],
+        }],
+    }
+
+
+def test_daily_odds_payload_matches_model_dump_json():
+    payload = daily_payload()
+    expected = DailyOddsResponse(**payload).model_dump_json().encode("utf-8")
+    assert encode_model_payload(DAILY_ODDS_RESPONSE_FIELDS, payload) == expected
+
+
+def test_daily_odds_error_payload_matches_model_dump_json():
+    payload = {"status": "error", "start_date": "2025-01-01", "end_date": "2025-01-02", "count": 0,
+               "message": "查询失败"}
+    expected = DailyOddsResponse(**payload).model_dump_json().encode("utf-8")
+    assert encode_model_payload(DAILY_ODDS_RESPONSE_FIELDS, payload) == expected
+
+
+def test_history_payload_matches_model_dump_json():
+    rows = [{"source": 1, "odds": Decimal("0.850"), "time": datetime(2025, 1, 1, 0, 0, 0)},
+            {"source": 2, "odds": Decimal("1.925"), "time": datetime(2025, 1, 1, 12, 30, 45)}]
+    payload = {"status": "success", "data": [format_odds_record(row) for row in rows]}
+    expected = HistoryResponse(**payload).model_dump_json().encode("utf-8")
+    assert encode_model_payload(HISTORY_RESPONSE_FIELDS, payload) == expected
+
+
+def test_history_error_payload_matches_model_dump_json():
+    payload = {"status": "error", "message": "比赛不存在"}
+    expected = HistoryResponse(**payload).model_dump_json().encode("utf-8")
+    assert encode_model_payload(HISTORY_RESPONSE_FIELDS, payload) == expected